@@ -1,9 +1,13 @@
+import argparse
+import os
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from functools import reduce
 from enum import Enum, auto
 from time import time
 
 from prompt_toolkit import HTML
+from prompt_toolkit.document import Document
 from prompt_toolkit.styles import Style
 from prompt_toolkit.layout.controls import FormattedTextControl
 from prompt_toolkit.filters import renderer_height_is_known, has_focus
@@ -31,11 +35,13 @@ from prompt_toolkit.key_binding.key_bindings import KeyBindings, merge_key_bindi
 from prompt_toolkit.key_binding.bindings.focus import focus_next, focus_previous
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.application import Application
-
-
-# the target element to focus when switching scenes. if none, equals None.
-# this is safe because only one app can run at a time
-global__default_target_focus = None
+from story_graph import load_story_graph, StoryNodeType, ROOT_NODE_ID
+from choice_history import ChoiceHistory
+from session_store import (
+    SessionJournal,
+    record_from_history,
+    history_from_record
+)
 
 
 def exit_current_app():
@@ -142,12 +148,12 @@ class HelpScreenState:
 class PlayingScreenState:
     root_screen_type = RootScreenType.PLAYING
 
-    def __init__(self, username, choice_history, choice_index, start_time):
+    def __init__(self, username, choice_history, start_time):
         self.username = username  # player username
-        # history of previous/next game panels/choice panels
+        # ChoiceHistory of the story nodes the player went through. keeps
+        # the position too, incase goes back one choice, so can go forwards
+        # again
         self.choice_history = choice_history
-        # incase goes back one choice, so can go forwards again
-        self.choice_index = choice_index
         self.start_time = start_time  # time that player started the game
 
 
@@ -190,15 +196,57 @@ def create_horizontal_button_list_kbs(buttons):
     return create_button_list_kbs(buttons, 'left', 'right')
 
 
+def save_session(controller):
+    "Saves the game in progress, if the controller has a session journal"
+    journal = controller.session_journal
+    if journal is None:
+        return
+
+    state = controller.state
+    journal.save(record_from_history(
+        story_graph, state.username, state.start_time, state.choice_history))
+
+
+def load_saved_session(controller, username):
+    """The PlayingScreenState of the game `username` saved earlier, or None.
+    Saves that no longer fit the story are dropped"""
+    journal = controller.session_journal
+    if journal is None:
+        return None
+
+    record = journal.load(username)
+    if record is None:
+        return None
+
+    try:
+        choice_history = history_from_record(story_graph, record)
+    except IndexError:
+        journal.delete(username)
+        return None
+
+    return PlayingScreenState(
+        username=username,
+        choice_history=choice_history,
+        start_time=record.start_time
+    )
+
+
 def MenuScreen(controller):
     def on_start_click():
         new_state = PlayingScreenState(
             username=controller.state.username,
-            choice_history=[root_branch],
-            choice_index=0,
+            choice_history=ChoiceHistory.start(ROOT_NODE_ID),
             start_time=time()
         )
         controller.set_state(new_state)
+        save_session(controller)
+
+    def on_continue_click():
+        new_state = load_saved_session(controller, controller.state.username)
+        if new_state is None:
+            on_start_click()
+        else:
+            controller.set_state(new_state)
 
     def on_help_click():
         new_state = HelpScreenState(
@@ -213,6 +261,10 @@ def MenuScreen(controller):
         Button('quit', handler=exit_current_app)
     ]
 
+    journal = controller.session_journal
+    if journal is not None and controller.state.username in journal:
+        buttons.insert(0, Button('continue', handler=on_continue_click))
+
     kb = create_vertical_button_list_kbs(buttons)
 
     body = Box(
@@ -288,20 +340,24 @@ def HelpScreen(controller):
 
 
 def get_current_choice(controller):
-    return controller.state.choice_history[controller.state.choice_index]
+    return controller.state.choice_history.current
 
 
-def push_component(controller, component):
+def set_choice_history(controller, choice_history):
     state = controller.state
     new_state = PlayingScreenState(
         username=state.username,
-        choice_history=state.choice_history[
-            :state.choice_index+1] + [component],
-        choice_index=state.choice_index + 1,
-        start_time=controller.state.start_time
+        choice_history=choice_history,
+        start_time=state.start_time
     )
 
     controller.set_state(new_state)
+    save_session(controller)
+
+
+def push_component(controller, node_id):
+    set_choice_history(
+        controller, controller.state.choice_history.push(node_id))
 
 
 class GameComponent(ABC):
@@ -309,18 +365,36 @@ class GameComponent(ABC):
     def render(self):
         pass
 
+    def on_show(self):
+        """Called every time the rendered component is shown, including when
+        it is reused from the render cache"""
+        pass
+
     def refocus(self):
         pass
 
 
+def passage_document(controller, node_id):
+    """The passage of a story node with the player's name filled in. The
+    Document is cached per session, so showing a passage again neither
+    formats the text nor indexes its lines again"""
+    username = controller.state.username
+
+    return controller.passage_cache.get(
+        (node_id, username),
+        lambda: Document(
+            story_graph.passage_template(node_id).render(username)+'\n', 0)
+    )
+
+
 class ListChoice(GameComponent):
-    def __init__(self, controller, label, choices):
+    def __init__(self, controller, node):
         self._controller = controller
-        self._label = label
-        self._choices = choices
+        self._node_id = node.node_id
+        self._choices = node.choices
 
-    def _create_handler(self, sub_component):
-        return lambda: push_component(self._controller, sub_component)
+    def _create_handler(self, child_id):
+        return lambda: push_component(self._controller, child_id)
 
     def render(self):
         choices_len = len(self._choices)
@@ -328,33 +402,33 @@ class ListChoice(GameComponent):
         buttons = [
             Button(
                 '[%s] %s' % (i, label) if choices_len > 1 else label,
-                handler=self._create_handler(sub_component)
-            ) for ((label, sub_component), i) in zip(
+                handler=self._create_handler(child_id)
+            ) for ((label, child_id), i) in zip(
                 self._choices, range(1, choices_len+1))  # this is still a loop even if it is inline..
         ]
 
         self._first_button = buttons[0]
 
-        global global__default_target_focus
-        global__default_target_focus = self._first_button
-
         kb = create_vertical_button_list_kbs(buttons)
 
         is_first_selected = has_focus(buttons[0])
         kb.add('up', filter=is_first_selected)(lambda e: focus_first_element())
 
+        text_area = TextArea(
+            read_only=True,
+            focusable=False,
+            scrollbar=True,
+            # push buttons to bottom of screen
+            height=Dimension(preferred=100000, max=100000)
+        )
+        text_area.buffer.set_document(
+            passage_document(self._controller, self._node_id),
+            bypass_readonly=True)
+
         return Box(
             HSplit(
                 [
-                    TextArea(
-                        text=self._label.format(
-                            name=self._controller.state.username)+'\n',
-                        read_only=True,
-                        focusable=False,
-                        scrollbar=True,
-                        # push buttons to bottom of screen
-                        height=Dimension(preferred=100000, max=100000)
-                    ),
+                    text_area,
                     HSplit(
                         [
                             VSplit(
@@ -373,14 +447,13 @@ class ListChoice(GameComponent):
             padding=1
         )
 
+    def on_show(self):
+        self._controller.target_focus = self._first_button
+
     def refocus(self):
         get_app().layout.focus(self._first_button)
 
 
-def list_choice(label, choices):
-    return lambda controller: ListChoice(controller, label, choices)
-
-
 def format_time(time_played):
     m, s = divmod(round(time_played), 60)
     h, m = divmod(m, 60)
@@ -389,178 +462,96 @@ def format_time(time_played):
 
 
 class EndScreen(GameComponent):
-    def __init__(self, controller, label):
+    def __init__(self, controller, node):
         self._controller = controller
-        self._label = label
+        self._node_id = node.node_id
+        self._time_played_text = ''
 
     def render(self):
-        current_time = time()
-        time_played = current_time - self._controller.state.start_time
+        text_area = TextArea(
+            read_only=True,
+            focusable=False,
+            scrollbar=True,
+            dont_extend_height=True
+        )
+        text_area.buffer.set_document(
+            passage_document(self._controller, self._node_id),
+            bypass_readonly=True)
+
+        # the time played is the only part of the screen that changes, so
+        # it is kept out of the passage
+        time_played = Window(
+            content=FormattedTextControl(lambda: self._time_played_text),
+            wrap_lines=True,
+            dont_extend_height=True
+        )
 
         return Box(
-            TextArea(
-                text=self._label.format(
-                    name=self._controller.state.username)+'\n\nTime Played:\n'+format_time(time_played)+'\n',
-                read_only=True,
-                focusable=False,
-                scrollbar=True
-            ),
+            HSplit([text_area, time_played], align=VerticalAlign.TOP),
             padding=1
         )
 
+    def on_show(self):
+        current_time = time()
+        time_played = current_time - self._controller.state.start_time
 
-def end_screen(label):
-    return lambda controller: EndScreen(controller, label)
+        self._time_played_text = 'Time Played:\n'+format_time(time_played)+'\n'
 
 
-stop_squirming_end_screen = end_screen(
-    '"Ah. It seems you are smarter then everyone else from today. Good."\n\nВладлен approaches you. He now stands right beside your bed.\n\n"It seems you are still awake! That is great... for me. You see, we, the slav mafia, have been testing this thing... ah yes, this beautiful thing that turns humans... like you... into animals."\n\n"But so far it has only worked on the strong... lucky you! You get to test it! Ah, isn\'t that wonderful!." He picks up a needle from the table beside you, and thrusts it into you. You fall asleep...\n\nA couple hours pass. You wake up, dazed.\n\n"Where am I?" You look around. You\'re surrounded by grass, meters taller than you are. In the distance you hear the sound of bunnies prancing around...\n\n"Oh no..."\n\nIn your back you feel a tracker hidden by a layer of fur. You are stuck in this field forever.'
-)
+# compiled story, memory-mapped. nodes are only decoded when they are shown
+story_graph = load_story_graph()
 
-go_for_glory_end_screen = end_screen(
-    'You go for glory. You violently thrust your hands upwards, absolutely destroying the handcuffs. A wave of confidence rushes over you. You can do this! You reach for the mallet. The slav punches you in your face, fracturing your skull, immediately knocking you out. You never wake up'
-)
+game_component_types = {
+    StoryNodeType.LIST_CHOICE: ListChoice,
+    StoryNodeType.END_SCREEN: EndScreen
+}
 
-root_branch = list_choice(
-    'You slowly wake up. "Hello {name}..." you hear in the distance. "You can call me Владлен."',
-    [
-        (
-            '"Who?"',
-            list_choice(
-                '"Ah yes. I forgot. Your an ignorant Australian. You have never been in Russia. Until now. And who am I? I am doctor Владлен..."\n\nYou feel weak. You struggle to stay awake.',
-                [
-                    (
-                        'Get up. Try to fight this man',
-                        list_choice(
-                            'You try to lift yourself up. But you can\'t move! You\'re eyeseight strengthens, and you look around. Everything\'s white...\n\n"What?..." you think, confused.\n\nYou\'re body tenses... you regain movement, but you still can\'t feel your hands or legs. You see that you are on a hospital bed, but you can\'t be sure... Владлен is standing to your right.',
-                            [
-                                (
-                                    'Keep squirming. Try to get out of here',
-                                    list_choice(
-                                        'You\'re arms and legs are numb. You violently throw your body left and right. The bed underneath you shakes...\n\n"You FOOL! You think you can escape? Think again!" Владлен laughs russian style...\n\nYou\'re eyes clear up and you get a good glimpse of him. He looks exactly like you thought he would look like:\n    Bald head,\n    Tattoos all over his hairy chest,\n    Muscles bigger than you\'re entire body.\n\nHe is squatting at you, both him and his adidas tracksuit are glaring straight into your eyes. You\'re worst nightmare has come to light...\n\nYOU HAVE BEEN CAPTURED BY A SLAV!',
-                                        [
-                                            (
-                                                'Keep squirming. More violent',
-                                                list_choice(
-                                                    'You\'re arms are still numb. It\'s still useless. But nevertheless you thrust your body left and right, more violently. It is to no avail...\n\n"I admire you\'re effort. But you must realise you\'re never getting out of here... I will be back in an hour or so"\n\nВладлен walks towards the door, laughing like a madman. As he exits, another slav enters the room. His adidas tracksuit is even more daunting than Владлен\'s. He stares straight at you.',
-                                                    [
-                                                        (
-                                                            'Look around. There\'s got to be something that can help you',
-                                                            list_choice(
-                                                                'Blood rushes to your hands. You can finally feel them! And move them!\n\nYou look at your hands. They are handcuffed to the table. You wiggle them slightly...\n\nThe handcuffs are loose! You\'re sure that if you give it enough force they will snap.\n\nYou\'re heart races... You have a chance to escape! You take in your surroundings. There is a door on the wall in front of you. Maybe it\'s an exit? You look around. To you\'re right, on the table next to your bed, there is a mallet. Just as you\'re about to go for glory, fear engulfs you as you\'re reminded of the slav staring into you\'re soul.',
-                                                                [
-                                                                    (
-                                                                        'Go for Glory! Try to escape right now!',
-                                                                        go_for_glory_end_screen
-                                                                    ),
-                                                                    (
-                                                                        'Too risky. Wait for another opportunity...',
-                                                                        list_choice(
-                                                                            'You decide to wait for another opportunity. 5 minutes pass... Nothing changes. The slav is still staring straight into your soul. Creepy. Also scary, very scary\n\n10 minutes pass... Nothing.',
-                                                                            [
-                                                                                (
-                                                                                    'It\'s now or never. Go for glory!',
-                                                                                    go_for_glory_end_screen
-                                                                                ),
-                                                                                (
-                                                                                    'Wait for another opportunity... Who knows',
-                                                                                    list_choice(
-                                                                                        'You\'re basic freeze instincts have kicked in...\nAfter an hour of excruciating waiting... The slav whimpers... "My bladder!"\n\nHe swiftly leaves out the door, holding his crotch.',
-                                                                                        [
-                                                                                            (
-                                                                                                'This is your chance. Escape!',
-                                                                                                list_choice(
-                                                                                                    'You thrust you\'re hands free from the handcuffs. Blood rushes through your body. You stand up...\n\nInstinctively, you grab the mallet and hold it in an offensive position, ready to strike. You tippy toe out towards the door. The door is locked...\n\nSmash! You absolutely obliterate the lock with your hammer. The door swings open. On the outwards facing side of the door you notice a label, "Test Subject #198: {name}"\n\nYou don\'t have time to think. You exit the door, into a corridor stretching left and right. You hear footsteps approaching from around the corner, but you don\'t know which side it\'s coming from!\n\n"Should I go left or right?" you think to yourself.',
-                                                                                                    [
-                                                                                                        (
-                                                                                                            'Go left.',
-                                                                                                            end_screen(
-                                                                                                                'You go left. The footsteps become louder. They approach faster. You start sprinting... faster... faster... the footsteps fade away. You reach a door labelled "Laboratory Exit."\n\nYou open the door. Sunshine! You are free...\n\nYou sprint into the distance, with no idea where you are. You run for days on end, driven by pure fear. You reach several russian villages, all of which are empty. How they are empty, you don\'t know, but you keep running, feeding on the food you find from each village. Eventually you reach the shore. Miraculously, there is a fishing boat waiting for you.\n\n"Weird," you think to yourself, "There\'s no one anywhere..." You get in the boat and row for what seems like an eternity before you eventually reach land. A small island.\n\nYou get off the boat, and step out onto the shore...\n\nYou pass out...\n\nHours pass...\n\nWhen you wake up, your boat is gone. Your are stuck on this island, forced to live off of coconuts and fish for the rest of your life. That is, if you don\'t go insane first...'
-                                                                                                            )
-                                                                                                        ),
-                                                                                                        (
-                                                                                                            'Go right',
-                                                                                                            end_screen(
-                                                                                                                'You go right. The footsteps become louder...\n\nВладлен and his fellow slav turn towards you. You\'re eyes meet. They start sprinting towards you. Only now can you grasp their true size.\n\n"They must be 7 feet each..." you think to yourself. They\'re muscles are huge... Pure terror envelops your mind. Then you stare into their adidas trackpants and realise the enormity of the situation. You are screwed. They sprint faster towards you, their anger and speed increasing every second... You instinctively whimper, before falling into a slump on the ground, passed out from pure terror. You never wake up...')
-                                                                                                        )
-                                                                                                    ]
-                                                                                                )
-                                                                                            )
-                                                                                        ]
-                                                                                    )
-                                                                                )
-                                                                            ]
-                                                                        )
-                                                                    )
-                                                                ]
-                                                            )
-                                                        )
-                                                    ]
-                                                ),
-                                            ),
-                                            (
-                                                'Stop squirming. It\'s no use. Give up.',
-                                                stop_squirming_end_screen
-                                            )
-                                        ]
-                                    )
-                                ),
-                                (
-                                    'Stop moving. See what he has to say',
-                                    stop_squirming_end_screen
-                                )
-                            ]
-                        )
-                    ),
-                    (
-                        'Go back to sleep. Everything will be alright, right?',
-                        end_screen(
-                            'Your vision weakens. Everything goes dark. Five hours pass. You wake up, but your thoughts come slower than usual. You look around. Nothing. You can\'t see anthing... Suddenly, you feel a sharp needle pierce your neck, and in the distance hear several men laughing in evil Russian accents. You pass out, never to wake again.'
-                        )
-                    )
-                ]
-            )
-        )
-    ]
-)
+
+def create_game_component(controller, node_id):
+    node = story_graph.node(node_id)
+    return game_component_types[node.node_type](controller, node)
 
 
 def PlayingScreen(controller):
-    current_component = get_current_choice(controller)
-    component = current_component(controller)
+    state = controller.state
+    node_id = get_current_choice(controller)
+    has_back = state.choice_history.has_back
+    has_next = state.choice_history.has_next
+
+    # going back and forth through the history shows the same screens again,
+    # so reuse the widget tree instead of building it from scratch
+    screen, component = controller.render_cache.get(
+        (node_id, state.username, has_back, has_next),
+        lambda: render_playing_screen(controller, node_id, has_back, has_next)
+    )
+    component.on_show()
+
+    return screen
+
+
+def render_playing_screen(controller, node_id, has_back, has_next):
+    """Renders the playing screen for a story node. The result is cached, so
+    the handlers read the controller state when clicked rather than
+    capturing it now"""
+    component = create_game_component(controller, node_id)
     body = component.render()
-    username = controller.state.username
-    choice_history = controller.state.choice_history
-    choice_index = controller.state.choice_index
 
     def on_back_click():
-        new_state = PlayingScreenState(
-            username=username,
-            choice_history=choice_history,
-            choice_index=choice_index-1,
-            start_time=controller.state.start_time
-        )
-        controller.set_state(new_state)
+        set_choice_history(controller, controller.state.choice_history.back())
 
     def on_help_click():
         new_state = HelpScreenState(
-            username=username,
+            username=controller.state.username,
             previous_state=controller.state
         )
         controller.set_state(new_state)
 
     def on_menu_click():
-        new_state = MenuScreenState(username)
+        new_state = MenuScreenState(controller.state.username)
         controller.set_state(new_state)
 
     def on_next_click():
-        new_state = PlayingScreenState(
-            username=username,
-            choice_history=choice_history,
-            choice_index=choice_index+1,
-            start_time=controller.state.start_time
-        )
-        controller.set_state(new_state)
+        set_choice_history(controller, controller.state.choice_history.next())
 
     buttons = [
         Button('help', handler=on_help_click),
@@ -568,11 +559,11 @@ def PlayingScreen(controller):
         Button('quit', handler=exit_current_app)
     ]
 
-    if choice_index > 0:
+    if has_back:
         buttons.insert(
             0, Button('(back)', handler=on_back_click))
 
-    if choice_index < len(choice_history) - 1:
+    if has_next:
         buttons.append(Button('(next)', handler=on_next_click))
 
     kb = create_horizontal_button_list_kbs(buttons)
@@ -593,7 +584,7 @@ def PlayingScreen(controller):
         height=1
     )
 
-    return ToolbarFrame(body, toolbar_content, put_on_top=True)
+    return ToolbarFrame(body, toolbar_content, put_on_top=True), component
 
 
 def RootScreen(controller):
@@ -612,22 +603,77 @@ def RootScreen(controller):
         return PlayingScreen(controller)
 
 
+class LRUCache:
+    """Bounded cache which evicts the least recently used item once more than
+    maxsize items are stored"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, getter_func):
+        try:
+            self._data.move_to_end(key)
+            return self._data[key]
+        except KeyError:
+            value = self._data[key] = getter_func()
+
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+            return value
+
+    def clear(self):
+        self._data.clear()
+
+
 class Controller:
-    def __init__(self, state, Screen):
+    # max number of rendered screens kept alive per controller
+    render_cache_size = 16
+    # max number of passages (with the player's name filled in) kept alive
+    # per controller
+    passage_cache_size = 16
+
+    def __init__(self, state, Screen, session_journal=None):
         self._Screen = Screen
+        # SessionJournal games in progress are saved to, None to not save
+        self.session_journal = session_journal
+        self.render_cache = LRUCache(self.render_cache_size)
+        self.passage_cache = LRUCache(self.passage_cache_size)
+        # the element to focus after switching screens, None to focus the
+        # first focusable element. kept per controller so that several
+        # applications (eg. telnet sessions) can run in one process
+        self.target_focus = None
+        # set once the controller is put into a layout
+        self.layout = None
         self._container = DynamicContainer(lambda: self._current_screen)
         self.set_state(state)
 
     def set_state(self, new_state):
         self.state = new_state
         self._current_screen = self._Screen(self)
+        self.focus_screen()
+
+    def focus_screen(self):
+        """Moves the focus into the current screen straight away, so that the
+        first render of a new screen already has the right element focused"""
+        if self.layout is None:
+            return
+
+        target = self.target_focus or self._current_screen
+        self.target_focus = None
+
+        try:
+            self.layout.focus(target)
+        except ValueError:
+            pass  # nothing on this screen can be focused
 
     def __pt_container__(self):
         return self._container
 
 
-def RootController(root_state=UsernameScreenState()):
-    return Controller(root_state, RootScreen)
+def RootController(root_state=UsernameScreenState(), session_journal=None):
+    return Controller(root_state, RootScreen, session_journal)
 
 
 root_style = Style.from_dict({
@@ -640,45 +686,75 @@ root_style = Style.from_dict({
 })
 
 
-def build_application():
-    layout = Layout(RootController())
-
-    def ensure_focus(_):
-        """Ensures that at least one element on the screen is focused"""
-        app = get_app()
-
-        # prompt_toolkit's implementation of focusing is retarded
-        # so this is the only way I found of 'making it work'
-
-        # when switching screens or something prompt_toolkit doesn't recognize
-        # the new focusable elements added to the screen. this will ensure
-        # that at least one container/ui is marked as focusable so
-        # the screen can be interacted with
-
-        global global__default_target_focus  # preferred element to be focused
+def build_application(session_journal=None):
+    controller = RootController(session_journal=session_journal)
+    layout = Layout(controller)
 
-        if global__default_target_focus:
-            app.layout.focus(global__default_target_focus)
-            global__default_target_focus = None  # reset for next render
-
-            app.invalidate()  # trigger re-render
-        elif len(app.layout.get_visible_focusable_windows()) == 0:
-            focus_first_element()
-
-            app.invalidate()  # trigger re-render
+    # from now on every screen switch moves the focus into the new screen
+    # itself, before it is rendered
+    controller.layout = layout
+    controller.focus_screen()
 
     return Application(
         layout=layout,
         key_bindings=merge_key_bindings([tab_bindings, exit_bindings]),
         full_screen=True,
         mouse_support=True,
-        after_render=ensure_focus,
+        scroll_regions=True,
+        # render less often when rendering gets slow (eg. a busy server)
+        frame_budget=0.5,
         style=root_style
     )
 
 
+default_journal_path = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'sessions.journal')
+
+
 def main():
-    build_application().run()
+    parser = argparse.ArgumentParser(description='Russian mafia game')
+    parser.add_argument('--serve', action='store_true',
+                        help='serve the game over telnet instead of playing')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=2323)
+    parser.add_argument('--memory-budget', type=int, default=1024,
+                        help='megabytes of memory to use for sessions')
+    parser.add_argument('--idle-timeout', type=int, default=None,
+                        help='save and disconnect sessions idle for this '
+                             'many seconds')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes serving sessions (0: one per cpu)')
+    parser.add_argument('--journal', default=default_journal_path,
+                        help='file games in progress are saved to')
+    parser.add_argument('--no-save', action='store_true',
+                        help="don't save games in progress")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    session_journal = None
+    if not args.no_save:
+        try:
+            # every worker saves to the journal and may have to continue a
+            # game that another worker saved
+            session_journal = SessionJournal(
+                args.journal, shared=args.serve and workers > 1)
+        except OSError as e:
+            print('Not saving games: %s' % e)
+
+    def build_session():
+        return build_application(session_journal)
+
+    try:
+        if args.serve:
+            from game_server import serve
+            serve(build_session, host=args.host, port=args.port,
+                  memory_budget=args.memory_budget * 1024 * 1024,
+                  idle_timeout=args.idle_timeout, workers=workers)
+        else:
+            build_session().run()
+    finally:
+        if session_journal is not None:
+            session_journal.close()
 
 
 if __name__ == "__main__":
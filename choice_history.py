@@ -0,0 +1,99 @@
+##########################################################################
+# Choice history
+# The story nodes a player went through, with a position so that they can
+# go back and forwards again. Histories are immutable and share structure,
+# so every operation is O(1) and only stores node ids.
+##########################################################################
+
+__all__ = [
+    'ChoiceHistory',
+]
+
+
+class ChoiceHistory:
+    """
+    Immutable history of story node ids with a current position.
+
+    Internally this is a zipper made of two linked lists of
+    (node id, parent) tuples: the nodes up to and including the current one
+    (newest first) and the nodes after it (nearest first). Pushing a choice
+    or moving back/next creates a single tuple and leaves every other
+    history that shares the lists untouched.
+    """
+
+    __slots__ = ('_back', '_forward', 'index', 'length')
+
+    def __init__(self, back, forward, index, length):
+        self._back = back
+        self._forward = forward
+        self.index = index  # position of the current node
+        self.length = length  # number of nodes, including the ones after index
+
+    @classmethod
+    def start(cls, node_id):
+        "A history holding only `node_id`"
+        return cls((node_id, None), None, 0, 1)
+
+    @classmethod
+    def from_node_ids(cls, node_ids, index):
+        "Rebuilds a history from the full list of node ids and a position"
+        if not 0 <= index < len(node_ids):
+            raise IndexError('History position %s out of range' % index)
+
+        back = None
+        for node_id in node_ids[:index + 1]:
+            back = (node_id, back)
+
+        forward = None
+        for node_id in reversed(node_ids[index + 1:]):
+            forward = (node_id, forward)
+
+        return cls(back, forward, index, len(node_ids))
+
+    @property
+    def current(self):
+        "The node id at the current position"
+        return self._back[0]
+
+    @property
+    def has_back(self):
+        return self._back[1] is not None
+
+    @property
+    def has_next(self):
+        return self._forward is not None
+
+    def push(self, node_id):
+        "Moves forward to `node_id`, dropping the nodes after the position"
+        return ChoiceHistory(
+            (node_id, self._back), None, self.index + 1, self.index + 2)
+
+    def back(self):
+        node_id, parent = self._back
+        return ChoiceHistory(
+            parent, (node_id, self._forward), self.index - 1, self.length)
+
+    def next(self):
+        node_id, rest = self._forward
+        return ChoiceHistory(
+            (node_id, self._back), rest, self.index + 1, self.length)
+
+    def __iter__(self):
+        "All node ids, oldest first"
+        back = []
+        cell = self._back
+        while cell is not None:
+            back.append(cell[0])
+            cell = cell[1]
+        yield from reversed(back)
+
+        cell = self._forward
+        while cell is not None:
+            yield cell[0]
+            cell = cell[1]
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return 'ChoiceHistory(%r, index=%r)' % (list(self), self.index)
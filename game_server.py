@@ -0,0 +1,487 @@
+##########################################################################
+# Multi-user telnet server
+# Every telnet connection gets its own application (and so its own
+# controller and state), all running on a single event loop. To use more
+# than one cpu, a pool of worker processes can share the port, each with
+# its own loop and sessions.
+##########################################################################
+
+import asyncio
+import gc
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+import tracemalloc
+from collections import namedtuple
+from multiprocessing.connection import wait
+
+from prompt_toolkit.application.current import create_app_session
+from prompt_toolkit.contrib.telnet import TelnetServer
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from prompt_toolkit.output import DummyOutput
+
+__all__ = [
+    'ServerStats',
+    'GameServer',
+    'WorkerPool',
+    'measure_session_memory',
+    'serve',
+]
+
+logger = logging.getLogger(__name__)
+
+# file descriptors used by one session: the socket and the input pipe
+FDS_PER_SESSION = 3
+# file descriptors kept free for the listening socket, logs etc.
+RESERVED_FDS = 64
+
+# garbage collection thresholds of a server (see gc.set_threshold). A full
+# collection goes through every session, which takes seconds with thousands
+# of them, so the allocations of new sessions hardly ever trigger one. The
+# server runs them itself instead, when enough sessions ended (see
+# GameServer.garbage_ratio).
+GC_THRESHOLDS = (10000, 10, 1000)
+
+ServerStats = namedtuple('ServerStats', [
+    'sessions', 'peak_sessions', 'total_sessions', 'idle_sessions_closed'])
+
+
+async def _start_sessions(build_application, count):
+    "Starts `count` sessions without a client and waits for their first frame"
+    sessions = []
+
+    for _ in range(count):
+        pipe_input = PosixPipeInput()
+
+        with create_app_session(input=pipe_input, output=DummyOutput()):
+            app = build_application()
+            task = asyncio.ensure_future(
+                app.run_async(set_exception_handler=False))
+            sessions.append((pipe_input, app, task))
+
+    while any(app.render_counter == 0 for (_, app, _) in sessions):
+        await asyncio.sleep(0.01)
+
+    return sessions
+
+
+async def _stop_sessions(sessions):
+    for (pipe_input, app, task) in sessions:
+        if app.is_running:
+            app.exit()
+        await task
+        pipe_input.close()
+
+
+async def measure_session_memory(build_application, samples=5):
+    """Starts `samples` idle sessions, lets them render their first screen and
+    returns the average number of bytes allocated per session"""
+    # the first session in a process fills module level caches (styles,
+    # character widths, ...) which every later session shares
+    await _stop_sessions(await _start_sessions(build_application, 1))
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    sessions = []
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        sessions = await _start_sessions(build_application, samples)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+        await _stop_sessions(sessions)
+
+    return max(1, (after - before) // samples)
+
+
+def _raise_open_file_limit():
+    "Raises the soft open file limit as far as allowed, returns the new limit"
+    try:
+        import resource
+    except ImportError:  # windows
+        return None
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    for limit in (hard, 1024 * 1024, 65536):
+        if soft >= limit or (hard != resource.RLIM_INFINITY and limit > hard):
+            continue
+
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+            return limit
+        except (ValueError, OSError):
+            pass
+
+    return soft
+
+
+class GameServer:
+    """
+    Serves one game application per telnet connection.
+
+    :param build_application: Called once per connection to create the
+        application for that session.
+    :param max_sessions: Connections beyond this many sessions are turned
+        away.
+    :param idle_timeout: Seconds without a key press or mouse click after
+        which a session is closed, or None to keep idle sessions open. The
+        game saves every choice, so the player can reconnect and continue.
+    :param reuse_port: Share the port with other processes. (See
+        `WorkerPool`.)
+    :param report_stats: Called with the `stats()` every `stats_interval`
+        seconds, instead of logging them.
+    """
+
+    # seconds between the stats log lines
+    stats_interval = 60
+    # a full garbage collection runs once the sessions that ended since the
+    # last one are this share of the sessions that are still running
+    garbage_ratio = 0.25
+
+    def __init__(self, build_application, host='0.0.0.0', port=2323,
+                 max_sessions=1000, idle_timeout=None, reuse_port=False,
+                 report_stats=None):
+        self._build_application = build_application
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.report_stats = report_stats
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.total_sessions = 0
+        self.idle_sessions_closed = 0
+        self.full_collections = 0
+        self._ended_sessions = 0
+        self._collection_scheduled = False
+
+        # frames are sent in one piece, and terminals that support
+        # synchronized updates also show them in one piece
+        self.telnet_server = TelnetServer(
+            host=host, port=port, interact=self._interact,
+            synchronized_output=True, reuse_port=reuse_port)
+
+    async def _interact(self, connection):
+        if self.sessions >= self.max_sessions:
+            connection.send('The server is full, please try again later.\n')
+            return
+
+        self.sessions += 1
+        self.total_sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+
+        app = self._build_application()
+        idle_task = None
+        if self.idle_timeout is not None:
+            idle_task = asyncio.ensure_future(self._close_when_idle(app))
+
+        try:
+            # many applications share the loop, so none of them may take
+            # over the loop's exception handler
+            await app.run_async(set_exception_handler=False)
+        except EOFError:
+            pass  # the client disconnected
+        finally:
+            self.sessions -= 1
+            self._session_ended()
+
+        if idle_task is None:
+            return
+
+        if not idle_task.done():
+            idle_task.cancel()
+        else:
+            connection.send('\nYou were away for too long, your game has '
+                            'been saved. Connect again and enter the same '
+                            'name to continue.\n')
+
+    async def _close_when_idle(self, app):
+        last_activity = time.monotonic()
+
+        def on_key_press(_):
+            nonlocal last_activity
+            last_activity = time.monotonic()
+
+        app.key_processor.before_key_press += on_key_press
+
+        while True:
+            idle = time.monotonic() - last_activity
+            if idle >= self.idle_timeout:
+                break
+            await asyncio.sleep(self.idle_timeout - idle)
+
+        self.idle_sessions_closed += 1
+        if app.is_running:
+            app.exit()
+
+    def _session_ended(self):
+        self._ended_sessions += 1
+
+        if (self._ended_sessions > self.sessions * self.garbage_ratio
+                and not self._collection_scheduled):
+            self._collection_scheduled = True
+            # (once the connection is closed too)
+            asyncio.get_event_loop().call_later(1, self._collect_garbage)
+
+    def _collect_garbage(self):
+        self._collection_scheduled = False
+        self._ended_sessions = 0
+        self.full_collections += 1
+        gc.collect()
+
+    def stats(self):
+        return ServerStats(self.sessions, self.peak_sessions,
+                           self.total_sessions, self.idle_sessions_closed)
+
+    async def _log_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            if self.report_stats is not None:
+                self.report_stats(self.stats())
+            else:
+                logger.info('%s sessions (peak %s, total %s, closed when '
+                            'idle %s)', *self.stats())
+
+    async def start(self):
+        """Starts listening. Everything that exists by then (the modules, the
+        story and the caches that a first session fills) is frozen, so that
+        garbage collections skip it"""
+        await _stop_sessions(await _start_sessions(self._build_application, 1))
+        gc.collect()
+        gc.freeze()
+        gc.set_threshold(*GC_THRESHOLDS)
+
+        self.telnet_server.start()
+
+    async def run(self):
+        "Runs the server until cancelled"
+        await self.start()
+        stats_task = asyncio.ensure_future(self._log_stats())
+
+        try:
+            await asyncio.Future()  # run forever
+        finally:
+            stats_task.cancel()
+            await self.telnet_server.stop()
+
+
+def _run_worker(build_application, stats_writer, server_options):
+    "The body of a worker process"
+    # the supervisor stops the workers (SIGTERM), ctrl-c is for the
+    # supervisor only
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    server = GameServer(build_application, reuse_port=True,
+                        report_stats=stats_writer.send, **server_options)
+    server.stats_interval = WorkerPool.report_interval
+    asyncio.run(server.run())
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class _Worker:
+    def __init__(self, process, stats_reader):
+        self.process = process
+        self.stats_reader = stats_reader
+        self.started = time.monotonic()
+        self.stats = ServerStats(0, 0, 0, 0)
+
+
+class WorkerPool:
+    """
+    Runs a `GameServer` in each of `workers` processes. They all listen on
+    the same port (SO_REUSEPORT), so the kernel spreads the connections over
+    them, and every worker has its own event loop and sessions. Workers that
+    die are restarted, and the stats of all workers are logged together.
+
+    The workers are forked, so whatever the process loaded before (the
+    story, the drawing caches) is shared with them rather than rebuilt.
+    Linux and BSD only.
+
+    :param build_application: Called in a worker for every connection.
+    :param server_options: Passed on to every `GameServer`, `max_sessions`
+        is per worker.
+    """
+
+    # seconds between the stats log lines
+    stats_interval = 60
+    # seconds between the stats a worker sends to the supervisor
+    report_interval = 5
+    # a worker that dies within this many seconds after starting is only
+    # restarted after this long, so that a worker that can't start doesn't
+    # keep the supervisor busy
+    restart_delay = 1
+
+    def __init__(self, build_application, workers, host='0.0.0.0',
+                 port=2323, **server_options):
+        self._build_application = build_application
+        self._context = multiprocessing.get_context('fork')
+        self._workers = [None] * workers
+        self.host = host
+        self.port = port
+        self._server_options = server_options
+
+        # sessions of workers that died, which are in the totals
+        self._retired = ServerStats(0, 0, 0, 0)
+        self.peak_sessions = 0
+        self.restarts = 0
+
+    def _start_worker(self, slot):
+        stats_reader, stats_writer = self._context.Pipe(duplex=False)
+        options = dict(self._server_options, host=self.host, port=self.port)
+
+        process = self._context.Process(
+            target=_run_worker, daemon=True,
+            args=(self._build_application, stats_writer, options))
+        process.start()
+        stats_writer.close()
+
+        self._workers[slot] = _Worker(process, stats_reader)
+        logger.info('Started worker %s (pid %s)', slot, process.pid)
+
+    def _worker_exited(self, slot):
+        worker = self._workers[slot]
+        worker.process.join()
+        worker.stats_reader.close()
+
+        _, _, total, idle_closed = worker.stats
+        self._retired = self._retired._replace(
+            total_sessions=self._retired.total_sessions + total,
+            idle_sessions_closed=(
+                self._retired.idle_sessions_closed + idle_closed))
+
+        logger.warning('Worker %s (pid %s) exited with code %s, restarting '
+                       'it', slot, worker.process.pid,
+                       worker.process.exitcode)
+        self.restarts += 1
+
+        if time.monotonic() - worker.started < self.restart_delay:
+            time.sleep(self.restart_delay)
+        self._start_worker(slot)
+
+    def stats(self):
+        "The stats of all workers together"
+        sessions = sum(w.stats.sessions for w in self._workers)
+        # only as accurate as the reports of the workers
+        self.peak_sessions = max(self.peak_sessions, sessions)
+
+        return ServerStats(
+            sessions, self.peak_sessions,
+            self._retired.total_sessions
+            + sum(w.stats.total_sessions for w in self._workers),
+            self._retired.idle_sessions_closed
+            + sum(w.stats.idle_sessions_closed for w in self._workers))
+
+    def _reserve_port(self):
+        "Fails early if the port is taken, and picks the port if it is 0"
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            # not listening, so no connections end up here
+            s.bind((self.host, self.port))
+            self.port = s.getsockname()[1]
+
+    def _supervise(self):
+        next_log = time.monotonic() + self.stats_interval
+
+        while True:
+            readers = {w.stats_reader: slot
+                       for (slot, w) in enumerate(self._workers)}
+            sentinels = {w.process.sentinel: slot
+                         for (slot, w) in enumerate(self._workers)}
+
+            ready = wait(list(readers) + list(sentinels),
+                         max(0, next_log - time.monotonic()))
+
+            for r in ready:
+                if r in readers:
+                    try:
+                        self._workers[readers[r]].stats = r.recv()
+                    except EOFError:
+                        pass  # the worker exited, see its sentinel
+
+            for r in ready:
+                if r in sentinels:
+                    self._worker_exited(sentinels[r])
+
+            if time.monotonic() >= next_log:
+                next_log += self.stats_interval
+                logger.info('%s sessions (peak %s, total %s, closed when '
+                            'idle %s), workers restarted %s', *self.stats(),
+                            self.restarts)
+
+    def _stop_workers(self):
+        workers = [w for w in self._workers if w is not None]
+        for w in workers:
+            w.process.terminate()
+        for w in workers:
+            w.process.join(5)
+            if w.process.is_alive():
+                w.process.kill()
+                w.process.join()
+
+    def run(self):
+        "Runs the workers until a SIGINT (KeyboardInterrupt) or SIGTERM"
+        self._reserve_port()
+        logger.info('Listening on %s port %s with %s workers',
+                    self.host, self.port, len(self._workers))
+        previous_handler = signal.signal(
+            signal.SIGTERM, _raise_keyboard_interrupt)
+
+        try:
+            for slot in range(len(self._workers)):
+                self._start_worker(slot)
+            self._supervise()
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self._stop_workers()
+
+
+def serve(build_application, host='0.0.0.0', port=2323,
+          memory_budget=1024 * 1024 * 1024, idle_timeout=None, workers=1):
+    """Serves the game over telnet. The number of sessions is capped so that
+    idle sessions fit in `memory_budget` bytes and in the open file limit.
+    With more than one worker, the sessions are served by a `WorkerPool`
+    which shares the memory budget"""
+    # per connection logging from the telnet server is too noisy with
+    # thousands of sessions, only log our own info
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s %(name)s: %(message)s')
+    logger.setLevel(logging.INFO)
+
+    # measured before forking, so the workers start with warm caches
+    session_memory = asyncio.run(measure_session_memory(build_application))
+    max_sessions = max(1, memory_budget // workers // session_memory)
+
+    file_limit = _raise_open_file_limit()
+    if file_limit is not None:
+        max_sessions = min(
+            max_sessions, (file_limit - RESERVED_FDS) // FDS_PER_SESSION)
+
+    logger.info('%.1f KiB per idle session, serving at most %s sessions',
+                session_memory / 1024, max_sessions * workers)
+
+    async def run():
+        server = GameServer(build_application, host=host, port=port,
+                            max_sessions=max_sessions,
+                            idle_timeout=idle_timeout)
+        logger.info('Listening on %s port %s', host, port)
+        await server.run()
+
+    try:
+        if workers > 1:
+            pool = WorkerPool(build_application, workers, host=host,
+                              port=port, max_sessions=max_sessions,
+                              idle_timeout=idle_timeout)
+            pool.run()
+        else:
+            asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -14,7 +14,9 @@ from asyncio import (
     new_event_loop,
     set_event_loop,
     sleep,
+    wait,
 )
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import Popen
 from traceback import format_tb
 from typing import (
@@ -37,7 +39,7 @@ from typing import (
 )
 
 from prompt_toolkit.buffer import Buffer
-from prompt_toolkit.cache import SimpleCache
+from prompt_toolkit.cache import SimpleCache, memoized
 from prompt_toolkit.clipboard import Clipboard, InMemoryClipboard
 from prompt_toolkit.enums import EditingMode
 from prompt_toolkit.eventloop import (
@@ -71,7 +73,7 @@ from prompt_toolkit.layout.controls import BufferControl, UIControl
 from prompt_toolkit.layout.dummy import create_dummy_layout
 from prompt_toolkit.layout.layout import Layout, walk
 from prompt_toolkit.output import ColorDepth, Output
-from prompt_toolkit.renderer import Renderer, print_formatted_text
+from prompt_toolkit.renderer import Frame, Renderer, print_formatted_text
 from prompt_toolkit.search import SearchState
 from prompt_toolkit.styles import (
     BaseStyle,
@@ -104,6 +106,33 @@ _AppResult = TypeVar("_AppResult")
 ApplicationEventHandler = Callable[["Application[_AppResult]"], None]
 
 
+# Thread that draws the frames of applications with `render_in_thread`.
+_render_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_render_executor() -> ThreadPoolExecutor:
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prompt_toolkit-render"
+        )
+    return _render_executor
+
+
+# The default key bindings don't hold any state of their own (everything goes
+# through `event.app`), so all applications in the process can share them.
+# This matters when many applications run side by side, e.g. in a telnet
+# server.
+@memoized()
+def _load_shared_key_bindings() -> KeyBindingsBase:
+    return load_key_bindings()
+
+
+@memoized()
+def _load_shared_page_navigation_bindings() -> KeyBindingsBase:
+    return load_page_navigation_bindings()
+
+
 class Application(Generic[_AppResult]):
     """
     The main Application class!
@@ -138,6 +167,22 @@ class Application(Generic[_AppResult]):
         scheduled calls), postpone the rendering max x seconds.  '0' means:
         don't postpone. '.5' means: try to draw at least twice a second.
 
+    :param frame_budget: Fraction of the time that may be spent rendering
+        (including flushing the output), like `0.5`. When given, the time
+        between redraws adapts to how long the last renders took, so that
+        slow renders are done less often and `invalidate` calls in between
+        are merged into one redraw. The interval in use is available as
+        :attr:`.Application.redraw_interval`. (It is never shorter than
+        `min_redraw_interval`, and never longer than a tenth of a second.)
+
+    :param render_in_thread: When True, the layout is drawn in a worker
+        thread, and only writing the output happens in the event loop. Key
+        presses for this application wait until the frame is drawn (so that
+        the layout doesn't change while it's drawn), but other applications
+        on the same event loop keep running. When the application is
+        invalidated while a frame is drawn, that frame is dropped and a new
+        one is drawn. (But never two frames in a row.)
+
     :param refresh_interval: Automatically invalidate the UI every so many
         seconds. When `None` (the default), only invalidate when `invalidate`
         has been called.
@@ -146,6 +191,10 @@ class Application(Generic[_AppResult]):
 
     :param mouse_support: (:class:`~prompt_toolkit.filters.Filter` or
         boolean). When True, enable mouse support.
+    :param scroll_regions: (:class:`~prompt_toolkit.filters.Filter` or
+        boolean). When True, and in full screen mode, windows that scroll are
+        redrawn by letting the terminal shift their rows and only drawing the
+        rows that come in. (Needs a terminal that supports scrolling regions.)
     :param paste_mode: :class:`~prompt_toolkit.filters.Filter` or boolean.
     :param editing_mode: :class:`~prompt_toolkit.enums.EditingMode`.
 
@@ -196,6 +245,7 @@ class Application(Generic[_AppResult]):
             ColorDepth, Callable[[], Union[ColorDepth, None]], None
         ] = None,
         mouse_support: FilterOrBool = False,
+        scroll_regions: FilterOrBool = False,
         enable_page_navigation_bindings: Optional[
             FilterOrBool
         ] = None,  # Can be None, True or False.
@@ -205,6 +255,8 @@ class Application(Generic[_AppResult]):
         reverse_vi_search_direction: FilterOrBool = False,
         min_redraw_interval: Union[float, int, None] = None,
         max_render_postpone_time: Union[float, int, None] = 0.01,
+        frame_budget: Optional[float] = None,
+        render_in_thread: bool = False,
         refresh_interval: Optional[float] = None,
         on_reset: Optional[ApplicationEventHandler] = None,
         on_invalidate: Optional[ApplicationEventHandler] = None,
@@ -237,8 +289,8 @@ class Application(Generic[_AppResult]):
 
         # Key bindings.
         self.key_bindings = key_bindings
-        self._default_bindings = load_key_bindings()
-        self._page_navigation_bindings = load_page_navigation_bindings()
+        self._default_bindings = _load_shared_key_bindings()
+        self._page_navigation_bindings = _load_shared_page_navigation_bindings()
 
         self.layout = layout
         self.clipboard = clipboard or InMemoryClipboard()
@@ -253,6 +305,8 @@ class Application(Generic[_AppResult]):
         self.enable_page_navigation_bindings = enable_page_navigation_bindings
         self.min_redraw_interval = min_redraw_interval
         self.max_render_postpone_time = max_render_postpone_time
+        self.frame_budget = frame_budget
+        self.render_in_thread = render_in_thread
         self.refresh_interval = refresh_interval
 
         # Events.
@@ -308,6 +362,7 @@ class Application(Generic[_AppResult]):
             self.input,
             full_screen=full_screen,
             mouse_support=mouse_support,
+            scroll_regions=scroll_regions,
             cpr_not_supported_callback=self.cpr_not_supported_callback,
         )
 
@@ -322,7 +377,20 @@ class Application(Generic[_AppResult]):
             Event[object]
         ] = []  # Collection of 'invalidate' Event objects.
         self._last_redraw_time = 0.0  # Unix timestamp of last redraw. Used when
-        # `min_redraw_interval` is given.
+        # `min_redraw_interval` or `frame_budget` is given.
+        self._render_duration = 0.0  # Recent render time, in seconds.
+
+        # The frame that is being drawn in the render thread. (When
+        # `render_in_thread` is set.)
+        self._frame_future: Optional[Future[Tuple[Frame, float]]] = None
+        self._frame_outdated = False  # Invalidated while it is drawn.
+        self._resize_pending = False  # Resized while it is drawn.
+        self._dropped_last_frame = False
+
+        #: Number of frames that were dropped, because the application was
+        #: invalidated while they were drawn in the render thread, or because
+        #: the output was backlogged.
+        self.frames_dropped = 0
 
         #: The `InputProcessor` instance.
         self.key_processor = KeyProcessor(_CombinedRegistry(self))
@@ -460,14 +528,15 @@ class Application(Generic[_AppResult]):
                 redraw, max_postpone_time=self.max_render_postpone_time, loop=self.loop
             )
 
-        if self.min_redraw_interval:
+        redraw_interval = self.redraw_interval
+        if redraw_interval:
             # When a minimum redraw interval is set, wait minimum this amount
             # of time between redraws.
             diff = time.time() - self._last_redraw_time
-            if diff < self.min_redraw_interval:
+            if diff < redraw_interval:
 
                 async def redraw_in_future() -> None:
-                    await sleep(cast(float, self.min_redraw_interval) - diff)
+                    await sleep(redraw_interval - diff)
                     schedule_redraw()
 
                 self.create_background_task(redraw_in_future())
@@ -481,6 +550,31 @@ class Application(Generic[_AppResult]):
         " True when a redraw operation has been scheduled. "
         return self._invalidated
 
+    @property
+    def is_drawing_frame(self) -> bool:
+        """
+        True while a frame is drawn in the render thread. (Key presses wait
+        until it is done.)
+        """
+        return self._frame_future is not None
+
+    @property
+    def redraw_interval(self) -> float:
+        """
+        The minimum number of seconds between two redraws that is used right
+        now. (Adapted to the recent render times when a `frame_budget` is
+        given.)
+        """
+        interval = float(self.min_redraw_interval or 0)
+
+        if self.frame_budget:
+            # A render of `d` seconds can happen every `d / frame_budget`
+            # seconds. (Counted from the start of the previous render.)
+            adaptive_interval = self._render_duration / self.frame_budget
+            interval = max(interval, min(0.1, adaptive_interval))
+
+        return interval
+
     def _redraw(self, render_as_done: bool = False) -> None:
         """
         Render the command line again. (Not thread safe!) (From other threads,
@@ -492,13 +586,26 @@ class Application(Generic[_AppResult]):
         def run_in_context() -> None:
             # Only draw when no sub application was started.
             if self._is_running and not self._running_in_terminal:
-                if self.min_redraw_interval:
+                # Don't queue frames behind output that wasn't sent yet. Once
+                # it is, the next frame is diffed against the last frame that
+                # was written, and brings the output up to date at once.
+                if not render_as_done and self.output.is_backlogged():
+                    self.frames_dropped += 1
+                    return
+
+                if self.render_in_thread and not render_as_done:
+                    self._redraw_in_thread()
+                    return
+
+                if self.min_redraw_interval or self.frame_budget:
                     self._last_redraw_time = time.time()
 
                 # Render
                 self.render_counter += 1
                 self.before_render.fire()
 
+                start = time.perf_counter()
+
                 if render_as_done:
                     if self.erase_when_done:
                         self.renderer.erase()
@@ -508,6 +615,8 @@ class Application(Generic[_AppResult]):
                 else:
                     self.renderer.render(self, self.layout)
 
+                self._add_render_duration(time.perf_counter() - start)
+
                 self.layout.update_parents_relations()
 
                 # Fire render event.
@@ -522,6 +631,93 @@ class Application(Generic[_AppResult]):
         if self.context is not None:
             self.context.run(run_in_context)
 
+    def _redraw_in_thread(self) -> None:
+        """
+        Draw the layout in the render thread, and write it to the output when
+        that's done. (Called by `_redraw` when `render_in_thread` is set.)
+        """
+        if self._frame_future is not None:
+            # Draw again, after this frame.
+            self._frame_outdated = True
+            return
+
+        if self.min_redraw_interval or self.frame_budget:
+            self._last_redraw_time = time.time()
+
+        self.render_counter += 1
+        self.before_render.fire()
+
+        # (Taken here, the renderer changes when the output is resized or a
+        # CPR response arrives.)
+        bounds = self.renderer.frame_bounds()
+
+        def build_frame() -> Tuple[Frame, float]:
+            start = time.perf_counter()
+            frame = self.renderer.build_frame(self, self.layout, bounds=bounds)
+            return frame, time.perf_counter() - start
+
+        assert self.loop is not None
+        self._frame_future = self.loop.run_in_executor(
+            _get_render_executor(), contextvars.copy_context().run, build_frame
+        )
+        self._frame_future.add_done_callback(self._frame_drawn)
+
+    def _frame_drawn(self, future: "Future[Tuple[Frame, float]]") -> None:
+        """
+        Write a frame from the render thread to the output. Then process the
+        key presses and the resize that were waiting for it, and draw again
+        when the application was invalidated in the meantime.
+        """
+        self._frame_future = None
+        resized = self._resize_pending
+        outdated = self._frame_outdated or resized
+        self._frame_outdated = self._resize_pending = False
+
+        def output_frame() -> None:
+            frame, duration = future.result()
+
+            # (Not when the application finished in the meantime. Then it draws
+            # its last frame itself.)
+            if not self._is_running or self.is_done or self._running_in_terminal:
+                return
+
+            if outdated and not self._dropped_last_frame:
+                self._dropped_last_frame = True
+                self.frames_dropped += 1
+                return
+
+            self._dropped_last_frame = False
+
+            start = time.perf_counter()
+            self.renderer.output_frame(self, frame)
+            self._add_render_duration(duration + time.perf_counter() - start)
+
+            self.layout.update_parents_relations()
+
+            # Fire render event.
+            self.after_render.fire()
+
+            self._update_invalidate_events()
+
+        # (Even when drawing the frame failed, the held back keys are still
+        # processed.)
+        try:
+            if self.context is not None:
+                self.context.run(output_frame)
+        finally:
+            if self.context is not None:
+                self.context.run(self.key_processor.process_keys)
+
+            if resized and not self.is_done:
+                self._on_resize()
+            elif outdated:
+                self._redraw()
+
+    def _add_render_duration(self, duration: float) -> None:
+        # Moving average of the render times, so that a single slow render
+        # doesn't slow down the next redraws too much.
+        self._render_duration += (duration - self._render_duration) / 4
+
     def _start_auto_refresh_task(self) -> None:
         """
         Start a while/true loop in the background for automatic invalidation of
@@ -574,6 +770,11 @@ class Application(Generic[_AppResult]):
         again the cursor position. When the CPR answer arrives, the output is
         drawn again.
         """
+        if self.is_drawing_frame:
+            # (After the render thread is done with the renderer.)
+            self._resize_pending = True
+            return
+
         # Erase, request position (when cursor is at the start position)
         # and redraw again. -- The order is important.
         self.renderer.erase(leave_alternate_screen=False)
@@ -698,6 +899,9 @@ class Application(Generic[_AppResult]):
                         # In any case, when the application finishes. (Successful,
                         # or because of an error.)
                         try:
+                            # Let the render thread finish its frame first.
+                            if self._frame_future is not None:
+                                await wait([self._frame_future])
                             self._redraw(render_as_done=True)
                         finally:
                             # _redraw has a good chance to fail if it calls widgets
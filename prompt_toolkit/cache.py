@@ -23,8 +23,9 @@ class SimpleCache(Generic[_T, _U]):
     def __init__(self, maxsize: int = 8) -> None:
         assert maxsize > 0
 
+        # Dictionaries keep their insertion order, so the first key is always
+        # the oldest one.
         self._data: Dict[_T, _U] = {}
-        self._keys: Deque[_T] = deque()
         self.maxsize: int = maxsize
 
     def get(self, key: _T, getter_func: Callable[[], _U]) -> _U:
@@ -40,20 +41,16 @@ class SimpleCache(Generic[_T, _U]):
             # Not found? Get it.
             value = getter_func()
             self._data[key] = value
-            self._keys.append(key)
 
             # Remove the oldest key when the size is exceeded.
             if len(self._data) > self.maxsize:
-                key_to_remove = self._keys.popleft()
-                if key_to_remove in self._data:
-                    del self._data[key_to_remove]
+                del self._data[next(iter(self._data))]
 
             return value
 
     def clear(self) -> None:
         " Clear cache. "
         self._data = {}
-        self._keys = deque()
 
 
 _K = TypeVar("_K", bound=Tuple)
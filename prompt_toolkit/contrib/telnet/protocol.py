@@ -71,7 +71,9 @@ class TelnetProtocolParser:
         self.size_received_callback = size_received_callback
 
         self._parser = self._parse_coroutine()
-        self._parser.send(None)  # type: ignore
+
+        # True when the parser is not inside a command.
+        self._ground = self._parser.send(None)  # type: ignore
 
     def received_data(self, data: bytes) -> None:
         self.data_received_callback(data)
@@ -132,20 +134,21 @@ class TelnetProtocolParser:
         else:
             logger.info("Negotiate (%r got bytes)", len(data))
 
-    def _parse_coroutine(self) -> Generator[None, bytes, None]:
+    def _parse_coroutine(self) -> Generator[bool, bytes, None]:
         """
         Parser state machine.
-        Every 'yield' expression returns the next byte.
+        Every 'yield' expression returns the next byte, and yields whether
+        the parser is back outside of a command.
         """
         while True:
-            d = yield
+            d = yield True
 
             if d == int2byte(0):
                 pass  # NOP
 
             # Go to state escaped.
             elif d == IAC:
-                d2 = yield
+                d2 = yield False
 
                 if d2 == IAC:
                     self.received_data(d2)
@@ -156,7 +159,7 @@ class TelnetProtocolParser:
 
                 # Handle IAC-[DO/DONT/WILL/WONT] commands.
                 elif d2 in (DO, DONT, WILL, WONT):
-                    d3 = yield
+                    d3 = yield False
                     self.command_received(d2, d3)
 
                 # Subnegotiation
@@ -165,10 +168,10 @@ class TelnetProtocolParser:
                     data = []
 
                     while True:
-                        d3 = yield
+                        d3 = yield False
 
                         if d3 == IAC:
-                            d4 = yield
+                            d4 = yield False
                             if d4 == SE:
                                 break
                             else:
@@ -183,6 +186,26 @@ class TelnetProtocolParser:
     def feed(self, data: bytes) -> None:
         """
         Feed data to the parser.
+
+        Data between commands is passed on in one call. Only the commands
+        themselves go through the state machine, byte by byte.
         """
-        for b in data:
-            self._parser.send(int2byte(b))
+        i = 0
+        length = len(data)
+
+        while i < length:
+            if self._ground:
+                end = data.find(IAC, i)
+                if end == -1:
+                    end = length
+
+                if end > i:
+                    # (NOP bytes are dropped.)
+                    text = data[i:end].replace(NOP, b"")
+                    if text:
+                        self.received_data(text)
+                    i = end
+                    continue
+
+            self._ground = self._parser.send(data[i : i + 1])
+            i += 1
@@ -40,47 +40,54 @@ def int2byte(number: int) -> bytes:
     return bytes((number,))
 
 
-def _initialize_telnet(connection: socket.socket) -> None:
+def _initialize_telnet(transport: asyncio.Transport) -> None:
     logger.info("Initializing telnet connection")
 
-    # Iac Do Linemode
-    connection.send(IAC + DO + LINEMODE)
-
-    # Suppress Go Ahead. (This seems important for Putty to do correct echoing.)
-    # This will allow bi-directional operation.
-    connection.send(IAC + WILL + SUPPRESS_GO_AHEAD)
-
-    # Iac sb
-    connection.send(IAC + SB + LINEMODE + MODE + int2byte(0) + IAC + SE)
-
-    # IAC Will Echo
-    connection.send(IAC + WILL + ECHO)
-
-    # Negotiate window size
-    connection.send(IAC + DO + NAWS)
+    # (All in one write.)
+    transport.write(
+        b"".join(
+            [
+                # Iac Do Linemode
+                IAC + DO + LINEMODE,
+                # Suppress Go Ahead. (This seems important for Putty to do
+                # correct echoing.) This will allow bi-directional operation.
+                IAC + WILL + SUPPRESS_GO_AHEAD,
+                # Iac sb
+                IAC + SB + LINEMODE + MODE + int2byte(0) + IAC + SE,
+                # IAC Will Echo
+                IAC + WILL + ECHO,
+                # Negotiate window size
+                IAC + DO + NAWS,
+            ]
+        )
+    )
 
 
 class _ConnectionStdout:
     """
-    Wrapper around socket which provides `write` and `flush` methods for the
-    Vt100_Output output.
+    Wrapper around the transport of a connection which provides `write` and
+    `flush` methods for the Vt100_Output output.
     """
 
-    def __init__(self, connection: socket.socket, encoding: str) -> None:
+    def __init__(self, transport: asyncio.Transport, encoding: str) -> None:
         self._encoding = encoding
-        self._connection = connection
+        self._transport = transport
         self._errors = "strict"
         self._buffer: List[bytes] = []
 
     def write(self, data: str) -> None:
+        # Sent on `flush`, which `Vt100_Output` calls once after writing.
         self._buffer.append(data.encode(self._encoding, errors=self._errors))
-        self.flush()
 
     def flush(self) -> None:
-        try:
-            self._connection.send(b"".join(self._buffer))
-        except socket.error as e:
-            logger.warning("Couldn't send data over socket: %s" % e)
+        if not self._buffer:
+            return
+
+        # The application can still render after the client disconnected.
+        # (This never blocks, the transport keeps what the client didn't
+        # receive yet.)
+        if not self._transport.is_closing():
+            self._transport.write(b"".join(self._buffer))
 
         self._buffer = []
 
@@ -93,34 +100,75 @@ class _ConnectionStdout:
         return self._errors
 
 
+class _ConnectionOutput(Vt100_Output):
+    """
+    Output of a connection, which is backlogged while the client doesn't
+    keep up.
+    """
+
+    def __init__(
+        self,
+        connection: "TelnetConnection",
+        stdout: TextIO,
+        get_size: Callable[[], Size],
+        synchronized_output: bool,
+    ) -> None:
+        super().__init__(
+            stdout,
+            get_size,
+            write_binary=False,
+            synchronized_output=synchronized_output,
+        )
+        self._connection = connection
+
+        # True when the application dropped a frame because of the backlog.
+        self.frame_dropped = False
+
+    def is_backlogged(self) -> bool:
+        if self._connection.writing_paused:
+            self.frame_dropped = True
+            return True
+        return False
+
+
 class TelnetConnection:
     """
     Class that represents one Telnet connection.
     """
 
+    # When the connection is closed, the output that the client didn't
+    # receive yet is still sent, as long as that's no more than this many
+    # bytes and the client takes no longer than `close_timeout` seconds.
+    # Otherwise the connection is aborted, so that a client that stops
+    # reading can't keep the socket and its buffer around.
+    close_buffer_limit = 64 * 1024
+    close_timeout = 5.0
+
     def __init__(
         self,
-        conn: socket.socket,
+        transport: asyncio.Transport,
         addr: Tuple[str, int],
         interact: Callable[["TelnetConnection"], Awaitable[None]],
         server: "TelnetServer",
         encoding: str,
         style: Optional[BaseStyle],
+        synchronized_output: bool = False,
     ) -> None:
 
-        self.conn = conn
+        self.transport = transport
         self.addr = addr
         self.interact = interact
         self.server = server
         self.encoding = encoding
         self.style = style
         self._closed = False
+        self._writing_paused = False
 
         # Create "Output" object.
         self.size = Size(rows=40, columns=79)
 
         # Initialize.
-        _initialize_telnet(conn)
+        _initialize_telnet(transport)
 
         # Create input.
         self.vt100_input = PosixPipeInput()
@@ -129,8 +177,10 @@ class TelnetConnection:
         def get_size() -> Size:
             return self.size
 
-        self.stdout = cast(TextIO, _ConnectionStdout(conn, encoding=encoding))
-        self.vt100_output = Vt100_Output(self.stdout, get_size, write_binary=False)
+        self.stdout = cast(TextIO, _ConnectionStdout(transport, encoding=encoding))
+        self.vt100_output = _ConnectionOutput(
+            self, self.stdout, get_size, synchronized_output
+        )
 
         def data_received(data: bytes) -> None:
             """ TelnetProtocolParser 'data_received' callback """
@@ -139,7 +189,11 @@ class TelnetConnection:
         def size_received(rows: int, columns: int) -> None:
             """ TelnetProtocolParser 'size_received' callback """
             self.size = Size(rows=rows, columns=columns)
-            get_app()._on_resize()
+
+            # (Before the application runs, it picks up the size when it
+            # starts.)
+            if self.context is not None:
+                self.context.run(lambda: get_app()._on_resize())
 
         self.parser = TelnetProtocolParser(data_received, size_received)
         self.context: Optional[contextvars.Context] = None
@@ -149,20 +203,7 @@ class TelnetConnection:
         Run application.
         """
 
-        def handle_incoming_data() -> None:
-            data = self.conn.recv(1024)
-            if data:
-                self.feed(data)
-            else:
-                # Connection closed by client.
-                logger.info("Connection closed by client. %r %r" % self.addr)
-                self.close()
-
         async def run() -> None:
-            # Add reader.
-            loop = get_event_loop()
-            loop.add_reader(self.conn, handle_incoming_data)
-
             try:
                 await self.interact(self)
             except Exception as e:
@@ -173,6 +214,7 @@ class TelnetConnection:
                 raise
             finally:
                 self.close()
+                self.vt100_input.close()
 
         with create_app_session(input=self.vt100_input, output=self.vt100_output):
             self.context = contextvars.copy_context()
@@ -180,7 +222,7 @@ class TelnetConnection:
 
     def feed(self, data: bytes) -> None:
         """
-        Handler for incoming data. (Called by TelnetServer.)
+        Handler for incoming data. (Called by the protocol of the connection.)
         """
         self.parser.feed(data)
 
@@ -191,9 +233,46 @@ class TelnetConnection:
         if not self._closed:
             self._closed = True
 
-            self.vt100_input.close()
-            get_event_loop().remove_reader(self.conn)
-            self.conn.close()
+            # Let a running application see end-of-file, so that it stops.
+            # The input is closed completely once `interact` is done.
+            self.vt100_input.send_eof()
+
+            if (
+                self.writing_paused
+                or self.transport.get_write_buffer_size() > self.close_buffer_limit
+            ):
+                # The client doesn't keep up.
+                self.transport.abort()
+                return
+
+            self.transport.close()
+            if self.transport.get_write_buffer_size():
+                # (Aborting a closed transport does nothing.)
+                get_event_loop().call_later(self.close_timeout, self.transport.abort)
+
+    @property
+    def writing_paused(self) -> bool:
+        """
+        True while the client doesn't keep up with the output, and the
+        transport buffers more than its high watermark. (The application
+        doesn't render in the meantime.)
+        """
+        return self._writing_paused
+
+    def pause_writing(self) -> None:
+        " The write buffer went over the high watermark. "
+        self._writing_paused = True
+
+    def resume_writing(self) -> None:
+        """
+        The write buffer drained below the low watermark. Render the latest
+        state, in place of the frames that were dropped.
+        """
+        self._writing_paused = False
+
+        if self.vt100_output.frame_dropped and self.context is not None:
+            self.vt100_output.frame_dropped = False
+            self.context.run(lambda: get_app().invalidate())
 
     def send(self, formatted_text: AnyFormattedText) -> None:
         """
@@ -236,6 +315,22 @@ async def _dummy_interact(connection: TelnetConnection) -> None:
 class TelnetServer:
     """
     Telnet server implementation.
+
+    :param synchronized_output: Wrap every frame sent to the clients in a
+        synchronized update. (See `Vt100_Output`.)
+    :param write_buffer_high: When more than this many bytes of output are
+        waiting for a client, its application stops rendering (frames are
+        dropped)...
+    :param write_buffer_low: ...until no more than this many bytes are left.
+        Then the latest state is rendered. (By default, a client is
+        backlogged as soon as a frame can't be sent at once, until all of it
+        is sent.)
+    :param send_buffer_size: Size of the kernel send buffer (SO_SNDBUF) of
+        every connection, or `None` to leave it to the OS. It holds the
+        frames that a slow client still has to receive, so keep it small.
+    :param reuse_port: Bind with `SO_REUSEPORT`, so that several processes
+        can listen on the same port. The kernel spreads the new connections
+        over them. (Linux and BSD only.)
     """
 
     def __init__(
@@ -245,6 +340,11 @@ class TelnetServer:
         interact: Callable[[TelnetConnection], Awaitable[None]] = _dummy_interact,
         encoding: str = "utf-8",
         style: Optional[BaseStyle] = None,
+        synchronized_output: bool = False,
+        write_buffer_high: int = 0,
+        write_buffer_low: int = 0,
+        send_buffer_size: Optional[int] = 32 * 1024,
+        reuse_port: bool = False,
     ) -> None:
 
         self.host = host
@@ -252,19 +352,29 @@ class TelnetServer:
         self.interact = interact
         self.encoding = encoding
         self.style = style
+        self.synchronized_output = synchronized_output
+        self.write_buffer_high = write_buffer_high
+        self.write_buffer_low = write_buffer_low
+        self.send_buffer_size = send_buffer_size
+        self.reuse_port = reuse_port
         self._application_tasks: List[asyncio.Task] = []
 
         self.connections: Set[TelnetConnection] = set()
         self._listen_socket: Optional[socket.socket] = None
+        self._server_task: Optional[asyncio.Task] = None
 
     @classmethod
-    def _create_socket(cls, host: str, port: int) -> socket.socket:
+    def _create_socket(
+        cls, host: str, port: int, reuse_port: bool = False
+    ) -> socket.socket:
         # Create and bind socket
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         s.bind((host, port))
 
-        s.listen(4)
+        s.listen(socket.SOMAXCONN)
         return s
 
     def start(self) -> None:
@@ -272,37 +382,67 @@ class TelnetServer:
         Start the telnet server.
         Don't forget to call `loop.run_forever()` after doing this.
         """
-        self._listen_socket = self._create_socket(self.host, self.port)
+        self._listen_socket = self._create_socket(
+            self.host, self.port, self.reuse_port
+        )
+
+        # When port 0 was given, the OS picked a free port.
+        self.port = self._listen_socket.getsockname()[1]
+
         logger.info(
             "Listening for telnet connections on %s port %r", self.host, self.port
         )
 
-        get_event_loop().add_reader(self._listen_socket, self._accept)
+        self._server_task = get_event_loop().create_task(
+            get_event_loop().create_server(
+                lambda: _TelnetProtocol(self),
+                sock=self._listen_socket,
+                backlog=socket.SOMAXCONN,
+            )
+        )
 
     async def stop(self) -> None:
-        if self._listen_socket:
-            get_event_loop().remove_reader(self._listen_socket)
-            self._listen_socket.close()
+        server = None
+        if self._server_task:
+            server = await self._server_task
+            server.close()
 
         # Wait for all applications to finish.
-        for t in self._application_tasks:
+        tasks = list(self._application_tasks)
+        for t in tasks:
             t.cancel()
 
-        for t in self._application_tasks:
-            await t
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-    def _accept(self) -> None:
+        if server:
+            await server.wait_closed()
+
+    def _connection_made(self, transport: asyncio.Transport) -> TelnetConnection:
         """
-        Accept new incoming connection.
+        Start the application of a new connection.
         """
-        if self._listen_socket is None:
-            return  # Should not happen. `_accept` is called after `start`.
-
-        conn, addr = self._listen_socket.accept()
+        addr = transport.get_extra_info("peername")
         logger.info("New connection %r %r", *addr)
 
+        if self.send_buffer_size is not None:
+            transport.get_extra_info("socket").setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer_size
+            )
+
+        # Beyond the high watermark, the connection is backlogged until the
+        # client catches up. (Writes never block the event loop.)
+        transport.set_write_buffer_limits(
+            high=self.write_buffer_high, low=self.write_buffer_low
+        )
+
         connection = TelnetConnection(
-            conn, addr, self.interact, self, encoding=self.encoding, style=self.style
+            transport,
+            addr,
+            self.interact,
+            self,
+            encoding=self.encoding,
+            style=self.style,
+            synchronized_output=self.synchronized_output,
         )
         self.connections.add(connection)
 
@@ -320,3 +460,37 @@ class TelnetServer:
 
         task = get_event_loop().create_task(run())
         self._application_tasks.append(task)
+        return connection
+
+
+class _TelnetProtocol(asyncio.Protocol):
+    """
+    Protocol of one connection, passes everything on to its
+    `TelnetConnection`.
+    """
+
+    def __init__(self, server: TelnetServer) -> None:
+        self.server = server
+        self.connection: Optional[TelnetConnection] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.connection = self.server._connection_made(
+            cast(asyncio.Transport, transport)
+        )
+
+    def data_received(self, data: bytes) -> None:
+        if self.connection:
+            self.connection.feed(data)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.connection:
+            logger.info("Connection closed. %r %r" % self.connection.addr)
+            self.connection.close()
+
+    def pause_writing(self) -> None:
+        if self.connection:
+            self.connection.pause_writing()
+
+    def resume_writing(self) -> None:
+        if self.connection:
+            self.connection.resume_writing()
@@ -46,10 +46,12 @@ __all__ = [
 ]
 
 
-@memoized()
 def has_focus(value: "FocusableElement") -> Condition:
     """
     Enable when this buffer has the focus.
+
+    (Not memoized: the filter holds on to `value`, which would keep the
+    layouts of applications that are done alive. E.g. in a telnet server.)
     """
     from prompt_toolkit.buffer import Buffer
     from prompt_toolkit.layout.controls import UIControl
@@ -1,5 +1,6 @@
 from abc import ABCMeta, abstractmethod
-from typing import Callable, Dict, Iterable, List, Tuple, Union, cast
+from typing import Any, Callable, Iterable, List, Tuple, Union, cast
+from weakref import WeakValueDictionary
 
 __all__ = ["Filter", "Never", "Always", "Condition", "FilterOrBool"]
 
@@ -52,15 +53,42 @@ class Filter(metaclass=ABCMeta):
         )
 
 
-class _AndCache(Dict[Tuple[Filter, Filter], "_AndList"]):
+class _WeakCache(WeakValueDictionary):
+    """
+    Cache that only holds on to the results that are still in use.
+
+    Applications can create filters at runtime (a telnet server creates
+    new ones for every connection), which would pile up in a normal cache.
+    So the filters aren't kept either: the key is their ids, and the result
+    keeps the filters alive (so that the ids can't be reused) until nothing
+    else uses it.
+    """
+
+    def __getitem__(self, filters: Any) -> Filter:
+        try:
+            return cast(Filter, super().__getitem__(_ids(filters)))
+        except KeyError:
+            return self.__missing__(filters)
+
+    def __missing__(self, filters: Any) -> Filter:
+        raise NotImplementedError
+
+    def _store(self, filters: Any, result: Filter) -> Filter:
+        result._operands = filters  # type: ignore
+        self[_ids(filters)] = result
+        return result
+
+
+def _ids(filters: Any) -> Any:
+    if isinstance(filters, tuple):
+        return tuple(id(f) for f in filters)
+    return id(filters)
+
+
+class _AndCache(_WeakCache):
     """
     Cache for And operation between filters.
     (Filter classes are stateless, so we can reuse them.)
-
-    Note: This could be a memory leak if we keep creating filters at runtime.
-          If that is True, the filters should be weakreffed (not the tuple of
-          filters), and tuples should be removed when one of these filters is
-          removed. In practise however, there is a finite amount of filters.
     """
 
     def __missing__(self, filters: Tuple[Filter, Filter]) -> Filter:
@@ -72,12 +100,10 @@ class _AndCache(Dict[Tuple[Filter, Filter], "_AndList"]):
         elif isinstance(b, Never) or isinstance(a, Always):
             return b
 
-        result = _AndList(filters)
-        self[filters] = result
-        return result
+        return self._store(filters, _AndList(filters))
 
 
-class _OrCache(Dict[Tuple[Filter, Filter], "_OrList"]):
+class _OrCache(_WeakCache):
     """ Cache for Or operation between filters. """
 
     def __missing__(self, filters: Tuple[Filter, Filter]) -> Filter:
@@ -89,18 +115,14 @@ class _OrCache(Dict[Tuple[Filter, Filter], "_OrList"]):
         elif isinstance(b, Never) or isinstance(a, Always):
             return a
 
-        result = _OrList(filters)
-        self[filters] = result
-        return result
+        return self._store(filters, _OrList(filters))
 
 
-class _InvertCache(Dict[Filter, "_Invert"]):
+class _InvertCache(_WeakCache):
     """ Cache for inversion operator. """
 
     def __missing__(self, filter: Filter) -> Filter:
-        result = _Invert(filter)
-        self[filter] = result
-        return result
+        return self._store(filter, _Invert(filter))
 
 
 _and_cache = _AndCache()
@@ -25,6 +25,8 @@ class PosixPipeInput(Vt100Input):
 
     def __init__(self, text: str = "") -> None:
         self._r, self._w = os.pipe()
+        self._r_closed = False
+        self._w_closed = False
 
         class Stdin:
             def isatty(stdin) -> bool:
@@ -57,10 +59,24 @@ class PosixPipeInput(Vt100Input):
     def cooked_mode(self) -> ContextManager[None]:
         return DummyContext()
 
+    def send_eof(self) -> None:
+        """
+        Close the write end of the pipe. An application that reads from this
+        input sees end-of-file and terminates with `EOFError`. (Closing the
+        read end instead would silently remove it from the selector, and the
+        application would never wake up.)
+        """
+        if not self._w_closed:
+            self._w_closed = True
+            os.close(self._w)
+
     def close(self) -> None:
         " Close pipe fds. "
-        os.close(self._r)
-        os.close(self._w)
+        self.send_eof()
+
+        if not self._r_closed:
+            self._r_closed = True
+            os.close(self._r)
 
         # We should assign `None` to 'self._r` and 'self._w',
         # The event loop still needs to know the the fileno for this input in order
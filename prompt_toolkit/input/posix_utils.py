@@ -7,6 +7,27 @@ __all__ = [
 ]
 
 
+def _is_readable(fd: int) -> bool:
+    """
+    Non blocking check whether `fd` has data (or end-of-file) to read.
+    Raises `IOError` when the file descriptor was closed.
+
+    `select.select` can't handle file descriptors above `FD_SETSIZE` (usually
+    1024), which are common in servers with many connections, so use
+    `poll` where it is available.
+    """
+    if hasattr(select, "poll"):
+        poll = select.poll()
+        poll.register(fd, select.POLLIN)
+        events = poll.poll(0)
+
+        if events and events[0][1] & select.POLLNVAL:
+            raise IOError("File descriptor %s was closed" % fd)
+        return bool(events)
+
+    return bool(select.select([fd], [], [], 0)[0])
+
+
 class PosixStdinReader:
     """
     Wrapper around stdin which reads (nonblocking) the next available 1024
@@ -67,7 +88,7 @@ class PosixStdinReader:
         # function is only called when there is something to read, but for some
         # reason this happens in certain situations.)
         try:
-            if not select.select([self.stdin_fd], [], [], 0)[0]:
+            if not _is_readable(self.stdin_fd):
                 return ""
         except IOError:
             # Happens for instance when the file descriptor was closed.
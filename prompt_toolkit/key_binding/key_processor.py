@@ -235,6 +235,11 @@ class KeyProcessor:
         """
         app = get_app()
 
+        # While a frame is drawn in the render thread, key bindings shouldn't
+        # change the layout. The application processes the keys afterwards.
+        if app.is_drawing_frame:
+            return
+
         def not_empty() -> bool:
             # When the application result is set, stop processing keys.  (E.g.
             # if ENTER was received, followed by a few additional key strokes,
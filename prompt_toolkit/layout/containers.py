@@ -3,12 +3,16 @@ Container for the layout.
 (Containers can contain other containers or user interface controls.)
 """
 from abc import ABCMeta, abstractmethod
+from array import array
+from collections import defaultdict
 from enum import Enum
 from functools import partial
 from typing import (
     TYPE_CHECKING,
     Callable,
+    DefaultDict,
     Dict,
+    Hashable,
     List,
     Optional,
     Sequence,
@@ -55,7 +59,7 @@ from .dimension import (
 )
 from .margins import Margin
 from .mouse_handlers import MouseHandlers
-from .screen import _CHAR_CACHE, Screen, WritePosition
+from .screen import _CHAR_CACHE, _CHAR_IDS, Screen, WritePosition
 from .utils import explode_text_fragments
 
 if TYPE_CHECKING:
@@ -227,6 +231,10 @@ class _Split(Container):
         self.key_bindings = key_bindings
         self.style = style
 
+        self._sizes_cache: SimpleCache[
+            Hashable, Optional[Tuple[int, ...]]
+        ] = SimpleCache(maxsize=8)
+
     def is_modal(self) -> bool:
         return self.modal
 
@@ -236,6 +244,67 @@ class _Split(Container):
     def get_children(self) -> List[Container]:
         return self.children
 
+    def _divide_sizes(
+        self, dimensions: List[Dimension], size: int, fill: bool
+    ) -> Optional[List[int]]:
+        """
+        Divide `size` over the children with the given dimensions. Return None
+        when there is not enough space. Unless `fill` is set, stop when every
+        child has its preferred size.
+
+        (The dimensions are mostly the same from one render to the next, so
+        the sizes are cached.)
+        """
+        key = (
+            size,
+            fill,
+            tuple((d.min, d.max, d.preferred, d.weight) for d in dimensions),
+        )
+
+        def get() -> Optional[Tuple[int, ...]]:
+            # Sum dimensions
+            sum_dimensions = sum_layout_dimensions(dimensions)
+
+            # If there is not enough space for both.
+            # Don't do anything.
+            if sum_dimensions.min > size:
+                return None
+
+            # Find optimal sizes. (Start with minimal size, increase until we
+            # cover the whole size.)
+            sizes = [d.min for d in dimensions]
+
+            child_generator = take_using_weights(
+                items=list(range(len(dimensions))),
+                weights=[d.weight for d in dimensions],
+            )
+
+            i = next(child_generator)
+
+            # Increase until we meet at least the 'preferred' size.
+            preferred_stop = min(size, sum_dimensions.preferred)
+            preferred_dimensions = [d.preferred for d in dimensions]
+
+            while sum(sizes) < preferred_stop:
+                if sizes[i] < preferred_dimensions[i]:
+                    sizes[i] += 1
+                i = next(child_generator)
+
+            # Increase until we use all the available space. (or until "max")
+            if fill:
+                max_stop = min(size, sum_dimensions.max)
+                max_dimensions = [d.max for d in dimensions]
+
+                while sum(sizes) < max_stop:
+                    if sizes[i] < max_dimensions[i]:
+                        sizes[i] += 1
+                    i = next(child_generator)
+
+            return tuple(sizes)
+
+        sizes = self._sizes_cache.get(key, get)
+        return None if sizes is None else list(sizes)
+
 
 class HSplit(_Split):
     """
@@ -437,44 +506,8 @@ class HSplit(_Split):
         dimensions = [c.preferred_height(width, height)
                       for c in self._all_children]
 
-        # Sum dimensions
-        sum_dimensions = sum_layout_dimensions(dimensions)
-
-        # If there is not enough space for both.
-        # Don't do anything.
-        if sum_dimensions.min > height:
-            return None
-
-        # Find optimal sizes. (Start with minimal size, increase until we cover
-        # the whole height.)
-        sizes = [d.min for d in dimensions]
-
-        child_generator = take_using_weights(
-            items=list(range(len(dimensions))), weights=[d.weight for d in dimensions]
-        )
-
-        i = next(child_generator)
-
-        # Increase until we meet at least the 'preferred' size.
-        preferred_stop = min(height, sum_dimensions.preferred)
-        preferred_dimensions = [d.preferred for d in dimensions]
-
-        while sum(sizes) < preferred_stop:
-            if sizes[i] < preferred_dimensions[i]:
-                sizes[i] += 1
-            i = next(child_generator)
-
-        # Increase until we use all the available space. (or until "max")
-        if not get_app().is_done:
-            max_stop = min(height, sum_dimensions.max)
-            max_dimensions = [d.max for d in dimensions]
-
-            while sum(sizes) < max_stop:
-                if sizes[i] < max_dimensions[i]:
-                    sizes[i] += 1
-                i = next(child_generator)
-
-        return sizes
+        # Use all the available space, unless the application is done.
+        return self._divide_sizes(dimensions, height, fill=not get_app().is_done)
 
 
 class VSplit(_Split):
@@ -630,44 +663,8 @@ class VSplit(_Split):
 
         # Calculate widths.
         dimensions = [c.preferred_width(width) for c in children]
-        preferred_dimensions = [d.preferred for d in dimensions]
-
-        # Sum dimensions
-        sum_dimensions = sum_layout_dimensions(dimensions)
-
-        # If there is not enough space for both.
-        # Don't do anything.
-        if sum_dimensions.min > width:
-            return None
-
-        # Find optimal sizes. (Start with minimal size, increase until we cover
-        # the whole width.)
-        sizes = [d.min for d in dimensions]
-
-        child_generator = take_using_weights(
-            items=list(range(len(dimensions))), weights=[d.weight for d in dimensions]
-        )
 
-        i = next(child_generator)
-
-        # Increase until we meet at least the 'preferred' size.
-        preferred_stop = min(width, sum_dimensions.preferred)
-
-        while sum(sizes) < preferred_stop:
-            if sizes[i] < preferred_dimensions[i]:
-                sizes[i] += 1
-            i = next(child_generator)
-
-        # Increase until we use all the available space.
-        max_dimensions = [d.max for d in dimensions]
-        max_stop = min(width, sum_dimensions.max)
-
-        while sum(sizes) < max_stop:
-            if sizes[i] < max_dimensions[i]:
-                sizes[i] += 1
-            i = next(child_generator)
-
-        return sizes
+        return self._divide_sizes(dimensions, width, fill=True)
 
     def write_to_screen(
         self,
@@ -1004,14 +1001,21 @@ class FloatContainer(Container):
         (For floats that should not hide content underneath.)
         """
         wp = write_position
+        xmin = max(0, wp.xpos)
+        xmax = wp.xpos + wp.width
+        chars = _CHAR_IDS.chars
 
         for y in range(wp.ypos, wp.ypos + wp.height):
-            if y in screen.data_buffer:
-                row = screen.data_buffer[y]
+            if y in screen.rows:
+                row = screen.rows[y]
+
+                if (
+                    xmin != wp.xpos or xmax > len(row)
+                ) and screen.default_char.char != " ":
+                    return False
 
-                for x in range(wp.xpos, wp.xpos + wp.width):
-                    c = row[x]
-                    if c.char != " ":
+                for char_id in set(row[xmin:xmax]):
+                    if chars[char_id].char != " ":
                         return False
 
         return True
@@ -1402,6 +1406,50 @@ class WindowAlign(Enum):
     CENTER = "CENTER"
 
 
+def _merge_zero_width_escapes(
+    escapes: DefaultDict[int, DefaultDict[int, str]],
+    new_escapes: Dict[int, Dict[int, str]],
+) -> None:
+    " Add the zero width escapes of `new_escapes` to `escapes`. "
+    for y, row in new_escapes.items():
+        for x, text in row.items():
+            escapes[y][x] += text
+
+
+class _RenderedWindow:
+    """
+    What a :class:`.Window` drew the last time, so that it can be copied to
+    the next screen when the window would draw exactly the same again.
+
+    :param key: Everything that decides what the window draws.
+    :param start: First column of the saved cells of every row.
+    :param before: For every row, the cells that were there before drawing.
+    :param after: For every row, the cells after drawing.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        start: List[int],
+        before: List["array[int]"],
+        after: List["array[int]"],
+        zero_width_escapes: Dict[int, Dict[int, str]],
+        menu_position: Optional[Point],
+        render_info: "WindowRenderInfo",
+        mouse_handler: Callable[[MouseEvent], None],
+        margin_fragments: List[StyleAndTextTuples],
+    ) -> None:
+        self.key = key
+        self.start = start
+        self.before = before
+        self.after = after
+        self.zero_width_escapes = zero_width_escapes
+        self.menu_position = menu_position
+        self.render_info = render_info
+        self.mouse_handler = mouse_handler
+        self.margin_fragments = margin_fragments
+
+
 class Window(Container):
     """
     Container that holds a control.
@@ -1548,6 +1596,9 @@ class Window(Container):
         #: output.)
         self.render_info: Optional[WindowRenderInfo] = None
 
+        # The cells drawn last time. (Copied when nothing changed.)
+        self._rendered: Optional[_RenderedWindow] = None
+
     def _get_margin_width(self, margin: Margin) -> int:
         """
         Return the width for this margin.
@@ -1763,12 +1814,46 @@ class Window(Container):
             ui_content, write_position.width - total_margin_width, write_position.height
         )
 
-        # Erase background and fill with `char`.
-        self._fill_bg(screen, write_position, erase_bg)
-
         # Resolve `align` attribute.
         align = self.align() if callable(self.align) else self.align
 
+        has_focus = get_app().layout.current_control == self.content
+
+        # When this draws the same as last time, copy the cells from then.
+        render_key = self._get_render_key(
+            ui_content,
+            write_position,
+            parent_style,
+            erase_bg,
+            has_focus,
+            wrap_lines,
+            align,
+            left_margin_widths,
+            right_margin_widths,
+        )
+        if render_key is not None and self._copy_rendered(
+            screen,
+            mouse_handlers,
+            write_position,
+            render_key,
+            left_margin_widths,
+            right_margin_widths,
+        ):
+            return
+
+        if render_key is not None:
+            # (The body can end up a double width character, or the width of
+            # the left margins, past the right side of the window.)
+            x_end = (
+                write_position.xpos + write_position.width + sum(left_margin_widths) + 1
+            )
+            start, before = self._save_cells(screen, write_position, x_end)
+            zero_width_escapes = screen.zero_width_escapes
+            screen.zero_width_escapes = defaultdict(lambda: defaultdict(str))
+
+        # Erase background and fill with `char`.
+        self._fill_bg(screen, write_position, erase_bg)
+
         # Write body
         visible_line_to_row_col, rowcol_to_yx = self._copy_body(
             ui_content,
@@ -1782,7 +1867,7 @@ class Window(Container):
             highlight_lines=True,
             vertical_scroll_2=self.vertical_scroll_2,
             always_hide_cursor=self.always_hide_cursor(),
-            has_focus=get_app().layout.current_control == self.content,
+            has_focus=has_focus,
             align=align,
             get_line_prefix=self.get_line_prefix,
         )
@@ -1868,12 +1953,14 @@ class Window(Container):
 
         # Render and copy margins.
         move_x = 0
+        margin_fragments: List[StyleAndTextTuples] = []
 
         def render_margin(m: Margin, width: int) -> UIContent:
             " Render margin. Return `Screen`. "
             # Retrieve margin fragments.
             fragments = m.create_margin(
                 render_info, width, write_position.height)
+            margin_fragments.append(fragments)
 
             # Turn it into a UIContent object.
             # already rendered those fragments using this size.)
@@ -1908,6 +1995,176 @@ class Window(Container):
         # Tell the screen that this user control has been painted.
         screen.visible_windows.append(self)
 
+        if render_key is not None:
+            # Remember what was drawn.
+            new_zero_width_escapes = screen.zero_width_escapes
+            screen.zero_width_escapes = zero_width_escapes
+            _merge_zero_width_escapes(zero_width_escapes, new_zero_width_escapes)
+
+            self._rendered = _RenderedWindow(
+                key=render_key,
+                start=start,
+                before=before,
+                after=[
+                    screen.get_row(y)[s:x_end]
+                    for y, s in enumerate(start, write_position.ypos)
+                ],
+                zero_width_escapes={
+                    y: dict(escapes)
+                    for y, escapes in new_zero_width_escapes.items()
+                    if escapes
+                },
+                menu_position=screen.menu_positions.get(self),
+                render_info=render_info,
+                mouse_handler=mouse_handler,
+                margin_fragments=margin_fragments,
+            )
+        else:
+            self._rendered = None
+
+    def _get_render_key(
+        self,
+        ui_content: UIContent,
+        write_position: WritePosition,
+        parent_style: str,
+        erase_bg: bool,
+        has_focus: bool,
+        wrap_lines: bool,
+        align: WindowAlign,
+        left_margin_widths: List[int],
+        right_margin_widths: List[int],
+    ) -> Optional[Hashable]:
+        """
+        Everything that decides what this window draws, or `None` when that
+        is not known. (The focused window also draws the cursor, and a line
+        prefix can return anything.)
+        """
+        if (
+            has_focus
+            or ui_content.render_key is None
+            or self.get_line_prefix is not None
+            or write_position.xpos < 0
+            or write_position.ypos < 0
+        ):
+            return None
+
+        char = self.char() if callable(self.char) else self.char
+
+        colorcolumns = self.colorcolumns
+        if callable(colorcolumns):
+            colorcolumns = colorcolumns()
+
+        return (
+            ui_content.render_key,
+            write_position.xpos,
+            write_position.ypos,
+            write_position.width,
+            write_position.height,
+            parent_style,
+            to_str(self.style),
+            char,
+            erase_bg,
+            self.vertical_scroll,
+            self.horizontal_scroll,
+            self.vertical_scroll_2,
+            wrap_lines,
+            align,
+            self.cursorline(),
+            self.cursorcolumn(),
+            tuple((cc.position, cc.style) for cc in colorcolumns),
+            tuple(left_margin_widths),
+            tuple(right_margin_widths),
+        )
+
+    def _save_cells(
+        self, screen: Screen, write_position: WritePosition, x_end: int
+    ) -> Tuple[List[int], List["array[int]"]]:
+        """
+        Return the cells of every row of this window up to `x_end`, and the
+        column where they start. (Left of the window, when the row is shorter
+        than that.)
+        """
+        start = []
+        cells = []
+        ypos = write_position.ypos
+
+        for y in range(ypos, ypos + write_position.height):
+            row = screen.get_row(y)
+            s = min(write_position.xpos, len(row))
+            start.append(s)
+            cells.append(row[s:x_end])
+
+        return start, cells
+
+    def _copy_rendered(
+        self,
+        screen: Screen,
+        mouse_handlers: MouseHandlers,
+        write_position: WritePosition,
+        render_key: Hashable,
+        left_margin_widths: List[int],
+        right_margin_widths: List[int],
+    ) -> bool:
+        """
+        Copy the cells drawn the last time to `screen`, when they were drawn
+        with the same `render_key` on top of the same cells. Return `False`
+        when the window has to be drawn instead.
+        """
+        rendered = self._rendered
+        if rendered is None or rendered.key != render_key:
+            return False
+
+        x_end = write_position.xpos + write_position.width + sum(left_margin_widths) + 1
+        start, before = self._save_cells(screen, write_position, x_end)
+        if start != rendered.start or before != rendered.before:
+            return False
+
+        # Margins can show more than the content. (Like the scroll position.)
+        render_info = rendered.render_info
+        height = write_position.height
+        margin_fragments = [
+            m.create_margin(render_info, width, height)
+            for m, width in zip(self.left_margins, left_margin_widths)
+            if width > 0
+        ] + [
+            m.create_margin(render_info, width, height)
+            for m, width in zip(self.right_margins, right_margin_widths)
+        ]
+        if margin_fragments != rendered.margin_fragments:
+            return False
+
+        for y, s, cells, after in zip(
+            range(write_position.ypos, write_position.ypos + height),
+            start,
+            before,
+            rendered.after,
+        ):
+            screen.get_row(y)[s : s + len(cells)] = after
+
+        _merge_zero_width_escapes(
+            screen.zero_width_escapes, rendered.zero_width_escapes
+        )
+
+        if rendered.menu_position is not None:
+            screen.set_menu_position(self, rendered.menu_position)
+
+        screen.height = max(screen.height, write_position.ypos + height)
+        self.render_info = render_info
+
+        mouse_handlers.set_mouse_handler_for_range(
+            x_min=write_position.xpos + sum(left_margin_widths),
+            x_max=write_position.xpos
+            + write_position.width
+            - sum(left_margin_widths)
+            - sum(right_margin_widths),
+            y_min=write_position.ypos,
+            y_max=write_position.ypos + height,
+            handler=rendered.mouse_handler,
+        )
+
+        screen.visible_windows.append(self)
+        return True
+
     def _copy_body(
         self,
         ui_content: UIContent,
@@ -1935,8 +2192,11 @@ class Window(Container):
         xpos = write_position.xpos + move_x
         ypos = write_position.ypos
         line_count = ui_content.line_count
-        new_buffer = new_screen.data_buffer
-        empty_char = _CHAR_CACHE["", ""]
+        get_row = new_screen.get_row
+        char_ids = _CHAR_IDS
+        char_widths = _CHAR_IDS.widths
+        chars = _CHAR_IDS.chars
+        empty_char_id = _CHAR_IDS["", ""]
 
         # Map visible line number to (row, col) of input.
         # 'col' will always be zero if line wrapping is off.
@@ -1994,7 +2254,7 @@ class Window(Container):
             col = 0
             wrap_count = 0
             for style, text, *_ in line:
-                new_buffer_row = new_buffer[y + ypos]
+                new_buffer_row = get_row(y + ypos)
 
                 # Remember raw VT escape sequences. (E.g. FinalTerm's
                 # escape sequences.)
@@ -2003,8 +2263,8 @@ class Window(Container):
                     continue
 
                 for c in text:
-                    char = _CHAR_CACHE[c, style]
-                    char_width = char.width
+                    char_id = char_ids[c, style]
+                    char_width = char_widths[char_id]
 
                     # Wrap when the line width is exceeded.
                     if wrap_lines and x + char_width > width:
@@ -2024,14 +2284,24 @@ class Window(Container):
                             x, y = copy_line(
                                 prompt, lineno, x, y, is_input=False)
 
-                        new_buffer_row = new_buffer[y + ypos]
+                        new_buffer_row = get_row(y + ypos)
 
                         if y >= write_position.height:
                             return x, y  # Break out of all for loops.
 
                     # Set character in screen and shift 'x'.
-                    if x >= 0 and y >= 0 and x < write_position.width:
-                        new_buffer_row[x + xpos] = char
+                    # (Columns left of the screen, for floats that are
+                    # partially visible, are not stored.)
+                    if (
+                        x >= 0
+                        and y >= 0
+                        and x < write_position.width
+                        and x + xpos >= 0
+                    ):
+                        if len(new_buffer_row) < x + xpos + max(char_width, 1):
+                            get_row(y + ypos, x + xpos + max(char_width, 1))
+
+                        new_buffer_row[x + xpos] = char_id
 
                         # When we print a multi width character, make sure
                         # to erase the neighbours positions in the screen.
@@ -2039,7 +2309,7 @@ class Window(Container):
                         # so next redraw this cell will repaint anyway.)
                         if char_width > 1:
                             for i in range(1, char_width):
-                                new_buffer_row[x + xpos + i] = empty_char
+                                new_buffer_row[x + xpos + i] = empty_char_id
 
                         # If this is a zero width characters, then it's
                         # probably part of a decomposed unicode character.
@@ -2052,13 +2322,14 @@ class Window(Container):
                             for pw in [2, 1]:  # Previous character width.
                                 if (
                                     x - pw >= 0
-                                    and new_buffer_row[x + xpos - pw].width == pw
+                                    and x + xpos - pw >= 0
+                                    and char_widths[new_buffer_row[x + xpos - pw]]
+                                    == pw
                                 ):
-                                    prev_char = new_buffer_row[x + xpos - pw]
-                                    char2 = _CHAR_CACHE[
+                                    prev_char = chars[new_buffer_row[x + xpos - pw]]
+                                    new_buffer_row[x + xpos - pw] = char_ids[
                                         prev_char.char + c, prev_char.style
                                     ]
-                                    new_buffer_row[x + xpos - pw] = char2
 
                         # Keep track of write position for each character.
                         current_rowcol_to_yx[lineno, col + skipped] = (
@@ -2091,6 +2362,11 @@ class Window(Container):
 
         copy()
 
+        # `copy_line` refers to itself. Break that reference cycle, so that
+        # its closure is freed right away instead of by the (full) garbage
+        # collection, which takes long with many applications in memory.
+        del copy_line
+
         def cursor_pos_to_screen_pos(row: int, col: int) -> Point:
             " Translate row/col from UIContent to real Screen coordinates. "
             try:
@@ -2167,12 +2443,15 @@ class Window(Container):
 
         if erase_bg or char:
             wp = write_position
-            char_obj = _CHAR_CACHE[char or " ", ""]
+            xmin = max(0, wp.xpos)
+            xmax = wp.xpos + wp.width
+            if xmax <= xmin:
+                return
+
+            fill = array("I", [_CHAR_IDS[char or " ", ""]]) * (xmax - xmin)
 
             for y in range(wp.ypos, wp.ypos + wp.height):
-                row = screen.data_buffer[y]
-                for x in range(wp.xpos, wp.xpos + wp.width):
-                    row[x] = char_obj
+                screen.get_row(y, xmax)[xmin:xmax] = fill
 
     def _apply_style(
         self, new_screen: Screen, write_position: WritePosition, parent_style: str
@@ -154,6 +154,12 @@ class UIControl(metaclass=ABCMeta):
         return []
 
 
+# Widths of the lines of `UIContent` objects that have a `line_widths_key`.
+# Maps key -> {lineno: width}. Shared by all applications, so that the same
+# long text shown again (or in another session) is never measured twice.
+_line_widths_cache: SimpleCache[Hashable, Dict[int, int]] = SimpleCache(maxsize=256)
+
+
 class UIContent:
     """
     Content generated by a user control. This content consists of a list of
@@ -165,6 +171,14 @@ class UIContent:
     :param cursor_position: a :class:`.Point` for the cursor position.
     :param menu_position: a :class:`.Point` for the menu position.
     :param show_cursor: Make the cursor visible.
+    :param line_widths_key: Hashable that identifies the text of the lines.
+        Any two `UIContent` objects with the same key must have the same text
+        on every line. The line widths are then cached across renders, and
+        line wrapping doesn't need to call `get_line` at all.
+    :param render_key: Hashable that identifies everything that is shown.
+        Any two `UIContent` objects with the same key must have the same
+        lines, cursor and menu position. A `Window` can then copy what it
+        drew for the previous one instead of drawing the lines again.
     """
 
     def __init__(
@@ -174,6 +188,8 @@ class UIContent:
         cursor_position: Optional[Point] = None,
         menu_position: Optional[Point] = None,
         show_cursor: bool = True,
+        line_widths_key: Optional[Hashable] = None,
+        render_key: Optional[Hashable] = None,
     ):
 
         self.get_line = get_line
@@ -181,10 +197,16 @@ class UIContent:
         self.cursor_position = cursor_position or Point(x=0, y=0)
         self.menu_position = menu_position
         self.show_cursor = show_cursor
+        self.render_key = render_key
 
         # Cache for line heights. Maps cache key -> height
         self._line_heights_cache: Dict[Hashable, int] = {}
 
+        # Shared cache for line widths. Maps lineno -> width
+        self._line_widths: Optional[Dict[int, int]] = None
+        if line_widths_key is not None:
+            self._line_widths = _line_widths_cache.get(line_widths_key, dict)
+
     def __getitem__(self, lineno: int) -> StyleAndTextTuples:
         " Make it iterable (iterate line by line). "
         if lineno < self.line_count:
@@ -210,6 +232,25 @@ class UIContent:
             when line wrapping.
         :returns: The computed height.
         """
+        if (
+            self._line_widths is not None
+            and get_line_prefix is None
+            and slice_stop is None
+            and width > 0
+        ):
+            # Fast path: the width of this text is known from an earlier
+            # render, no need to look at the line at all.
+            try:
+                text_width = self._line_widths[lineno]
+            except KeyError:
+                text_width = get_cwidth(fragment_list_to_text(self.get_line(lineno)))
+                self._line_widths[lineno] = text_width
+
+            quotient, remainder = divmod(text_width, width)
+            if remainder:
+                quotient += 1  # Like math.ceil.
+            return max(1, quotient)
+
         # Instead of using `get_line_prefix` as key, we use render_counter
         # instead. This is more reliable, because this function could still be
         # the same, while the content would change over time.
@@ -418,6 +459,14 @@ class FormattedTextControl(UIControl):
         # Create content, or take it from the cache.
         key = (tuple(fragments_with_mouse_handlers), width, cursor_position)
 
+        # What is shown doesn't depend on the mouse handlers. (Which are often
+        # new functions for every render.)
+        render_key = (
+            tuple(fragment[:2] for fragment in fragments_with_mouse_handlers),
+            width,
+            cursor_position,
+        )
+
         def get_content() -> UIContent:
             return UIContent(
                 get_line=lambda i: fragment_lines[i],
@@ -425,6 +474,7 @@ class FormattedTextControl(UIControl):
                 show_cursor=self.show_cursor,
                 cursor_position=cursor_position,
                 menu_position=get_menu_position(),
+                render_key=render_key,
             )
 
         return self._content_cache.get(key, get_content)
@@ -489,7 +539,7 @@ class DummyControl(UIControl):
             return []
 
         return UIContent(
-            get_line=get_line, line_count=100 ** 100
+            get_line=get_line, line_count=100 ** 100, render_key=DummyControl
         )  # Something very big.
 
     def is_focusable(self) -> bool:
@@ -669,6 +719,14 @@ class BufferControl(UIControl):
         key = (document.text, self.lexer.invalidation_hash())
         return self._fragment_cache.get(key, get_formatted_text_for_line)
 
+    def _get_merged_processor(self) -> Processor:
+        " Merge all input processors together. "
+        input_processors = self.input_processors or []
+        if self.include_default_input_processors:
+            input_processors = self.default_input_processors + input_processors
+
+        return merge_processors(input_processors)
+
     def _create_get_processed_line_func(
         self, document: Document, width: int, height: int
     ) -> Callable[[int], _ProcessedLine]:
@@ -677,12 +735,7 @@ class BufferControl(UIControl):
         returns a _ProcessedLine(processed_fragments, source_to_display, display_to_source)
         tuple.
         """
-        # Merge all input processors together.
-        input_processors = self.input_processors or []
-        if self.include_default_input_processors:
-            input_processors = self.default_input_processors + input_processors
-
-        merged_processor = merge_processors(input_processors)
+        merged_processor = self._get_merged_processor()
 
         def transform(lineno: int, fragments: StyleAndTextTuples) -> _ProcessedLine:
             " Transform the fragments for a given line number. "
@@ -781,18 +834,51 @@ class BufferControl(UIControl):
             fragments = fragments + [("", " ")]
             return fragments
 
+        # When the processors don't change the text, the lines are the
+        # document lines (plus the space above), so any content showing the
+        # same text can share the line widths.
+        line_widths_key: Optional[Hashable] = None
+        if not preview_now and self._get_merged_processor().preserves_text(
+            self, document
+        ):
+            line_widths_key = (BufferControl, document.text)
+
+        # The lines only depend on the document, the lexer and the processors,
+        # when the processors can tell. (The focused buffer can also show a
+        # menu, so that one is never reused.)
+        render_key: Optional[Hashable] = None
+        has_focus = get_app().layout.current_control == self
+        if not has_focus:
+            processors_key = self._get_merged_processor().invalidation_hash(
+                self, document
+            )
+            if processors_key is not None:
+                selection = document.selection
+                render_key = (
+                    BufferControl,
+                    document.text,
+                    document.cursor_position,
+                    selection and (selection.original_cursor_position, selection.type),
+                    self.lexer.invalidation_hash(),
+                    processors_key,
+                    width,
+                    height,
+                )
+
         content = UIContent(
             get_line=get_line,
             line_count=document.line_count,
             cursor_position=translate_rowcol(
                 document.cursor_position_row, document.cursor_position_col
             ),
+            line_widths_key=line_widths_key,
+            render_key=render_key,
         )
 
         # If there is an auto completion going on, use that start point for a
         # pop-up menu position. (But only when this buffer has the focus --
         # there is only one place for a menu, determined by the focused buffer.)
-        if get_app().layout.current_control == self:
+        if has_focus:
             menu_position = self.menu_position() if self.menu_position else None
             if menu_position is not None:
                 assert isinstance(menu_position, int)
@@ -371,6 +371,7 @@ class Layout:
                 walk(c)
 
         walk(self.container)
+        del walk  # Break the reference cycle of the recursive closure.
 
         self._child_to_parent = parents
 
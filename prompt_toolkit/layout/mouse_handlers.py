@@ -1,6 +1,4 @@
-from collections import defaultdict
-from itertools import product
-from typing import Callable, DefaultDict, Tuple
+from typing import Callable, List, Tuple
 
 from prompt_toolkit.mouse_events import MouseEvent
 
@@ -9,21 +7,55 @@ __all__ = [
 ]
 
 
+MouseHandler = Callable[[MouseEvent], None]
+
+
+def _dummy_callback(mouse_event: MouseEvent) -> None:
+    """
+    :param mouse_event: `MouseEvent` instance.
+    """
+
+
+class _MouseHandlerRegions:
+    """
+    Maps (x, y) tuples to handlers.
+
+    Handlers are stored per rectangle instead of per cell, which keeps a
+    full screen of handlers down to a few dozen entries. Regions that are
+    added later take precedence, like cells that are written later.
+    """
+
+    def __init__(self) -> None:
+        self._regions: List[Tuple[int, int, int, int, MouseHandler]] = []
+
+    def add(
+        self, x_min: int, x_max: int, y_min: int, y_max: int, handler: MouseHandler
+    ) -> None:
+        if x_min < x_max and y_min < y_max:
+            self._regions.append((x_min, x_max, y_min, y_max, handler))
+
+    def __getitem__(self, position: Tuple[int, int]) -> MouseHandler:
+        x, y = position
+
+        for x_min, x_max, y_min, y_max, handler in reversed(self._regions):
+            if x_min <= x < x_max and y_min <= y < y_max:
+                return handler
+
+        return _dummy_callback
+
+    def __setitem__(self, position: Tuple[int, int], handler: MouseHandler) -> None:
+        x, y = position
+        self.add(x, x + 1, y, y + 1, handler)
+
+
 class MouseHandlers:
     """
     Two dimensional raster of callbacks for mouse events.
     """
 
     def __init__(self) -> None:
-        def dummy_callback(mouse_event: MouseEvent) -> None:
-            """
-            :param mouse_event: `MouseEvent` instance.
-            """
-
         # Map (x,y) tuples to handlers.
-        self.mouse_handlers: DefaultDict[
-            Tuple[int, int], Callable[[MouseEvent], None]
-        ] = defaultdict(lambda: dummy_callback)
+        self.mouse_handlers = _MouseHandlerRegions()
 
     def set_mouse_handler_for_range(
         self,
@@ -36,5 +68,4 @@ class MouseHandlers:
         """
         Set mouse handler for a region.
         """
-        for x, y in product(range(x_min, x_max), range(y_min, y_max)):
-            self.mouse_handlers[x, y] = handler
+        self.mouse_handlers.add(x_min, x_max, y_min, y_max, handler)
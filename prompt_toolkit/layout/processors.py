@@ -79,6 +79,32 @@ class Processor(metaclass=ABCMeta):
         """
         return Transformation(transformation_input.fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        """
+        Return `True` when this processor currently leaves the text of every
+        line untouched (it only changes the style). The width of every line
+        is then known from the document alone, and can be shared between
+        renders.
+
+        The default is `False`, which is always safe.
+        """
+        return False
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        """
+        When this changes, `apply_transformation` could give a different
+        output for the same document. As long as it stays the same, a window
+        showing the same document can reuse what it rendered before.
+
+        The default is `None`, which means "unknown": the output is never
+        reused.
+        """
+        return None
+
 
 SourceToDisplay = Callable[[int], int]
 DisplayToSource = Callable[[int], int]
@@ -167,6 +193,16 @@ class DummyProcessor(Processor):
     ) -> Transformation:
         return Transformation(transformation_input.fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return True
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        return ()
+
 
 class HighlightSearchProcessor(Processor):
     """
@@ -186,6 +222,19 @@ class HighlightSearchProcessor(Processor):
         """
         return buffer_control.search_state.text
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return True
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        search_text = self._get_search_text(buffer_control)
+        if not search_text or get_app().is_done:
+            return ()
+        return (search_text, buffer_control.search_state.ignore_case())
+
     def apply_transformation(
         self, transformation_input: TransformationInput
     ) -> Transformation:
@@ -311,6 +360,18 @@ class HighlightSelectionProcessor(Processor):
 
         return Transformation(fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        # Selected empty lines and line endings are shown as a space.
+        return document.selection is None
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        # Only depends on the document.
+        return ()
+
 
 class PasswordProcessor(Processor):
     """
@@ -333,6 +394,11 @@ class PasswordProcessor(Processor):
 
         return Transformation(fragments)
 
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        return self.char
+
 
 class HighlightMatchingBracketProcessor(Processor):
     """
@@ -488,6 +554,19 @@ class DisplayMultipleCursors(Processor):
         else:
             return Transformation(fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        # Cursors after the end of a line are shown as a space.
+        return not vi_insert_multiple_mode()
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        if vi_insert_multiple_mode():
+            return tuple(buffer_control.buffer.multiple_cursor_positions)
+        return ()
+
 
 class BeforeInput(Processor):
     """
@@ -525,6 +604,16 @@ class BeforeInput(Processor):
             display_to_source=display_to_source,
         )
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return fragment_list_len(to_formatted_text(self.text)) == 0
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        return tuple(to_formatted_text(self.text, self.style))
+
     def __repr__(self) -> str:
         return "BeforeInput(%r, %r)" % (self.text, self.style)
 
@@ -579,6 +668,16 @@ class AfterInput(Processor):
         else:
             return Transformation(fragments=ti.fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return fragment_list_len(to_formatted_text(self.text)) == 0
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        return tuple(to_formatted_text(self.text, self.style))
+
     def __repr__(self) -> str:
         return "%s(%r, style=%r)" % (self.__class__.__name__, self.text, self.style)
 
@@ -606,6 +705,17 @@ class AppendAutoSuggestion(Processor):
         else:
             return Transformation(fragments=ti.fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return not buffer_control.buffer.suggestion
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        suggestion = buffer_control.buffer.suggestion
+        return (suggestion.text,) if suggestion else ()
+
 
 class ShowLeadingWhiteSpaceProcessor(Processor):
     """
@@ -939,6 +1049,20 @@ class ConditionalProcessor(Processor):
         else:
             return Transformation(transformation_input.fragments)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return not self.filter() or self.processor.preserves_text(
+            buffer_control, document
+        )
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        if not self.filter():
+            return ()
+        return self.processor.invalidation_hash(buffer_control, document)
+
     def __repr__(self) -> str:
         return "%s(processor=%r, filter=%r)" % (
             self.__class__.__name__,
@@ -961,6 +1085,19 @@ class DynamicProcessor(Processor):
         processor = self.get_processor() or DummyProcessor()
         return processor.apply_transformation(ti)
 
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        processor = self.get_processor() or DummyProcessor()
+        return processor.preserves_text(buffer_control, document)
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        processor = self.get_processor() or DummyProcessor()
+        key = processor.invalidation_hash(buffer_control, document)
+        return None if key is None else (id(processor), key)
+
 
 def merge_processors(processors: List[Processor]) -> Processor:
     """
@@ -1027,3 +1164,16 @@ class _MergedProcessor(Processor):
         del source_to_display_functions[:1]
 
         return Transformation(fragments, source_to_display, display_to_source)
+
+    def preserves_text(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> bool:
+        return all(p.preserves_text(buffer_control, document) for p in self.processors)
+
+    def invalidation_hash(
+        self, buffer_control: "BufferControl", document: Document
+    ) -> Optional[Hashable]:
+        keys = tuple(
+            p.invalidation_hash(buffer_control, document) for p in self.processors
+        )
+        return None if None in keys else keys
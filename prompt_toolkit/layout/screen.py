@@ -1,5 +1,16 @@
+from array import array
 from collections import defaultdict
-from typing import TYPE_CHECKING, Callable, DefaultDict, Dict, List, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from prompt_toolkit.cache import FastDictCache
 from prompt_toolkit.data_structures import Point
@@ -137,9 +148,186 @@ _CHAR_CACHE: FastDictCache[Tuple[str, str], Char] = FastDictCache(
 Transparent = "[transparent]"
 
 
+class _CharIdTable(Dict[Tuple[str, str], int]):
+    """
+    Interns characters as small integers, so that a screen row can be stored
+    as an array of ids.
+
+    Maps the (char, style) that a `Char` is created with to its id. Every
+    distinct `Char` (after applying `Char.display_mappings`) gets exactly one
+    id, so two cells are equal if and only if their ids are equal.
+
+    Ids can't be released, because the screens of all applications hold on
+    to them, so the table is capped at `max_size` ids. (Telnet clients can
+    type every character there is, and every id costs about 450 bytes.)
+    Once the table is full, new characters are drawn as question marks of
+    the same width and style. (There are few of those, so they still get
+    ids of their own.)
+    """
+
+    max_size = 100 * 1000
+
+    def __init__(self) -> None:
+        super().__init__()
+        #: `Char` for every id.
+        self.chars: List[Char] = []
+        #: `Char.width` for every id.
+        self.widths: List[int] = []
+
+        # The blank characters always have ids of their own, also when the
+        # table fills up before they are drawn.
+        self[" ", Transparent]
+        self["", ""]
+
+    def __missing__(self, key: Tuple[str, str]) -> int:
+        char = _CHAR_CACHE[key]
+        canonical_key = (char.char, char.style)
+
+        if canonical_key != key and canonical_key in self:
+            char_id = self[canonical_key]
+        elif len(self.chars) >= self.max_size:
+            # (Not remembered, so the table doesn't grow.)
+            return self._fallback_id(char)
+        else:
+            char_id = self._add(canonical_key, char)
+
+        self[key] = char_id
+        return char_id
+
+    def _add(self, key: Tuple[str, str], char: Char) -> int:
+        char_id = len(self.chars)
+        self.chars.append(char)
+        self.widths.append(char.width)
+        dict.__setitem__(self, key, char_id)
+        return char_id
+
+    def _fallback_id(self, char: Char) -> int:
+        " Id of the question marks that `char` is drawn as. "
+        key = ("\uff1f" * (char.width // 2) + "?" * (char.width % 2), char.style)
+        char_id = self.get(key)
+        if char_id is None:
+            char_id = self._add(key, _CHAR_CACHE[key])
+        return char_id
+
+    def id_of(self, char: Char) -> int:
+        " Return the id of a `Char` instance. "
+        return self[char.char, char.style]
+
+
+_CHAR_IDS = _CharIdTable()
+
+
+class _StyleCharIds(Dict[int, int]):
+    """
+    Maps char ids to the ids of the same characters, with `prepend_style`
+    and `append_style` added to their style. (See `Screen.fill_area`.)
+    """
+
+    def __init__(self, prepend_style: str, append_style: str) -> None:
+        super().__init__()
+        self.prepend_style = prepend_style
+        self.append_style = append_style
+
+    def __missing__(self, char_id: int) -> int:
+        char = _CHAR_IDS.chars[char_id]
+        result = self[char_id] = _CHAR_IDS[
+            char.char, self.prepend_style + char.style + self.append_style
+        ]
+        return result
+
+
+_STYLE_CHAR_IDS_CACHE: FastDictCache[Tuple[str, str], _StyleCharIds] = FastDictCache(
+    _StyleCharIds, size=1000
+)
+
+
+class _RowView:
+    """
+    Dictionary-like view on one row of a `Screen`, mapping x positions to
+    `Char` instances. Columns that were never written read as the default
+    char.
+    """
+
+    def __init__(self, screen: "Screen", y: int) -> None:
+        self._screen = screen
+        self._y = y
+
+    def _ids(self) -> "array[int]":
+        return self._screen.rows.get(self._y, _EMPTY_ROW)
+
+    def __getitem__(self, x: int) -> Char:
+        ids = self._ids()
+        if 0 <= x < len(ids):
+            return _CHAR_IDS.chars[ids[x]]
+        return self._screen.default_char
+
+    def __setitem__(self, x: int, char: Char) -> None:
+        if x >= 0:
+            self._screen.get_row(self._y, x + 1)[x] = _CHAR_IDS.id_of(char)
+
+    def __contains__(self, x: object) -> bool:
+        return isinstance(x, int) and 0 <= x < len(self._ids())
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._ids())))
+
+    def __len__(self) -> int:
+        return len(self._ids())
+
+    def get(self, x: int, default: Optional[Char] = None) -> Optional[Char]:
+        return self[x] if x in self else default
+
+    def keys(self) -> Iterable[int]:
+        return range(len(self._ids()))
+
+    def values(self) -> List[Char]:
+        chars = _CHAR_IDS.chars
+        return [chars[i] for i in self._ids()]
+
+    def items(self) -> List[Tuple[int, Char]]:
+        return list(enumerate(self.values()))
+
+
+class _DataBufferView:
+    """
+    Dictionary-like view on all rows of a `Screen`: `data_buffer[y][x]` reads
+    and writes `Char` instances, like the nested dictionaries the screen used
+    to be made of.
+    """
+
+    def __init__(self, screen: "Screen") -> None:
+        self._screen = screen
+
+    def __getitem__(self, y: int) -> _RowView:
+        return _RowView(self._screen, y)
+
+    def __contains__(self, y: object) -> bool:
+        return y in self._screen.rows
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._screen.rows))
+
+    def __len__(self) -> int:
+        return len(self._screen.rows)
+
+    def keys(self) -> List[int]:
+        return list(self._screen.rows)
+
+    def items(self) -> List[Tuple[int, _RowView]]:
+        return [(y, _RowView(self._screen, y)) for y in self._screen.rows]
+
+
+_EMPTY_ROW = array("I")
+
+
 class Screen:
     """
     Two dimensional buffer of :class:`.Char` instances.
+
+    Every row is stored as an ``array('I')`` of interned char ids (see
+    `_CHAR_IDS`) in `rows`. Rows can be compared and copied with slices, and
+    take four bytes per cell. `data_buffer` gives dictionary-like access to
+    the `Char` instances for code that doesn't need to be fast.
     """
 
     def __init__(
@@ -154,9 +342,12 @@ class Screen:
         else:
             default_char2 = default_char
 
-        self.data_buffer: DefaultDict[int, DefaultDict[int, Char]] = defaultdict(
-            lambda: defaultdict(lambda: default_char2)
-        )
+        self.default_char = default_char2
+        self.default_char_id = _CHAR_IDS.id_of(default_char2)
+
+        #: Map y -> array of char ids. Rows are only as long as the rightmost
+        #: column written to them.
+        self.rows: Dict[int, "array[int]"] = {}
 
         #: Escape sequences to be injected.
         self.zero_width_escapes: DefaultDict[int, DefaultDict[int, str]] = defaultdict(
@@ -191,6 +382,32 @@ class Screen:
         # List of (z_index, draw_func)
         self._draw_float_functions: List[Tuple[int, Callable[[], None]]] = []
 
+    @property
+    def data_buffer(self) -> _DataBufferView:
+        """
+        Dictionary-like access to the characters: `data_buffer[y][x]` is the
+        `Char` at that position.
+        """
+        return _DataBufferView(self)
+
+    def get_row(self, y: int, min_length: int = 0) -> "array[int]":
+        """
+        Return the char ids of row `y`, extended with the default char to at
+        least `min_length` columns. (Writing to the array changes the screen.)
+        """
+        try:
+            row = self.rows[y]
+        except KeyError:
+            row = self.rows[y] = array("I", [self.default_char_id]) * min_length
+        else:
+            if len(row) < min_length:
+                row.extend(array("I", [self.default_char_id]) * (min_length - len(row)))
+        return row
+
+    def get_char(self, x: int, y: int) -> Char:
+        " Return the `Char` at this position. "
+        return self.data_buffer[y][x]
+
     def set_cursor_position(self, window: "Window", position: Point) -> None:
         """
         Set the cursor position for a given window.
@@ -253,14 +470,10 @@ class Screen:
         For all the characters in the screen.
         Set the style string to the given `style_str`.
         """
-        b = self.data_buffer
-        char_cache = _CHAR_CACHE
-
-        append_style = " " + style_str
+        restyle = _STYLE_CHAR_IDS_CACHE["", " " + style_str]
 
-        for y, row in b.items():
-            for x, char in row.items():
-                b[y][x] = char_cache[char.char, char.style + append_style]
+        for y, row in self.rows.items():
+            self.rows[y] = array("I", map(restyle.__getitem__, row))
 
     def fill_area(
         self, write_position: "WritePosition", style: str = "", after: bool = False
@@ -272,27 +485,24 @@ class Screen:
         if not style.strip():
             return
 
-        xmin = write_position.xpos
+        xmin = max(0, write_position.xpos)
         xmax = write_position.xpos + write_position.width
-        char_cache = _CHAR_CACHE
-        data_buffer = self.data_buffer
+        if xmax <= xmin:
+            return
 
         if after:
-            append_style = " " + style
-            prepend_style = ""
+            restyle = _STYLE_CHAR_IDS_CACHE["", " " + style]
         else:
-            append_style = ""
-            prepend_style = style + " "
+            restyle = _STYLE_CHAR_IDS_CACHE[style + " ", ""]
+
+        get_row = self.get_row
+        restyle_id = restyle.__getitem__
 
         for y in range(
             write_position.ypos, write_position.ypos + write_position.height
         ):
-            row = data_buffer[y]
-            for x in range(xmin, xmax):
-                cell = row[x]
-                row[x] = char_cache[
-                    cell.char, prepend_style + cell.style + append_style
-                ]
+            row = get_row(y, xmax)
+            row[xmin:xmax] = array("I", map(restyle_id, row[xmin:xmax]))
 
 
 class WritePosition:
@@ -1,4 +1,4 @@
-from .base import DummyOutput, Output
+from .base import DummyOutput, GridCell, GridOutput, Output
 from .color_depth import ColorDepth
 from .defaults import create_output
 
@@ -6,6 +6,8 @@ __all__ = [
     # Base.
     "Output",
     "DummyOutput",
+    "GridCell",
+    "GridOutput",
     # Color depth.
     "ColorDepth",
     # Defaults.
@@ -1,16 +1,21 @@
 """
 Interface for an output.
 """
+import re
 from abc import ABCMeta, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
-from prompt_toolkit.data_structures import Size
+from prompt_toolkit.data_structures import Point, Size
 from prompt_toolkit.styles import Attrs
+from prompt_toolkit.utils import get_cwidth
 
 from .color_depth import ColorDepth
 
 __all__ = [
     "Output",
     "DummyOutput",
+    "GridCell",
+    "GridOutput",
 ]
 
 
@@ -57,6 +62,25 @@ class Output(metaclass=ABCMeta):
     def flush(self) -> None:
         " Write to output stream and flush. "
 
+    def begin_frame(self) -> None:
+        """
+        Start a frame. Until the matching :meth:`end_frame`, `flush` keeps
+        everything buffered, so that the whole frame is written at once.
+        (Frames can be nested, only the outermost one counts.)
+        """
+
+    def end_frame(self) -> None:
+        " Finish the frame started by :meth:`begin_frame` and flush it. "
+
+    def is_backlogged(self) -> bool:
+        """
+        True while earlier output is still waiting to be sent, e.g. to a slow
+        network client. Applications don't render while their output is
+        backlogged. (So, when it isn't anymore, the application has to be
+        invalidated, to render the latest state.)
+        """
+        return False
+
     @abstractmethod
     def erase_screen(self) -> None:
         """
@@ -163,6 +187,15 @@ class Output(metaclass=ABCMeta):
         " For Windows only. "
         raise NotImplementedError
 
+    def scroll_region(self, top: int, bottom: int, amount: int) -> None:
+        """
+        Scroll the rows from `top` up to (not including) `bottom` up by
+        `amount` rows, or down when `amount` is negative. The rows that come
+        in are erased, and the cursor moves to the top left of the screen.
+        (For vt100 only.)
+        """
+        raise NotImplementedError
+
 
 class DummyOutput(Output):
     """
@@ -191,6 +224,12 @@ class DummyOutput(Output):
     def flush(self) -> None:
         pass
 
+    def begin_frame(self) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
+
     def erase_screen(self) -> None:
         pass
 
@@ -265,3 +304,346 @@ class DummyOutput(Output):
 
     def get_rows_below_cursor_position(self) -> int:
         return 40
+
+    def scroll_region(self, top: int, bottom: int, amount: int) -> None:
+        pass
+
+
+class GridCell(NamedTuple):
+    """
+    One cell of a :class:`.GridOutput`.
+
+    `style` holds the SGR parameters that were active when the character was
+    written, e.g. ``("1", "38;5;208")``. The cell to the right of a double
+    width character holds an empty string.
+    """
+
+    char: str
+    style: Tuple[str, ...]
+
+
+_BLANK_CELL = GridCell(" ", ())
+
+# Control sequences, OSC strings (e.g. the title), other escape sequences,
+# runs of printable text and single control characters.
+_VT100_TOKEN_RE = re.compile(
+    r"\x1b\[([0-9;?]*)([@-~])"
+    r"|\x1b\]([^\x07]*)\x07"
+    r"|(\x1b.?)"
+    r"|([^\x00-\x1f\x7f]+)"
+    r"|(.)",
+    re.DOTALL,
+)
+
+# Final bytes of the control sequences that move the cursor.
+_CURSOR_MOVES = set("ABCDEFGHdf")
+
+# SGR parameters that turn off other parameters.
+_SGR_OFF = {22: (1, 2), 23: (3,), 24: (4,), 25: (5, 6), 27: (7,), 28: (8,), 29: (9,)}
+
+
+class _GridStdout:
+    """
+    The `stdout` of the :class:`.Vt100_Output` in a :class:`.GridOutput`.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, grid_output: "GridOutput") -> None:
+        self.grid_output = grid_output
+
+    def write(self, data: bytes) -> None:
+        self.grid_output.feed(data)
+
+    def flush(self) -> None:
+        self.grid_output.flushes += 1
+
+
+class GridOutput:
+    """
+    Output that keeps a virtual terminal instead of writing to one.
+
+    All output goes through a :class:`~prompt_toolkit.output.vt100.Vt100_Output`,
+    and everything it flushes is interpreted into a grid of
+    :class:`.GridCell`. This way the screens of an application can be checked
+    without a TTY, and the cost of rendering them can be measured in bytes
+    and escape sequences instead of only in time.
+
+    :param size: The (fixed) size of the terminal.
+    :param term: The terminal environment variable, passed to `Vt100_Output`.
+
+    Counters, which :meth:`reset_counters` sets back to zero:
+
+    - `bytes_written`: Bytes of (utf-8) output.
+    - `escape_sequences`: Escape sequences in the output.
+    - `cursor_moves`: Cursor movements, counting the control sequences that
+      move the cursor as well as carriage returns, line feeds and backspaces.
+    - `flushes`: Flushes that wrote anything.
+    """
+
+    def __init__(
+        self, size: Size = Size(rows=24, columns=80), term: Optional[str] = None
+    ) -> None:
+        from .vt100 import Vt100_Output
+
+        self.size = size
+        self.vt100_output = Vt100_Output(
+            _GridStdout(self), lambda: self.size, term=term  # type: ignore
+        )
+
+        self.title = ""
+        self.modes: Set[str] = set()
+        self.cells = self._blank_cells()
+        self._cursor_x = 0
+        self._cursor_y = 0
+        self._pending_wrap = False
+        self._autowrap = True
+        self._scroll_top = 0
+        self._scroll_bottom = size.rows - 1
+        self._sgr: Dict[int, str] = {}
+        self._style: Tuple[str, ...] = ()
+        self._main_screen: Optional[Tuple[List[List[GridCell]], int, int]] = None
+
+        self.reset_counters()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.vt100_output, name)
+
+    def fileno(self) -> int:
+        " There is no sensible default for fileno(). "
+        raise NotImplementedError
+
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def get_size(self) -> Size:
+        return self.size
+
+    def reset_counters(self) -> None:
+        self.bytes_written = 0
+        self.escape_sequences = 0
+        self.cursor_moves = 0
+        self.flushes = 0
+
+    @property
+    def cursor_position(self) -> Point:
+        return Point(x=min(self._cursor_x, self.size.columns - 1), y=self._cursor_y)
+
+    @property
+    def display(self) -> List[str]:
+        " The text of every row of the grid. "
+        return ["".join(cell.char for cell in row) for row in self.cells]
+
+    def _blank_cells(self) -> List[List[GridCell]]:
+        return [self._blank_row() for _ in range(self.size.rows)]
+
+    def _blank_row(self) -> List[GridCell]:
+        return [_BLANK_CELL] * self.size.columns
+
+    def feed(self, data: bytes) -> None:
+        " Interpret `data`, as written by the `Vt100_Output`. "
+        self.bytes_written += len(data)
+
+        for match in _VT100_TOKEN_RE.finditer(data.decode("utf-8", "replace")):
+            params, final, osc, escape, text, control = match.groups()
+
+            if text is not None:
+                self._draw_text(text)
+            elif final is not None:
+                self.escape_sequences += 1
+                self._control_sequence(params, final)
+            elif osc is not None:
+                self.escape_sequences += 1
+                if osc.startswith(("0;", "2;")):
+                    self.title = osc[2:]
+            elif escape is not None:
+                self.escape_sequences += 1
+            else:
+                self._control_character(control)
+
+    def _draw_text(self, text: str) -> None:
+        columns = self.size.columns
+
+        for char in text:
+            width = get_cwidth(char)
+
+            if width == 0:
+                # Combining character, add it to the previous cell.
+                x = min(self._cursor_x, columns) - 1
+                if x >= 0:
+                    row = self.cells[self._cursor_y]
+                    row[x] = GridCell(row[x].char + char, row[x].style)
+                continue
+
+            if self._pending_wrap or self._cursor_x + width > columns:
+                if self._autowrap:
+                    self._cursor_x = 0
+                    self._line_feed()
+                else:
+                    self._cursor_x = columns - width
+                self._pending_wrap = False
+
+            row = self.cells[self._cursor_y]
+            row[self._cursor_x] = GridCell(char, self._style)
+            if width == 2:
+                row[self._cursor_x + 1] = GridCell("", self._style)
+
+            self._cursor_x += width
+            if self._cursor_x >= columns:
+                self._cursor_x = columns - 1
+                self._pending_wrap = True
+
+    def _control_character(self, char: str) -> None:
+        if char in "\r\n\b":
+            self.cursor_moves += 1
+        self._pending_wrap = False
+
+        if char == "\r":
+            self._cursor_x = 0
+        elif char == "\n":
+            self._line_feed()
+        elif char == "\b":
+            self._cursor_x = max(0, self._cursor_x - 1)
+        elif char == "\t":
+            self._cursor_x = min(self.size.columns - 1, (self._cursor_x // 8 + 1) * 8)
+
+    def _line_feed(self) -> None:
+        if self._cursor_y == self._scroll_bottom:
+            self._scroll(1)
+        elif self._cursor_y < self.size.rows - 1:
+            self._cursor_y += 1
+
+    def _scroll(self, amount: int) -> None:
+        " Scroll the scrolling region up by `amount` rows, or down when negative. "
+        top, bottom = self._scroll_top, self._scroll_bottom
+        for _ in range(min(abs(amount), bottom - top + 1)):
+            if amount > 0:
+                del self.cells[top]
+                self.cells.insert(bottom, self._blank_row())
+            else:
+                del self.cells[bottom]
+                self.cells.insert(top, self._blank_row())
+
+    def _control_sequence(self, params: str, final: str) -> None:
+        if final in _CURSOR_MOVES:
+            self.cursor_moves += 1
+        self._pending_wrap = False
+
+        if params.startswith("?"):
+            self._set_modes(params[1:].split(";"), final)
+            return
+
+        numbers = [int(p) if p else 0 for p in params.split(";")]
+        amount = numbers[0] or 1
+        rows, columns = self.size.rows, self.size.columns
+
+        if final == "m":
+            self._select_graphic_rendition(numbers)
+        elif final == "A":
+            self._cursor_y = max(0, self._cursor_y - amount)
+        elif final == "B":
+            self._cursor_y = min(rows - 1, self._cursor_y + amount)
+        elif final == "C":
+            self._cursor_x = min(columns - 1, self._cursor_x + amount)
+        elif final == "D":
+            self._cursor_x = max(0, self._cursor_x - amount)
+        elif final in "Hf":
+            row = numbers[0] if numbers[0] else 1
+            column = numbers[1] if len(numbers) > 1 and numbers[1] else 1
+            self._cursor_y = min(rows, row) - 1
+            self._cursor_x = min(columns, column) - 1
+        elif final == "G":
+            self._cursor_x = min(columns, amount) - 1
+        elif final == "d":
+            self._cursor_y = min(rows, amount) - 1
+        elif final == "K":
+            self._erase_in_line(numbers[0])
+        elif final == "J":
+            self._erase_in_display(numbers[0])
+        elif final == "r":
+            top = numbers[0] if numbers[0] else 1
+            bottom = numbers[1] if len(numbers) > 1 and numbers[1] else rows
+            self._scroll_top = min(rows, top) - 1
+            self._scroll_bottom = min(rows, bottom) - 1
+            self._cursor_x = self._cursor_y = 0
+        elif final == "S":
+            self._scroll(amount)
+        elif final == "T":
+            self._scroll(-amount)
+
+    def _erase_cells(self, y: int, start: int, end: int) -> None:
+        # Erased cells get the current background color.
+        cell = GridCell(" ", (self._sgr[48],) if 48 in self._sgr else ())
+        self.cells[y][start:end] = [cell] * (end - start)
+
+    def _erase_in_line(self, mode: int) -> None:
+        columns = self.size.columns
+        if mode == 0:
+            self._erase_cells(self._cursor_y, self._cursor_x, columns)
+        elif mode == 1:
+            self._erase_cells(self._cursor_y, 0, self._cursor_x + 1)
+        elif mode == 2:
+            self._erase_cells(self._cursor_y, 0, columns)
+
+    def _erase_in_display(self, mode: int) -> None:
+        if mode == 0:
+            self._erase_in_line(0)
+            rows = range(self._cursor_y + 1, self.size.rows)
+        elif mode == 1:
+            self._erase_in_line(1)
+            rows = range(0, self._cursor_y)
+        else:
+            rows = range(self.size.rows)
+
+        for y in rows:
+            self._erase_cells(y, 0, self.size.columns)
+
+    def _set_modes(self, modes: List[str], final: str) -> None:
+        for mode in modes:
+            if final == "h":
+                if mode == "1049" and self._main_screen is None:
+                    self._main_screen = (self.cells, self._cursor_x, self._cursor_y)
+                    self.cells = self._blank_cells()
+                self.modes.add(mode)
+            elif final == "l":
+                if mode == "1049" and self._main_screen is not None:
+                    self.cells, self._cursor_x, self._cursor_y = self._main_screen
+                    self._main_screen = None
+                self.modes.discard(mode)
+
+            if mode == "7":
+                self._autowrap = final == "h"
+
+    def _select_graphic_rendition(self, numbers: List[int]) -> None:
+        sgr = self._sgr
+        i = 0
+
+        while i < len(numbers):
+            n = numbers[i]
+
+            if n == 0:
+                sgr.clear()
+            elif 1 <= n <= 9:
+                sgr[n] = str(n)
+            elif n in _SGR_OFF:
+                for off in _SGR_OFF[n]:
+                    sgr.pop(off, None)
+            elif 30 <= n <= 37 or 90 <= n <= 97:
+                sgr[38] = str(n)
+            elif 40 <= n <= 47 or 100 <= n <= 107:
+                sgr[48] = str(n)
+            elif n == 39:
+                sgr.pop(38, None)
+            elif n == 49:
+                sgr.pop(48, None)
+            elif n in (38, 48) and i + 1 < len(numbers):
+                count = 3 if numbers[i + 1] == 5 else 5
+                sgr[n] = ";".join(str(p) for p in numbers[i : i + count])
+                i += count - 1
+
+            i += 1
+
+        self._style = tuple(value for (_, value) in sorted(sgr.items()))
+
+
+Output.register(GridOutput)
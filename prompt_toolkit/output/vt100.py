@@ -315,6 +315,16 @@ class _EscapeCodeCache(Dict[Attrs, str]):
         """
         Return a tuple with the vt100 values  that represent this color.
         """
+        fg_codes, bg_codes = self.color_codes(fg_color, bg_color)
+        return fg_codes + bg_codes
+
+    def color_codes(
+        self, fg_color: str, bg_color: str
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Return the vt100 values for the foreground and for the background
+        color separately. (Empty lists for the default colors.)
+        """
         # When requesting ANSI colors only, and both fg/bg color were converted
         # to ANSI, ensure that the foreground and background color are not the
         # same. (Unless they were explicitly defined to be the same color.)
@@ -362,11 +372,84 @@ class _EscapeCodeCache(Dict[Attrs, str]):
                 else:
                     return [(48 if bg else 38), 5, _256_colors[rgb]]
 
-        result: List[int] = []
-        result.extend(get(fg_color, False))
-        result.extend(get(bg_color, True))
+        fg_result = [str(code) for code in get(fg_color, False)]
+        bg_result = [str(code) for code in get(bg_color, True)]
+
+        return fg_result, bg_result
+
+
+#: Attrs of a terminal after an SGR reset.
+_RESET_ATTRS = Attrs(
+    color="",
+    bgcolor="",
+    bold=False,
+    underline=False,
+    italic=False,
+    blink=False,
+    reverse=False,
+    hidden=False,
+)
+
+
+class _SgrTransitionCache(Dict[Tuple[Attrs, Attrs], str]):
+    """
+    Cache for the shortest escape code that changes the terminal from one
+    `Attrs` to another. It maps (previous attrs, next attrs) tuples to VT100
+    escape sequences.
+
+    Only the colors and attributes that change are sent. When an attribute
+    has to be turned off, this falls back to the full escape code of the
+    next attrs, which starts with a reset.
+
+    :param escape_code_cache: :class:`._EscapeCodeCache` for the same color
+        depth.
+    """
+
+    _flags = (
+        ("bold", "1"),
+        ("italic", "3"),
+        ("blink", "5"),
+        ("underline", "4"),
+        ("reverse", "7"),
+        ("hidden", "8"),
+    )
+
+    def __init__(self, escape_code_cache: _EscapeCodeCache) -> None:
+        self.escape_code_cache = escape_code_cache
+
+    def __missing__(self, key: Tuple[Attrs, Attrs]) -> str:
+        previous, attrs = key
+        parts: List[str] = []
+
+        for name, code in self._flags:
+            if getattr(attrs, name):
+                if not getattr(previous, name):
+                    parts.append(code)
+            elif getattr(previous, name):
+                result = self.escape_code_cache[attrs]
+                break
+        else:
+            color_codes = self.escape_code_cache.color_codes
+            previous_fg, previous_bg = color_codes(
+                previous.color or "", previous.bgcolor or ""
+            )
+            fg, bg = color_codes(attrs.color or "", attrs.bgcolor or "")
+
+            color_parts: List[str] = []
+            if fg != previous_fg:
+                color_parts.extend(fg or ["39"])
+            if bg != previous_bg:
+                color_parts.extend(bg or ["49"])
+
+            parts = color_parts + parts
+            result = "\x1b[" + ";".join(parts) + "m" if parts else ""
 
-        return map(str, result)
+            # (Not likely, but never send more than the full escape code.)
+            if len(result) > len(self.escape_code_cache[attrs]):
+                result = self.escape_code_cache[attrs]
+
+        self[key] = result
+        return result
 
 
 def _get_size(fileno: int) -> Tuple[int, int]:
@@ -403,6 +486,9 @@ class Vt100_Output(Output):
     :param term: The terminal environment variable. (xterm, xterm-256color, linux, ...)
     :param write_binary: Encode the output before writing it. If `True` (the
         default), the `stdout` object is supposed to expose an `encoding` attribute.
+    :param synchronized_output: Wrap every frame in a synchronized update
+        (DEC private mode 2026), so that terminals which support it show the
+        whole frame at once. Other terminals ignore it.
     """
 
     # For the error messages. Only display "Output is not a terminal" once per
@@ -415,6 +501,7 @@ class Vt100_Output(Output):
         get_size: Callable[[], Size],
         term: Optional[str] = None,
         write_binary: bool = True,
+        synchronized_output: bool = False,
     ) -> None:
 
         assert all(hasattr(stdout, a) for a in ("write", "flush"))
@@ -425,9 +512,13 @@ class Vt100_Output(Output):
         self._buffer: List[str] = []
         self.stdout = stdout
         self.write_binary = write_binary
+        self.synchronized_output = synchronized_output
         self._get_size = get_size
         self.term = term or "xterm"
 
+        # Number of frames started with `begin_frame` and not ended yet.
+        self._frame_depth = 0
+
         # Cache for escape codes.
         self._escape_code_caches: Dict[ColorDepth, _EscapeCodeCache] = {
             ColorDepth.DEPTH_1_BIT: _EscapeCodeCache(ColorDepth.DEPTH_1_BIT),
@@ -436,6 +527,17 @@ class Vt100_Output(Output):
             ColorDepth.DEPTH_24_BIT: _EscapeCodeCache(ColorDepth.DEPTH_24_BIT),
         }
 
+        # Cache for the escape codes that go from one style to another.
+        self._sgr_transition_caches: Dict[ColorDepth, _SgrTransitionCache] = {
+            depth: _SgrTransitionCache(cache)
+            for depth, cache in self._escape_code_caches.items()
+        }
+
+        # The attributes that are currently set in the terminal, when known.
+        # (Only within the output of one flush, because anything else that
+        # writes to the terminal in between can change them.)
+        self._current_attrs: Optional[Attrs] = None
+
     @classmethod
     def from_pty(cls, stdout: TextIO, term: Optional[str] = None) -> "Vt100_Output":
         """
@@ -554,20 +656,46 @@ class Vt100_Output(Output):
         """
         self.write_raw("\x1b[J")
 
+    def scroll_region(self, top: int, bottom: int, amount: int) -> None:
+        """
+        Scroll the rows from `top` up to (not including) `bottom`, by setting
+        the scrolling region (DECSTBM), scrolling up (SU) or down (SD) and
+        resetting the scrolling region again.
+        """
+        self.write_raw("\x1b[%i;%ir" % (top + 1, bottom))
+
+        if amount > 0:
+            self.write_raw("\x1b[%iS" % amount)
+        elif amount < 0:
+            self.write_raw("\x1b[%iT" % -amount)
+
+        self.write_raw("\x1b[r")
+
     def reset_attributes(self) -> None:
         self.write_raw("\x1b[0m")
+        self._current_attrs = _RESET_ATTRS
 
     def set_attributes(self, attrs: Attrs, color_depth: ColorDepth) -> None:
         """
         Create new style and output.
 
+        When the attributes that are set in the terminal are known, only
+        the ones that change are sent.
+
         :param attrs: `Attrs` instance.
         """
-        # Get current depth.
-        escape_code_cache = self._escape_code_caches[color_depth]
+        if self._current_attrs is None:
+            # Get current depth.
+            escape_code_cache = self._escape_code_caches[color_depth]
+
+            # Write escape character.
+            self.write_raw(escape_code_cache[attrs])
+        else:
+            self.write_raw(
+                self._sgr_transition_caches[color_depth][self._current_attrs, attrs]
+            )
 
-        # Write escape character.
-        self.write_raw(escape_code_cache[attrs])
+        self._current_attrs = attrs
 
     def disable_autowrap(self) -> None:
         self.write_raw("\x1b[?7l")
@@ -627,10 +755,28 @@ class Vt100_Output(Output):
     def show_cursor(self) -> None:
         self.write_raw("\x1b[?12l\x1b[?25h")  # Stop blinking cursor and show.
 
+    def begin_frame(self) -> None:
+        self._frame_depth += 1
+
+    def end_frame(self) -> None:
+        self._frame_depth -= 1
+
+        if self._frame_depth == 0:
+            if self._buffer and self.synchronized_output:
+                self._buffer.insert(0, "\x1b[?2026h")
+                self._buffer.append("\x1b[?2026l")
+            self.flush()
+
     def flush(self) -> None:
         """
         Write to output stream and flush.
+        (Within a frame, this waits for the end of the frame.)
         """
+        if self._frame_depth:
+            return
+
+        self._current_attrs = None
+
         if not self._buffer:
             return
 
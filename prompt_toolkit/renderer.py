@@ -2,10 +2,24 @@
 Renders the command line on the console.
 (Redraws parts of the input line that were changed.)
 """
+from array import array
 from asyncio import FIRST_COMPLETED, Future, sleep, wait
 from collections import deque
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+from operator import eq
+from threading import Lock
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.data_structures import Point, Size
@@ -13,7 +27,7 @@ from prompt_toolkit.filters import FilterOrBool, to_filter
 from prompt_toolkit.formatted_text import AnyFormattedText, to_formatted_text
 from prompt_toolkit.input.base import Input
 from prompt_toolkit.layout.mouse_handlers import MouseHandlers
-from prompt_toolkit.layout.screen import Char, Screen, WritePosition
+from prompt_toolkit.layout.screen import _CHAR_IDS, Screen, WritePosition
 from prompt_toolkit.output import ColorDepth, Output
 from prompt_toolkit.styles import (
     Attrs,
@@ -25,6 +39,7 @@ from prompt_toolkit.utils import is_windows
 
 if TYPE_CHECKING:
     from prompt_toolkit.application import Application
+    from prompt_toolkit.layout.containers import Window
     from prompt_toolkit.layout.layout import Layout
 
 
@@ -34,6 +49,275 @@ __all__ = [
 ]
 
 
+def _changed_columns(
+    new_row: "array[int]", previous_row: "array[int]", length: int
+) -> Tuple[int, int]:
+    """
+    Return the first and the last column (before `length`) in which the two
+    rows of char ids differ. `(length, length - 1)` when there are none.
+
+    Both rows need to have at least `length` columns. The span is found by
+    bisecting on slice comparisons, which run in C.
+    """
+    if new_row[:length] == previous_row[:length]:
+        return length, length - 1
+
+    # Longest common prefix.
+    same, different = 0, length
+    while different - same > 1:
+        middle = (same + different) // 2
+        if new_row[:middle] == previous_row[:middle]:
+            same = middle
+        else:
+            different = middle
+    first = same
+
+    # Longest common suffix.
+    same, different = 0, length - first
+    while different - same > 1:
+        middle = (same + different) // 2
+        if new_row[length - middle : length] == previous_row[length - middle : length]:
+            same = middle
+        else:
+            different = middle
+    last = length - 1 - same
+
+    # Never start in the middle of a double width character.
+    if first > 0 and _CHAR_IDS.widths[new_row[first - 1]] > 1:
+        first -= 1
+
+    return first, last
+
+
+def _padded_row(row: "array[int]", length: int, char_id: int) -> "array[int]":
+    " Return `row`, extended with `char_id` to at least `length` columns. "
+    if len(row) < length:
+        return row + array("I", [char_id]) * (length - len(row))
+    return row
+
+
+def _cursor_move_size(amount: int, backward: bool = False) -> int:
+    " Size in bytes of a relative VT100 cursor movement of `amount` cells. "
+    if amount == 0:
+        return 0
+    elif amount == 1:
+        return 1 if backward else 3  # '\b' or '\x1b[C'.
+    else:
+        return 3 + len(str(amount))
+
+
+def _plan_cursor_move(
+    current: Point, new: Point, width: int, height: int, full_screen_moves: bool
+) -> Tuple[str, int, int]:
+    """
+    Choose how to move the cursor from `current` to `new`. Return a
+    (plan, size, relative_size) tuple, where `size` is the size in bytes of
+    the plan on a VT100 terminal, and `relative_size` the size of the
+    `"newline"` or `"relative"` moves that the renderer always used to make.
+
+    Plans:
+
+    - `"newline"`: reset the attributes, newlines, then forward. (Needed to
+      go down when the output is not full screen, because that can add
+      lines at the bottom.)
+    - `"relative"`: up or down, then back or forward.
+    - `"return"`: up or down, then a carriage return and forward.
+    - `"absolute"`: move to the absolute position.
+
+    :param full_screen_moves: Allow moving down without newlines, and absolute
+        moves. (Only when the top left of the screen is at (0, 0).)
+    """
+    dx = new.x - current.x
+    dy = new.y - current.y
+
+    # After writing to the last column, the terminal can be in a pending wrap
+    # state, where horizontal movements are not reliable.
+    at_edge = current.x >= width - 1
+
+    if dy < 0:
+        vertical_size = _cursor_move_size(-dy)
+    else:
+        vertical_size = _cursor_move_size(dy)
+
+    if dx < 0:
+        horizontal_size = _cursor_move_size(-dx, backward=True)
+    else:
+        horizontal_size = _cursor_move_size(dx)
+
+    return_size = vertical_size + 1 + _cursor_move_size(new.x)
+
+    if dy > 0:
+        newline_size = len("\x1b[0m") + 2 * dy + _cursor_move_size(new.x)
+        plans = [("newline", newline_size)]
+        relative_size = newline_size
+    elif at_edge:
+        plans = [("return", return_size)]
+        relative_size = return_size
+    else:
+        relative_size = vertical_size + horizontal_size
+        plans = [("relative", relative_size), ("return", return_size)]
+
+    if full_screen_moves and new.y < height:
+        if dy > 0:
+            if not at_edge:
+                plans.append(("relative", vertical_size + horizontal_size))
+            plans.append(("return", return_size))
+
+        plans.append(
+            ("absolute", len("\x1b[;H") + len(str(new.y + 1)) + len(str(new.x + 1)))
+        )
+
+    # (The first of the smallest plans, so that the old moves are used when
+    # nothing is shorter.)
+    plan, size = min(plans, key=lambda plan: plan[1])
+    return plan, size, relative_size
+
+
+def _window_regions(screen: Screen) -> Dict["Window", Tuple[int, int, int, int, int]]:
+    """
+    Return the (xpos, ypos, width, height, vertical_scroll) of the content of
+    every window that was drawn on this screen. (Without margins.)
+    """
+    regions = {}
+
+    for window in screen.visible_windows:
+        info = window.render_info
+        if info is not None:
+            regions[window] = (
+                info._x_offset,
+                info._y_offset,
+                info.window_width,
+                info.window_height,
+                info.vertical_scroll,
+            )
+
+    return regions
+
+
+def _find_shift(
+    new_rows: List["array[int]"], previous_rows: List["array[int]"]
+) -> int:
+    """
+    Return by how many rows the content of `previous_rows` was shifted up to
+    get `new_rows` (negative when shifted down), or 0 when it wasn't. That's
+    the shift that gets the most rows right. (Not always all of them, because
+    the style of a row can depend on its position, like the last line of a
+    window.)
+    """
+    height = len(new_rows)
+    best_amount, best_rows = 0, 0
+
+    for amount in range(1, height):
+        for shift, rows in (
+            (amount, sum(map(eq, new_rows[: height - amount], previous_rows[amount:]))),
+            (-amount, sum(map(eq, new_rows[amount:], previous_rows[: height - amount]))),
+        ):
+            if rows > best_rows:
+                best_amount, best_rows = shift, rows
+
+        # Larger shifts can't get more rows right.
+        if height - amount <= best_rows:
+            break
+
+    return best_amount
+
+
+def _changed_cells(new_row: "array[int]", previous_row: "array[int]") -> int:
+    " Number of cells from the first to the last one that changed. "
+    length = min(len(new_row), len(previous_row))
+    first, last = _changed_columns(new_row, previous_row, length)
+    return last - first + 1 + abs(len(new_row) - len(previous_row))
+
+
+# Bytes to hide the cursor, set a scrolling region, scroll and reset the
+# region, plus moving the cursor back.
+_SCROLL_REGION_COST = 30
+
+
+def _scroll_regions(
+    output: Output,
+    screen: Screen,
+    previous_screen: Screen,
+    regions: Dict["Window", Tuple[int, int, int, int, int]],
+    previous_regions: Dict["Window", Tuple[int, int, int, int, int]],
+    height: int,
+) -> bool:
+    """
+    Let the terminal shift the rows of the windows that scrolled since the
+    previous screen, using scrolling regions, and shift the rows of
+    `previous_screen` the same way. The screen diff then only has to draw the
+    rows that came in. Return True when anything was scrolled. (That resets
+    the attributes and moves the cursor to the top left.)
+
+    Whole rows are shifted, so anything next to the window is shifted as
+    well. The diff repairs that, but it's only done when it saves cells.
+    """
+    empty_row = array("I")
+    scrolled = False
+
+    for window, region in regions.items():
+        previous_region = previous_regions.get(window)
+
+        # Only windows that stayed at the same place but scrolled.
+        if (
+            previous_region is None
+            or previous_region[:4] != region[:4]
+            or previous_region[4] == region[4]
+        ):
+            continue
+
+        xpos, ypos, width, window_height, _ = region
+        if ypos < 0 or ypos + window_height > height or window_height < 2:
+            continue
+
+        new_rows = [
+            screen.rows.get(y, empty_row)[xpos : xpos + width]
+            for y in range(ypos, ypos + window_height)
+        ]
+        previous_rows = [
+            previous_screen.rows.get(y, empty_row)[xpos : xpos + width]
+            for y in range(ypos, ypos + window_height)
+        ]
+
+        amount = _find_shift(new_rows, previous_rows)
+        if not amount:
+            continue
+
+        # Scroll when that leaves a lot fewer cells to draw. (Whole rows are
+        # shifted, including margins like the scrollbar, which can change.
+        # Rows that come in are drawn from scratch, with all their style
+        # changes, so count their cells double.)
+        rows = previous_screen.rows
+        new_full_rows = [
+            screen.rows.get(y, empty_row) for y in range(ypos, ypos + window_height)
+        ]
+        previous_full_rows = [
+            rows.get(y, empty_row) for y in range(ypos, ypos + window_height)
+        ]
+        if amount > 0:
+            shifted_rows = previous_full_rows[amount:] + [empty_row] * amount
+        else:
+            shifted_rows = [empty_row] * -amount + previous_full_rows[:amount]
+
+        if _SCROLL_REGION_COST + 2 * sum(
+            map(_changed_cells, new_full_rows, shifted_rows)
+        ) >= sum(map(_changed_cells, new_full_rows, previous_full_rows)):
+            continue
+
+        if not scrolled:
+            # Rows that come in take the background of the current attributes.
+            output.hide_cursor()
+            output.reset_attributes()
+            scrolled = True
+
+        output.scroll_region(ypos, ypos + window_height, amount)
+
+        for y, row in enumerate(shifted_rows, ypos):
+            rows[y] = row
+
+    return scrolled
+
+
 def _output_screen_diff(
     app: "Application[Any]",
     output: Output,
@@ -47,7 +331,7 @@ def _output_screen_diff(
     attrs_for_style_string: "_StyleStringToAttrsCache",
     size: Size,
     previous_width: int,
-) -> Tuple[Point, Optional[str]]:
+) -> Tuple[Point, Optional[str], int]:
     """
     Render the diff between this screen and the previous screen.
 
@@ -79,8 +363,19 @@ def _output_screen_diff(
     _output_reset_attributes = output.reset_attributes
     _output_cursor_forward = output.cursor_forward
     _output_cursor_up = output.cursor_up
+    _output_cursor_down = output.cursor_down
+    _output_cursor_goto = output.cursor_goto
     _output_cursor_backward = output.cursor_backward
 
+    # In full screen mode, the top left of the screen is at (0, 0) of the
+    # terminal, so the cursor can also move down without newlines, and to
+    # absolute positions. (Not on Windows, where the console buffer can be
+    # larger than the screen.)
+    full_screen_moves = full_screen and not is_windows()
+
+    # Bytes saved by moving the cursor in fewer bytes than relative moves.
+    cursor_bytes_saved = 0
+
     # Hide cursor before rendering. (Avoid flickering.)
     output.hide_cursor()
 
@@ -91,53 +386,71 @@ def _output_screen_diff(
         last_style = None  # Forget last char after resetting attributes.
 
     def move_cursor(new: Point) -> Point:
-        " Move cursor to this `new` point. Returns the given Point. "
+        """
+        Move cursor to this `new` point, using the movements that take the
+        fewest bytes. Returns the given Point.
+        """
+        nonlocal cursor_bytes_saved
         current_x, current_y = current_pos.x, current_pos.y
 
-        if new.y > current_y:
+        if new == current_pos and current_x < width - 1:
+            return new
+
+        plan, size, relative_size = _plan_cursor_move(
+            current_pos, new, width, height, full_screen_moves
+        )
+        cursor_bytes_saved += relative_size - size
+
+        if plan == "newline":
             # Use newlines instead of CURSOR_DOWN, because this might add new lines.
             # CURSOR_DOWN will never create new lines at the bottom.
             # Also reset attributes, otherwise the newline could draw a
             # background color.
             reset_attributes()
             write("\r\n" * (new.y - current_y))
-            current_x = 0
             _output_cursor_forward(new.x)
             return new
-        elif new.y < current_y:
+
+        if plan == "absolute":
+            _output_cursor_goto(new.y + 1, new.x + 1)
+            return new
+
+        if new.y < current_y:
             _output_cursor_up(current_y - new.y)
+        elif new.y > current_y:
+            _output_cursor_down(new.y - current_y)
 
-        if current_x >= width - 1:
+        if plan == "return":
             write("\r")
             _output_cursor_forward(new.x)
-        elif new.x < current_x or current_x >= width - 1:
+        elif new.x < current_x:
             _output_cursor_backward(current_x - new.x)
         elif new.x > current_x:
             _output_cursor_forward(new.x - current_x)
 
         return new
 
-    def output_char(char: Char) -> None:
+    def output_text(text: str, style: str) -> None:
         """
-        Write the output of this character.
+        Write the output of a run of characters that have the same style.
         """
         nonlocal last_style
 
         # If the last printed character has the same style, don't output the
         # style again.
-        if last_style == char.style:
-            write(char.char)
+        if last_style == style:
+            write(text)
         else:
             # Look up `Attr` for this style string. Only set attributes if different.
             # (Two style strings can still have the same formatting.)
             # Note that an empty style string can have formatting that needs to
             # be applied, because of style transformations.
-            new_attrs = attrs_for_style_string[char.style]
+            new_attrs = attrs_for_style_string[style]
             if not last_style or new_attrs != attrs_for_style_string[last_style]:
                 _output_set_attributes(new_attrs, color_depth)
 
-            write(char.char)
-            last_style = char.style
+            write(text)
+            last_style = style
 
     # Render for the first time: reset styling.
     if not previous_screen:
@@ -162,7 +475,7 @@ def _output_screen_diff(
         previous_screen = Screen()
 
     # Get height of the screen.
-    # (height changes as we loop over data_buffer, so remember the current value.)
+    # (height changes as we loop over the rows, so remember the current value.)
     # (Also make sure to clip the height to the size of the output.)
     current_height = min(screen.height, height)
 
@@ -170,37 +483,103 @@ def _output_screen_diff(
     row_count = min(max(screen.height, previous_screen.height), height)
     c = 0  # Column counter.
 
+    chars = _CHAR_IDS.chars
+    empty_row = array("I")
+
     for y in range(row_count):
-        new_row = screen.data_buffer[y]
-        previous_row = previous_screen.data_buffer[y]
+        new_row = screen.rows.get(y, empty_row)
+        previous_row = previous_screen.rows.get(y, empty_row)
+
+        # Skip rows that didn't change. (Both are arrays of interned char ids,
+        # so this is a single comparison in C.)
+        if new_row == previous_row:
+            continue
+
         zero_width_escapes_row = screen.zero_width_escapes[y]
 
-        new_max_line_len = min(width - 1, max(new_row.keys()) if new_row else 0)
+        new_max_line_len = min(width - 1, len(new_row) - 1 if new_row else 0)
         previous_max_line_len = min(
-            width - 1, max(previous_row.keys()) if previous_row else 0
+            width - 1, len(previous_row) - 1 if previous_row else 0
         )
 
-        # Loop over the columns.
-        c = 0
-        while c < new_max_line_len + 1:
-            new_char = new_row[c]
-            old_char = previous_row[c]
-            char_width = new_char.width or 1
+        # Columns that were never written hold the default char.
+        length = new_max_line_len + 1
+        new_row = _padded_row(new_row, length, screen.default_char_id)
+        previous_row = _padded_row(
+            previous_row, length, previous_screen.default_char_id
+        )
+
+        # Loop over the columns, from the first to the last changed one.
+        c, last_changed = _changed_columns(new_row, previous_row, length)
+        while c <= last_changed:
+            new_char_id = new_row[c]
 
             # When the old and new character at this position are different,
-            # draw the output. (Because of the performance, we don't call
-            # `Char.__ne__`, but inline the same expression.)
-            if new_char.char != old_char.char or new_char.style != old_char.style:
+            # draw the output. (Every distinct char has a single id.)
+            if new_char_id != previous_row[c]:
+                # When the cursor is a few cells to the left, on this row,
+                # writing the unchanged characters in between can take fewer
+                # bytes than moving it. (Only when they are single width and
+                # have the attributes that are set right now.)
+                gap = c - current_pos.x
+                if (
+                    current_pos.y == y
+                    and 0 < gap < _cursor_move_size(gap)
+                    and c < width - 1
+                    and last_style is not None
+                ):
+                    last_attrs = attrs_for_style_string[last_style]
+                    gap_chars = [chars[i] for i in new_row[current_pos.x : c]]
+
+                    if all(
+                        char.width == 1
+                        and attrs_for_style_string[char.style] == last_attrs
+                        for char in gap_chars
+                    ) and not any(
+                        x in zero_width_escapes_row for x in range(current_pos.x, c)
+                    ):
+                        gap_text = "".join(char.char for char in gap_chars)
+                        gap_size = len(gap_text.encode("utf-8"))
+
+                        if gap_size < _cursor_move_size(gap):
+                            write(gap_text)
+                            cursor_bytes_saved += _cursor_move_size(gap) - gap_size
+                            current_pos = Point(x=c, y=y)
+
                 current_pos = move_cursor(Point(x=c, y=y))
 
                 # Send injected escape sequences to output.
                 if c in zero_width_escapes_row:
                     write_raw(zero_width_escapes_row[c])
 
-                output_char(new_char)
-                current_pos = Point(x=current_pos.x + char_width, y=current_pos.y)
-
-            c += char_width
+                # Extend the run with the changed characters that follow and
+                # have the same style, to write them all at once. (Stop
+                # before the last column, which `move_cursor` treats
+                # specially, and before injected escape sequences.)
+                new_char = chars[new_char_id]
+                style = new_char.style
+                run = [new_char.char]
+                run_end = c + (new_char.width or 1)
+
+                while (
+                    run_end <= last_changed
+                    and run_end < width - 1
+                    and run_end not in zero_width_escapes_row
+                ):
+                    next_char_id = new_row[run_end]
+                    if next_char_id == previous_row[run_end]:
+                        break
+                    next_char = chars[next_char_id]
+                    if next_char.style != style:
+                        break
+                    run.append(next_char.char)
+                    run_end += next_char.width or 1
+
+                output_text("".join(run), style)
+                current_pos = Point(x=current_pos.x + run_end - c, y=current_pos.y)
+                c = run_end
+            else:
+                c += chars[new_char_id].width or 1
 
         # If the new line is shorter, trim it.
         if previous_screen and new_max_line_len < previous_max_line_len:
@@ -240,7 +619,7 @@ def _output_screen_diff(
     if screen.show_cursor or is_done:
         output.show_cursor()
 
-    return current_pos, last_style
+    return current_pos, last_style, cursor_bytes_saved
 
 
 class HeightIsUnknownError(Exception):
@@ -277,6 +656,23 @@ class CPR_Support(Enum):
     UNKNOWN = "UNKNOWN"
 
 
+# Held while a layout is drawn. Drawing fills caches that all applications
+# share, so when frames are drawn in a thread, only one is drawn at a time.
+_build_frame_lock = Lock()
+
+
+class Frame(NamedTuple):
+    """
+    A screen that has been drawn, but not written to the output yet. (See
+    :meth:`.Renderer.build_frame`.)
+    """
+
+    screen: Screen
+    mouse_handlers: MouseHandlers
+    size: Size
+    is_done: bool
+
+
 class Renderer:
     """
     Typical usage:
@@ -297,6 +693,7 @@ class Renderer:
         input: Input,
         full_screen: bool = False,
         mouse_support: FilterOrBool = False,
+        scroll_regions: FilterOrBool = False,
         cpr_not_supported_callback: Optional[Callable[[], None]] = None,
     ) -> None:
 
@@ -305,6 +702,7 @@ class Renderer:
         self.input = input
         self.full_screen = full_screen
         self.mouse_support = to_filter(mouse_support)
+        self.scroll_regions = to_filter(scroll_regions)
         self.cpr_not_supported_callback = cpr_not_supported_callback
 
         self._in_alternate_screen = False
@@ -323,6 +721,10 @@ class Renderer:
         self._last_transformation_hash: Optional[Hashable] = None
         self._last_color_depth: Optional[ColorDepth] = None
 
+        #: Bytes that the cursor movements of all renders saved, compared to
+        #: only moving the cursor relatively. (Counted for VT100 terminals.)
+        self.cursor_bytes_saved = 0
+
         self.reset(_scroll=True)
 
     def reset(self, _scroll: bool = False, leave_alternate_screen: bool = True) -> None:
@@ -338,6 +740,11 @@ class Renderer:
         self._last_size: Optional[Size] = None
         self._last_style: Optional[str] = None
 
+        # Position and scroll of the windows on the last screen.
+        self._last_window_regions: Dict[
+            "Window", Tuple[int, int, int, int, int]
+        ] = {}
+
         # Default MouseHandlers. (Just empty.)
         self.mouse_handlers = MouseHandlers()
 
@@ -522,31 +929,46 @@ class Renderer:
         :param is_done: When True, put the cursor at the end of the interface. We
                 won't print any changes to this part.
         """
-        output = self.output
+        self.output_frame(app, self.build_frame(app, layout, is_done=is_done))
 
-        # Enter alternate screen.
-        if self.full_screen and not self._in_alternate_screen:
-            self._in_alternate_screen = True
-            output.enter_alternate_screen()
-
-        # Enable bracketed paste.
-        if not self._bracketed_paste_enabled:
-            self.output.enable_bracketed_paste()
-            self._bracketed_paste_enabled = True
+    def frame_bounds(self) -> Tuple[Size, int]:
+        """
+        The size of the output, and the height that the next frame takes at
+        least. (Resizes and CPR responses change these.)
+        """
+        last_height = self._last_screen.height if self._last_screen else 0
+        return self.output.get_size(), max(self._min_available_height, last_height)
 
-        # Enable/disable mouse support.
-        needs_mouse_support = self.mouse_support()
+    def build_frame(
+        self,
+        app: "Application[Any]",
+        layout: "Layout",
+        is_done: bool = False,
+        bounds: Optional[Tuple[Size, int]] = None,
+    ) -> Frame:
+        """
+        Draw the layout on a new screen, without writing anything to the
+        output. This only reads the layout, so it can run in another thread,
+        as long as nothing changes the layout in the meantime.
 
-        if needs_mouse_support and not self._mouse_support_enabled:
-            output.enable_mouse_support()
-            self._mouse_support_enabled = True
+        :param bounds: The `frame_bounds`. In another thread, pass the bounds
+            taken before, so that the renderer isn't read while it changes.
+        """
+        if bounds is None:
+            bounds = self.frame_bounds()
 
-        elif not needs_mouse_support and self._mouse_support_enabled:
-            output.disable_mouse_support()
-            self._mouse_support_enabled = False
+        with _build_frame_lock:
+            return self._build_frame(app, layout, is_done, bounds)
 
+    def _build_frame(
+        self,
+        app: "Application[Any]",
+        layout: "Layout",
+        is_done: bool,
+        bounds: Tuple[Size, int],
+    ) -> Frame:
         # Create screen and write layout to it.
-        size = output.get_size()
+        size, min_height = bounds
         screen = Screen()
         screen.show_cursor = False  # Hide cursor by default, unless one of the
         # containers decides to display it.
@@ -561,15 +983,65 @@ class Renderer:
                 size.columns, size.rows
             ).preferred
         else:
-            last_height = self._last_screen.height if self._last_screen else 0
             height = max(
-                self._min_available_height,
-                last_height,
+                min_height,
                 layout.container.preferred_height(size.columns, size.rows).preferred,
             )
 
         height = min(height, size.rows)
 
+        layout.container.write_to_screen(
+            screen,
+            mouse_handlers,
+            WritePosition(xpos=0, ypos=0, width=size.columns, height=height,),
+            parent_style="",
+            erase_bg=False,
+            z_index=None,
+        )
+        screen.draw_all_floats()
+
+        # When grayed. Replace all styles in the new screen.
+        if app.exit_style:
+            screen.append_style_to_content(app.exit_style)
+
+        return Frame(screen, mouse_handlers, size, is_done)
+
+    def output_frame(self, app: "Application[Any]", frame: Frame) -> None:
+        """
+        Write the difference between `frame` and the previous frame to the
+        output, all at once.
+        """
+        self.output.begin_frame()
+        try:
+            self._output_frame(app, frame)
+        finally:
+            self.output.end_frame()
+
+    def _output_frame(self, app: "Application[Any]", frame: Frame) -> None:
+        output = self.output
+        screen, mouse_handlers, size, is_done = frame
+
+        # Enter alternate screen.
+        if self.full_screen and not self._in_alternate_screen:
+            self._in_alternate_screen = True
+            output.enter_alternate_screen()
+
+        # Enable bracketed paste.
+        if not self._bracketed_paste_enabled:
+            self.output.enable_bracketed_paste()
+            self._bracketed_paste_enabled = True
+
+        # Enable/disable mouse support.
+        needs_mouse_support = self.mouse_support()
+
+        if needs_mouse_support and not self._mouse_support_enabled:
+            output.enable_mouse_support()
+            self._mouse_support_enabled = True
+
+        elif not needs_mouse_support and self._mouse_support_enabled:
+            output.disable_mouse_support()
+            self._mouse_support_enabled = False
+
         # When te size changes, don't consider the previous screen.
         if self._last_size != size:
             self._last_screen = None
@@ -595,22 +1067,32 @@ class Renderer:
         self._last_transformation_hash = app.style_transformation.invalidation_hash()
         self._last_color_depth = app.color_depth
 
-        layout.container.write_to_screen(
-            screen,
-            mouse_handlers,
-            WritePosition(xpos=0, ypos=0, width=size.columns, height=height,),
-            parent_style="",
-            erase_bg=False,
-            z_index=None,
-        )
-        screen.draw_all_floats()
+        # Let the terminal shift the rows of windows that scrolled.
+        window_regions = _window_regions(screen)
 
-        # When grayed. Replace all styles in the new screen.
-        if app.exit_style:
-            screen.append_style_to_content(app.exit_style)
+        if (
+            self.full_screen
+            and self.scroll_regions()
+            and not is_done
+            and not is_windows()
+            and self._last_screen
+            and self._last_size == size
+        ):
+            if _scroll_regions(
+                output,
+                screen,
+                self._last_screen,
+                window_regions,
+                self._last_window_regions,
+                height=size.rows,
+            ):
+                self._cursor_pos = Point(x=0, y=0)
+                self._last_style = None
+
+        self._last_window_regions = window_regions
 
         # Process diff and write to output.
-        self._cursor_pos, self._last_style = _output_screen_diff(
+        self._cursor_pos, self._last_style, cursor_bytes_saved = _output_screen_diff(
             app,
             output,
             screen,
@@ -627,6 +1109,7 @@ class Renderer:
         self._last_screen = screen
         self._last_size = size
         self.mouse_handlers = mouse_handlers
+        self.cursor_bytes_saved += cursor_bytes_saved
 
         output.flush()
 
@@ -318,6 +318,11 @@ class Style(BaseStyle):
 
 _T = TypeVar("_T")
 
+# Compiled merged styles, keyed by their style rules.
+_merged_style_cache: SimpleCache[Tuple[Tuple[str, str], ...], Style] = SimpleCache(
+    maxsize=32
+)
+
 
 def _merge_attrs(list_of_attrs: List[Attrs]) -> Attrs:
     """
@@ -378,7 +383,12 @@ class _MergedStyle(BaseStyle):
         " The `Style` object that has the other styles merged together. "
 
         def get() -> Style:
-            return Style(self.style_rules)
+            # Applications that use the same styles end up with the same
+            # rules, so they can share the compiled `Style`.
+            style_rules = self.style_rules
+            return _merged_style_cache.get(
+                tuple(style_rules), lambda: Style(style_rules)
+            )
 
         return self._style.get(self.invalidation_hash(), get)
 
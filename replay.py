@@ -0,0 +1,534 @@
+##########################################################################
+# Keystroke replay load test
+# Drives many game sessions at once on one event loop, feeding every one
+# the same recorded keystroke script through a pipe, and reports how long
+# each keystroke took to show up on screen, how many frames were rendered
+# and how many bytes of terminal output they took. With `--output grid` the
+# output is also interpreted by a virtual terminal, which counts its escape
+# sequences, cursor movements and flushes. With `--telnet` the sessions are
+# served by the game's telnet server instead, and played through real
+# connections next to any number of idle ones.
+#
+#   python3 replay.py                        # built in playthrough
+#   python3 replay.py script.txt --instances 500
+#   python3 replay.py --telnet --instances 20 --idle 2000
+#
+# Scripts have one or more keys per line (enter, up, down, left, right,
+# tab, s-tab, backspace, c-c), `type <text>` to type text one key at a
+# time and `wait <seconds>` to pause. Everything after a # is ignored.
+##########################################################################
+
+import argparse
+import asyncio
+import gc
+import os
+import runpy
+import sys
+import time
+
+from game_server import GameServer
+from prompt_toolkit.application.current import create_app_session
+from prompt_toolkit.contrib.telnet.protocol import IAC, NAWS, SB, SE
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.input.posix_pipe import PosixPipeInput
+from prompt_toolkit.output import DummyOutput, GridOutput
+from prompt_toolkit.output.vt100 import Vt100_Output
+
+__all__ = [
+    'ScriptError',
+    'ReplayResult',
+    'parse_script',
+    'replay',
+    'replay_telnet',
+]
+
+KEY_SEQUENCES = {
+    'enter': '\r',
+    'up': '\x1b[A',
+    'down': '\x1b[B',
+    'right': '\x1b[C',
+    'left': '\x1b[D',
+    'tab': '\t',
+    's-tab': '\x1b[Z',
+    'backspace': '\x7f',
+    'c-c': '\x03',
+}
+
+# enter a name, look at the help screen, go back and forwards through the
+# story, reach an ending, then go back from it and play to another one
+DEFAULT_SCRIPT = '''
+type comrade
+enter enter                 # accept the name, then press ok
+down enter                  # help
+enter                       # back to the menu
+enter                       # start
+enter                       # first choice
+up enter                    # (back) in the toolbar
+up right right right enter  # (next)
+down enter                  # an ending
+down enter                  # (back)
+enter enter enter enter enter  # another ending
+'''
+
+# seconds to wait for a keystroke to be rendered before giving up on it
+KEYSTROKE_TIMEOUT = 10
+
+# the game server wraps every frame in a synchronized update, so a client
+# has received a whole frame when it sees the end of one
+_FRAME_END = b'\x1b[?2026l'
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+class ScriptError(Exception):
+    "A keystroke script that can't be parsed"
+
+
+def parse_script(text):
+    """Parses a keystroke script into a list of (name, data) steps. Keys have
+    the escape sequence to send as data, waits have their delay in seconds
+    and a name of None"""
+    steps = []
+
+    for (lineno, line) in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+
+        if line.startswith('type '):
+            steps.extend((char, char) for char in line[len('type '):])
+            continue
+
+        if line.startswith('wait '):
+            try:
+                steps.append((None, float(line[len('wait '):])))
+            except ValueError:
+                raise ScriptError('Line %s: bad wait time' % lineno)
+            continue
+
+        for key in line.split():
+            if key not in KEY_SEQUENCES:
+                raise ScriptError('Line %s: unknown key %r' % (lineno, key))
+            steps.append((key, KEY_SEQUENCES[key]))
+
+    return steps
+
+
+class _ByteCounter:
+    "Stands in for a terminal, only counting what is written to it"
+
+    encoding = 'utf-8'
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+
+    def flush(self):
+        pass
+
+
+class ReplayResult:
+    """Statistics of a replay.
+
+    :param latencies: Seconds from sending every keystroke until the frame
+        showing it was rendered, in no particular order.
+    :param cursor_bytes_saved: Bytes the renderer saved by planning its
+        cursor movements, compared to only moving the cursor relatively.
+    :param redraw_intervals: Seconds between redraws that every session
+        adapted to when it finished.
+    :param escape_sequences: Escape sequences in the output. (Like
+        `cursor_moves` and `flushes`, only counted for grid output.)
+    :param full_collections: Seconds that every full garbage collection
+        during the replay took. (Only measured for telnet replays.)
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.frames = 0
+        self.bytes_written = 0
+        self.cursor_bytes_saved = 0
+        self.redraw_intervals = []
+        self.escape_sequences = 0
+        self.cursor_moves = 0
+        self.flushes = 0
+        self.sessions = 0
+        self.timeouts = 0
+        self.duration = 0
+        self.full_collections = []
+
+    @property
+    def keystrokes(self):
+        return len(self.latencies) + self.timeouts
+
+
+async def _replay_session(build_application, steps, output, delay, result):
+    pipe_input = PosixPipeInput()
+    rendered = asyncio.Event()
+    key_pressed = False
+
+    def on_key_press(_):
+        nonlocal key_pressed
+        key_pressed = True
+
+    def on_render(_):
+        # only a frame rendered after the key was handled shows it
+        if key_pressed:
+            rendered.set()
+
+    try:
+        with create_app_session(input=pipe_input, output=output):
+            app = build_application()
+            app.key_processor.after_key_press += on_key_press
+            app.after_render += on_render
+
+            task = asyncio.ensure_future(
+                app.run_async(set_exception_handler=False))
+
+            while app.render_counter == 0 and not task.done():
+                await asyncio.sleep(0.01)
+
+            for (key, data) in steps:
+                if task.done():
+                    break  # the script quit the game
+
+                if key is None:
+                    await asyncio.sleep(data)
+                    continue
+
+                key_pressed = False
+                rendered.clear()
+                start = time.perf_counter()
+                pipe_input.send_text(data)
+
+                try:
+                    await asyncio.wait_for(rendered.wait(), KEYSTROKE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    result.timeouts += 1
+                else:
+                    result.latencies.append(time.perf_counter() - start)
+
+                if delay:
+                    await asyncio.sleep(delay)
+
+            if app.is_running:
+                app.exit()
+            await task
+
+            result.frames += app.render_counter
+            result.cursor_bytes_saved += app.renderer.cursor_bytes_saved
+            result.redraw_intervals.append(app.redraw_interval)
+            result.sessions += 1
+    finally:
+        pipe_input.close()
+
+
+class _TelnetClient:
+    "A connection to the game server, counting the frames it receives"
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes_received = 0
+        self.frame_received = asyncio.Event()
+        self._tail = b''
+
+    async def connect(self, port, size):
+        self.reader, self.writer = await asyncio.open_connection(
+            '127.0.0.1', port)
+
+        # tell the server the window size
+        self.writer.write(IAC + SB + NAWS + size.columns.to_bytes(2, 'big')
+                          + size.rows.to_bytes(2, 'big') + IAC + SE)
+
+        self._read_task = asyncio.ensure_future(self._read())
+
+    async def _read(self):
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                break
+
+            self.bytes_received += len(data)
+
+            # (the end of a frame can be split over several reads. The tail
+            # is too short to hold a whole end, so none is counted twice)
+            buf = self._tail + data
+            frames = buf.count(_FRAME_END)
+            self._tail = buf[-len(_FRAME_END) + 1:]
+            if frames:
+                self.frames += frames
+                self.frame_received.set()
+
+    async def close(self):
+        self.writer.close()
+        await self._read_task
+
+
+async def _replay_connection(client, steps, delay, result):
+    while client.frames == 0:
+        await client.frame_received.wait()
+
+    for (key, data) in steps:
+        if key is None:
+            await asyncio.sleep(data)
+            continue
+
+        client.frame_received.clear()
+        start = time.perf_counter()
+        client.writer.write(data.encode('utf-8'))
+
+        try:
+            await asyncio.wait_for(client.frame_received.wait(),
+                                   KEYSTROKE_TIMEOUT)
+        except asyncio.TimeoutError:
+            result.timeouts += 1
+        else:
+            result.latencies.append(time.perf_counter() - start)
+
+        if delay:
+            await asyncio.sleep(delay)
+
+    result.sessions += 1
+
+
+async def replay_telnet(build_application, steps, instances=1, delay=0,
+                        size=Size(rows=24, columns=80), idle=0):
+    """Like replay(), but serves the sessions with the game's telnet server
+    and plays them through connections to it. `idle` more connections are
+    opened one after the other while the others play, and stay open with
+    their first screen.
+
+    Latencies are measured until the client received the whole frame, and
+    frames and bytes are counted on the playing clients.
+    """
+    server = GameServer(build_application, host='127.0.0.1', port=0,
+                        max_sessions=instances + idle)
+    await server.start()
+    port = server.telnet_server.port
+
+    result = ReplayResult()
+    idle_clients = [_TelnetClient() for _ in range(idle)]
+    clients = [_TelnetClient() for _ in range(instances)]
+
+    async def connect_idle_clients():
+        for client in idle_clients:
+            await client.connect(port, size)
+            # (until its session is built)
+            await client.frame_received.wait()
+
+    collection_start = None
+
+    def on_collection(phase, info):
+        nonlocal collection_start
+        if info['generation'] != 2:
+            return
+        if phase == 'start':
+            collection_start = time.perf_counter()
+        elif collection_start is not None:
+            result.full_collections.append(
+                time.perf_counter() - collection_start)
+
+    gc.callbacks.append(on_collection)
+    idle_task = None
+
+    try:
+        for client in clients:
+            await client.connect(port, size)
+        while any(client.frames == 0 for client in clients):
+            await asyncio.sleep(0.01)
+
+        # connecting players create sessions (and garbage collections) while
+        # the others play
+        idle_task = asyncio.ensure_future(connect_idle_clients())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _replay_connection(client, steps, delay, result)
+            for client in clients
+        ))
+        result.duration = time.perf_counter() - start
+    finally:
+        gc.callbacks.remove(on_collection)
+        if idle_task is not None:
+            idle_task.cancel()
+        for client in clients + idle_clients:
+            if hasattr(client, 'writer'):
+                await client.close()
+        await server.telnet_server.stop()
+
+    result.frames = sum(client.frames for client in clients)
+    result.bytes_written = sum(client.bytes_received for client in clients)
+
+    return result
+
+
+def _create_output(output_type, size):
+    if output_type == 'dummy':
+        return DummyOutput(), None
+
+    if output_type == 'grid':
+        # counts its own bytes
+        output = GridOutput(size)
+        return output, output
+
+    counter = _ByteCounter()
+    return Vt100_Output(counter, lambda: size), counter
+
+
+async def replay(build_application, steps, instances=1, delay=0,
+                 output_type='vt100', size=Size(rows=24, columns=80)):
+    """Replays `steps` (from parse_script) on `instances` sessions at once.
+
+    :param output_type: 'vt100' to render real terminal output and count its
+        bytes, 'grid' to also interpret it with a virtual terminal, or
+        'dummy' to skip producing output.
+    """
+    result = ReplayResult()
+    outputs = [_create_output(output_type, size) for _ in range(instances)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _replay_session(build_application, steps, output, delay, result)
+        for (output, _) in outputs
+    ))
+    result.duration = time.perf_counter() - start
+
+    result.bytes_written = sum(
+        counter.bytes_written for (_, counter) in outputs if counter)
+
+    for (output, _) in outputs:
+        if isinstance(output, GridOutput):
+            result.escape_sequences += output.escape_sequences
+            result.cursor_moves += output.cursor_moves
+            result.flushes += output.flushes
+
+    return result
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def format_report(result, output_type):
+    latencies = sorted(result.latencies)
+    keystrokes = max(1, result.keystrokes)
+
+    lines = [
+        'Sessions: %s, keystrokes: %s (%s timed out), %.2fs' % (
+            result.sessions, result.keystrokes, result.timeouts,
+            result.duration),
+        'Throughput: %.0f keystrokes/s' % (
+            result.keystrokes / max(result.duration, 1e-9)),
+        '',
+        'Keystroke latency (ms):',
+    ]
+
+    for percent in (50, 90, 99, 100):
+        lines.append('  p%-3s %8.2f' % (
+            percent, 1000 * _percentile(latencies, percent)))
+
+    lines.append('')
+    lines.append('Frames rendered: %s (%.2f per keystroke)' % (
+        result.frames, result.frames / keystrokes))
+
+    if result.redraw_intervals:
+        lines.append('Redraw interval (ms): mean %.2f, max %.2f' % (
+            1000 * sum(result.redraw_intervals) / len(result.redraw_intervals),
+            1000 * max(result.redraw_intervals)))
+
+    if output_type == 'telnet':
+        lines.append('Full garbage collections: %s, longest %.2f ms' % (
+            len(result.full_collections),
+            1000 * max(result.full_collections, default=0)))
+
+    if output_type in ('vt100', 'grid', 'telnet'):
+        lines.append('Bytes written: %s (%.0f per keystroke)' % (
+            result.bytes_written, result.bytes_written / keystrokes))
+
+    if output_type in ('vt100', 'grid'):
+        lines.append('Saved by cursor movement planning: %s bytes' % (
+            result.cursor_bytes_saved))
+
+    if output_type == 'grid':
+        lines.append('Escape sequences: %s (%.0f per keystroke)' % (
+            result.escape_sequences, result.escape_sequences / keystrokes))
+        lines.append('Cursor movements: %s (%.0f per keystroke)' % (
+            result.cursor_moves, result.cursor_moves / keystrokes))
+        lines.append('Flushes: %s (%.2f per frame)' % (
+            result.flushes, result.flushes / max(1, result.frames)))
+
+    return '\n'.join(lines)
+
+
+def _parse_size(text):
+    try:
+        columns, rows = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected COLUMNSxROWS, eg. 80x24')
+    return Size(rows=rows, columns=columns)
+
+
+def load_build_application():
+    "The game's build_application, without running the game"
+    return runpy.run_path(
+        os.path.join(_here, '__main__.py'), run_name='game')['build_application']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay a keystroke script on many game sessions at once')
+    parser.add_argument('script', nargs='?',
+                        help='keystroke script (default: a built in '
+                             'playthrough)')
+    parser.add_argument('--instances', type=int, default=1,
+                        help='sessions to run at the same time')
+    parser.add_argument('--delay', type=float, default=0,
+                        help='seconds between the keystrokes of a session')
+    parser.add_argument('--output', choices=['vt100', 'grid', 'dummy'],
+                        default='vt100',
+                        help='render terminal output and count its bytes, '
+                             'also interpret it with a virtual terminal, '
+                             'or render to a dummy output')
+    parser.add_argument('--size', type=_parse_size,
+                        default=Size(rows=24, columns=80),
+                        help='terminal size, COLUMNSxROWS (default: 80x24)')
+    parser.add_argument('--telnet', action='store_true',
+                        help='play the sessions through connections to the '
+                             'telnet server instead')
+    parser.add_argument('--idle', type=int, default=0,
+                        help='with --telnet, idle connections to keep open '
+                             'while the sessions play')
+    args = parser.parse_args()
+
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            script = f.read()
+    else:
+        script = DEFAULT_SCRIPT
+
+    try:
+        steps = parse_script(script)
+    except ScriptError as e:
+        print(e)
+        return 1
+
+    if args.telnet:
+        output_type = 'telnet'
+        result = asyncio.run(replay_telnet(
+            load_build_application(), steps, instances=args.instances,
+            delay=args.delay, size=args.size, idle=args.idle))
+    else:
+        output_type = args.output
+        result = asyncio.run(replay(
+            load_build_application(), steps, instances=args.instances,
+            delay=args.delay, output_type=args.output, size=args.size))
+
+    print(format_report(result, output_type))
+
+    return 1 if result.timeouts else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+##########################################################################
+# Session persistence
+# Games in progress are saved as compact records (username, start time and
+# the index of every choice made) appended to a journal file. The latest
+# record of every player is indexed in memory, so restoring a session is
+# a single read. Once most of the journal is superseded records it is
+# compacted into a fresh file. Several processes can share a journal, they
+# take turns with a lock file and pick up each other's records.
+##########################################################################
+
+import os
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+
+from choice_history import ChoiceHistory
+from story_graph import ROOT_NODE_ID
+
+__all__ = [
+    'SessionRecord',
+    'SessionJournal',
+    'encode_varint',
+    'decode_varint',
+    'record_from_history',
+    'history_from_record',
+]
+
+# record payload types
+_SAVE = 0
+_DELETE = 1
+
+# crc32 of the payload, in front of every record
+_CRC_SIZE = 4
+
+# a saved game. choices are the index of the choice picked at every step
+# from the root, position is the index of the current node in the history
+SessionRecord = namedtuple(
+    'SessionRecord', ['username', 'start_time', 'position', 'choices'])
+
+
+def encode_varint(value, out):
+    "Appends `value` (a non negative int) to the bytearray `out` as a varint"
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset):
+    "Decodes a varint from `data` at `offset`, returns (value, new offset)"
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encode_payload(record_type, username, record=None):
+    out = bytearray([record_type])
+    name = username.encode('utf-8')
+    encode_varint(len(name), out)
+    out += name
+
+    if record is not None:
+        encode_varint(int(record.start_time * 1000), out)
+        encode_varint(record.position, out)
+        encode_varint(len(record.choices), out)
+        for choice in record.choices:
+            encode_varint(choice, out)
+
+    return out
+
+
+def _decode_payload(payload):
+    record_type = payload[0]
+    length, offset = decode_varint(payload, 1)
+    username = bytes(payload[offset:offset + length]).decode('utf-8')
+    offset += length
+
+    if record_type == _DELETE:
+        return record_type, username, None
+
+    start_time, offset = decode_varint(payload, offset)
+    position, offset = decode_varint(payload, offset)
+    count, offset = decode_varint(payload, offset)
+
+    choices = []
+    for _ in range(count):
+        choice, offset = decode_varint(payload, offset)
+        choices.append(choice)
+
+    return record_type, username, SessionRecord(
+        username, start_time / 1000, position, tuple(choices))
+
+
+def _framed_size(size):
+    "Size of a framed record with a payload of `size` bytes"
+    varint_size = 1
+    remaining = size
+    while remaining > 0x7f:
+        remaining >>= 7
+        varint_size += 1
+    return varint_size + _CRC_SIZE + size
+
+
+def _frame(payload):
+    "Length prefix + crc32 + payload"
+    out = bytearray()
+    encode_varint(len(payload), out)
+    out += zlib.crc32(payload).to_bytes(_CRC_SIZE, 'little')
+    out += payload
+    return out
+
+
+class SessionJournal:
+    """
+    Append-only journal of saved sessions.
+
+    :param path: The journal file, created if it doesn't exist.
+    :param compact_min_size: Don't bother compacting journals smaller than
+        this many bytes.
+    :param shared: Other processes (eg. the workers of the game server) use
+        the journal at the same time. Every operation then holds a lock on
+        `path`.lock and first reads the records the others wrote. (Unix
+        only.) A shared journal can also be used on both sides of a fork.
+    """
+
+    def __init__(self, path, compact_min_size=1024 * 1024, shared=False):
+        self.path = path
+        self.compact_min_size = compact_min_size
+        self.shared = shared
+
+        # username -> (offset, size) of the payload of the latest record
+        self._index = {}
+        self._live_size = 0
+        # end of the records that are in the index
+        self._end = 0
+
+        self._lock_file = None
+        self._open()
+
+    def _open(self):
+        self._pid = os.getpid()
+        if self.shared:
+            self._lock_file = open(self.path + '.lock', 'a+b')
+
+        with self._locked(sync=False):
+            self._file = open(self.path, 'a+b')
+            self._load()
+
+    @contextmanager
+    def _locked(self, sync=True):
+        "Holds the lock of a shared journal, catching up with the others"
+        if not self.shared:
+            yield
+            return
+
+        import fcntl
+
+        if sync and os.getpid() != self._pid:
+            # after a fork, the lock and file offsets would be shared with
+            # the parent
+            self._file.close()
+            self._lock_file.close()
+            self._open()
+
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            if sync:
+                self._sync()
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self):
+        try:
+            replaced = (os.stat(self.path).st_ino
+                        != os.fstat(self._file.fileno()).st_ino)
+        except FileNotFoundError:
+            replaced = True
+
+        if replaced:
+            # another process compacted the journal
+            self._file.close()
+            self._file = open(self.path, 'a+b')
+            self._load()
+        elif self._file.seek(0, os.SEEK_END) > self._end:
+            self._load(self._end)
+
+    def _load(self, start=0):
+        "Indexes the records from `start`, the end of the indexed records"
+        if start == 0:
+            self._index = {}
+            self._live_size = 0
+
+        self._file.seek(start)
+        data = self._file.read()
+        offset = 0
+
+        while offset < len(data):
+            try:
+                size, payload_offset = decode_varint(data, offset)
+            except IndexError:
+                break
+
+            payload_offset += _CRC_SIZE
+            end = payload_offset + size
+            if end > len(data):
+                break
+
+            payload = data[payload_offset:end]
+            crc = int.from_bytes(data[payload_offset - _CRC_SIZE:payload_offset],
+                                 'little')
+            if zlib.crc32(payload) != crc:
+                break
+
+            record_type, username, _ = _decode_payload(payload)
+            self._forget(username)
+            if record_type == _SAVE:
+                self._index[username] = (start + payload_offset, size)
+                self._live_size += end - offset
+
+            offset = end
+
+        if offset < len(data):
+            # a write was cut off half way (eg. a crash), drop it
+            self._file.truncate(start + offset)
+
+        self._end = start + offset
+
+    def _forget(self, username):
+        if username in self._index:
+            _, size = self._index.pop(username)
+            self._live_size -= _framed_size(size)
+
+    def _append(self, payload):
+        framed = _frame(payload)
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(framed)
+        self._file.flush()
+        self._end = offset + len(framed)
+
+        # offset of the payload, and size of the whole record
+        return offset + len(framed) - len(payload), len(framed)
+
+    def save(self, record):
+        "Saves `record`, replacing any earlier record of the same player"
+        with self._locked():
+            payload = _encode_payload(_SAVE, record.username, record)
+            payload_offset, framed_size = self._append(payload)
+
+            self._forget(record.username)
+            self._index[record.username] = (payload_offset, len(payload))
+            self._live_size += framed_size
+
+            self._maybe_compact()
+
+    def delete(self, username):
+        with self._locked():
+            if username in self._index:
+                self._append(_encode_payload(_DELETE, username))
+                self._forget(username)
+                self._maybe_compact()
+
+    def load(self, username):
+        "The latest saved record of `username`, or None"
+        with self._locked():
+            return self._read(username)
+
+    def _read(self, username):
+        try:
+            payload_offset, size = self._index[username]
+        except KeyError:
+            return None
+
+        self._file.seek(payload_offset)
+        return _decode_payload(self._file.read(size))[2]
+
+    def __contains__(self, username):
+        with self._locked():
+            return username in self._index
+
+    def __len__(self):
+        with self._locked():
+            return len(self._index)
+
+    def _maybe_compact(self):
+        size = self._file.seek(0, os.SEEK_END)
+        if size >= self.compact_min_size and size > 2 * self._live_size:
+            self._compact()
+
+    def compact(self):
+        "Rewrites the journal with only the latest record of every player"
+        with self._locked():
+            self._compact()
+
+    def _compact(self):
+        temp_path = '%s.%s.tmp' % (self.path, os.getpid())
+
+        with open(temp_path, 'wb') as f:
+            for username in self._index:
+                f.write(_frame(_encode_payload(
+                    _SAVE, username, self._read(username))))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.path)
+        self._file.close()
+        self._file = open(self.path, 'a+b')
+        self._load()
+
+    def close(self):
+        self._file.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+
+
+def record_from_history(graph, username, start_time, choice_history):
+    "Converts a ChoiceHistory of node ids into a compact SessionRecord"
+    node_ids = list(choice_history)
+    choices = tuple(
+        graph.child_ids(parent).index(child)
+        for (parent, child) in zip(node_ids, node_ids[1:])
+    )
+
+    return SessionRecord(username, start_time, choice_history.index, choices)
+
+
+def history_from_record(graph, record):
+    """Replays the choices of a record from the root of the story. Raises
+    IndexError if the record doesn't fit the story (eg. the story changed
+    since it was saved)"""
+    node_ids = [ROOT_NODE_ID]
+    for choice in record.choices:
+        node_ids.append(graph.child_ids(node_ids[-1])[choice])
+
+    return ChoiceHistory.from_node_ids(node_ids, record.position)
@@ -0,0 +1,284 @@
+##########################################################################
+# Headless playthrough simulator
+# Walks the compiled story graph without building any prompt_toolkit
+# widgets, either enumerating every possible path or sampling random
+# playthroughs on a process pool, and reports how the endings are reached.
+#
+#   python3 simulate.py                   # every path
+#   python3 simulate.py --samples 1000000 # random playthroughs
+##########################################################################
+
+import argparse
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from story_graph import load_story_graph, StoryNodeType, ROOT_NODE_ID
+
+__all__ = [
+    'StoryCycleError',
+    'SimulationResult',
+    'load_children',
+    'enumerate_paths',
+    'sample_playthroughs',
+    'find_problems',
+]
+
+# playthroughs handed to a worker process at a time
+BATCH_SIZE = 100000
+
+
+class StoryCycleError(Exception):
+    "The story loops back on itself, so there are infinitely many paths"
+
+
+class SimulationResult:
+    """Playthrough statistics.
+
+    :param endings: Counter of ending node id -> playthroughs ending there.
+    :param lengths: Counter of path length (choices made) -> playthroughs.
+    :param visited: Set of node ids that were part of any playthrough.
+    """
+
+    def __init__(self, endings=None, lengths=None, visited=None):
+        self.endings = endings or Counter()
+        self.lengths = lengths or Counter()
+        self.visited = visited or set()
+
+    @property
+    def total(self):
+        return sum(self.endings.values())
+
+    def merge(self, other):
+        self.endings.update(other.endings)
+        self.lengths.update(other.lengths)
+        self.visited |= other.visited
+
+
+def load_children(graph):
+    "Child node ids of every node, indexed by node id"
+    return [graph.child_ids(node_id) for node_id in range(len(graph))]
+
+
+def enumerate_paths(children):
+    """Counts every path from the root to an ending.
+
+    Paths that share a tail are only walked once, so this stays fast even
+    when the number of paths is huge.
+    """
+    # node id -> Counter of (ending id, choices until the ending) -> paths
+    tails = {}
+    in_progress = {ROOT_NODE_ID}
+
+    # depth first, with an explicit stack so that a long story can't hit
+    # the recursion limit. (node id, iterator over the children left to walk)
+    stack = [(ROOT_NODE_ID, iter(children[ROOT_NODE_ID]))]
+    while stack:
+        node_id, pending = stack[-1]
+
+        for child_id in pending:
+            if child_id in tails:
+                continue
+            if child_id in in_progress:
+                raise StoryCycleError(
+                    'Story node %s leads back to itself' % child_id)
+
+            in_progress.add(child_id)
+            stack.append((child_id, iter(children[child_id])))
+            break
+        else:
+            # every child is walked, count the paths from here
+            stack.pop()
+            in_progress.remove(node_id)
+            counts = Counter()
+
+            if not children[node_id]:
+                counts[(node_id, 0)] = 1
+
+            for child_id in children[node_id]:
+                for ((ending_id, length), paths) in tails[child_id].items():
+                    counts[(ending_id, length + 1)] += paths
+
+            tails[node_id] = counts
+
+    result = SimulationResult(visited=set())
+    for ((ending_id, length), paths) in tails[ROOT_NODE_ID].items():
+        result.endings[ending_id] += paths
+        result.lengths[length] += paths
+
+    result.visited.update(tails)
+    return result
+
+
+def _play(children, rng, count):
+    result = SimulationResult()
+    endings = result.endings
+    lengths = result.lengths
+    visited = result.visited
+    choice = rng.choice
+
+    for _ in range(count):
+        node_id = ROOT_NODE_ID
+        length = 0
+
+        while children[node_id]:
+            visited.add(node_id)
+            node_id = choice(children[node_id])
+            length += 1
+
+            if length > len(children):
+                raise StoryCycleError(
+                    'Playthrough did not end after %s choices' % length)
+
+        visited.add(node_id)
+        endings[node_id] += 1
+        lengths[length] += 1
+
+    return result
+
+
+_worker_children = None
+
+
+def _init_worker(children):
+    global _worker_children
+    _worker_children = children or load_children(load_story_graph())
+
+
+def _play_batch(args):
+    seed, count = args
+    return _play(_worker_children, random.Random(seed), count)
+
+
+def sample_playthroughs(samples, workers=None, seed=None, children=None):
+    """Plays `samples` random playthroughs, picking every choice uniformly.
+
+    With more than one worker the playthroughs are split into batches and
+    played on a process pool. Each batch gets its own seed, derived from
+    `seed`, so a run can be reproduced.
+    """
+    rng = random.Random(seed)
+    batches = []
+    while samples > 0:
+        count = min(BATCH_SIZE, samples)
+        batches.append((rng.getrandbits(64), count))
+        samples -= count
+
+    result = SimulationResult()
+
+    if workers == 1 or len(batches) == 1:
+        children = children or load_children(load_story_graph())
+        for (batch_seed, count) in batches:
+            result.merge(_play(children, random.Random(batch_seed), count))
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(children,)) as executor:
+        for batch_result in executor.map(_play_batch, batches):
+            result.merge(batch_result)
+
+    return result
+
+
+def find_problems(graph, children):
+    "Problems with the story itself, as a list of messages"
+    problems = []
+
+    reachable = {ROOT_NODE_ID}
+    stack = [ROOT_NODE_ID]
+    while stack:
+        for child_id in children[stack.pop()]:
+            if child_id not in reachable:
+                reachable.add(child_id)
+                stack.append(child_id)
+
+    for node_id in range(len(graph)):
+        if node_id not in reachable:
+            problems.append('Node %s can not be reached' % node_id)
+        elif (graph.node_type(node_id) == StoryNodeType.LIST_CHOICE
+              and not children[node_id]):
+            problems.append('Node %s has no choices but is not an ending'
+                            % node_id)
+
+    return problems
+
+
+def _excerpt(text, width=60):
+    line = text.strip().split('\n')[0]
+    return line if len(line) <= width else line[:width - 3] + '...'
+
+
+def format_report(graph, result, problems):
+    lines = []
+    total = result.total
+
+    lines.append('Playthroughs: %s' % total)
+    lines.append('')
+    lines.append('Endings:')
+    for (ending_id, count) in result.endings.most_common():
+        lines.append('  %6.2f%%  %12s  node %-4s %s' % (
+            100 * count / total, count, ending_id,
+            _excerpt(graph.node(ending_id).passage)))
+
+    never_reached = [
+        node_id for node_id in range(len(graph))
+        if graph.node_type(node_id) == StoryNodeType.END_SCREEN
+        and node_id not in result.endings
+    ]
+    for ending_id in never_reached:
+        lines.append('  %6.2f%%  %12s  node %-4s %s' % (
+            0, 0, ending_id, _excerpt(graph.node(ending_id).passage)))
+
+    mean = sum(length * count for (length, count)
+               in result.lengths.items()) / total
+    lines.append('')
+    lines.append('Path length (choices made): min %s, mean %.2f, max %s' % (
+        min(result.lengths), mean, max(result.lengths)))
+    for (length, count) in sorted(result.lengths.items()):
+        lines.append('  %3s  %6.2f%%' % (length, 100 * count / total))
+
+    lines.append('')
+    lines.append('Reachability: %s of %s nodes visited' % (
+        len(result.visited), len(graph)))
+    for problem in problems:
+        lines.append('  ' + problem)
+
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Simulate playthroughs of the story without a terminal')
+    parser.add_argument('--samples', type=int, default=0,
+                        help='random playthroughs to play (default: '
+                             'enumerate every path instead)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes for sampling '
+                             '(default: one per cpu)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    graph = load_story_graph()
+    children = load_children(graph)
+    problems = find_problems(graph, children)
+
+    try:
+        if args.samples > 0:
+            result = sample_playthroughs(
+                args.samples, workers=args.workers, seed=args.seed,
+                children=children)
+        else:
+            result = enumerate_paths(children)
+    except StoryCycleError as e:
+        print(e)
+        return 1
+
+    print(format_report(graph, result, problems))
+
+    # a non zero exit status fails CI when the story is broken
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
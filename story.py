@@ -0,0 +1,119 @@
+##########################################################################
+# The story. Every passage is declared with list_choice (a passage followed
+# by choices) or end_screen (an ending). {name} is replaced with the player's
+# username. This file is compiled into story.bundle by story_graph.py and is
+# not imported by the game itself.
+##########################################################################
+
+from story_graph import list_choice, end_screen
+
+stop_squirming_end_screen = end_screen(
+    '"Ah. It seems you are smarter then everyone else from today. Good."\n\nВладлен approaches you. He now stands right beside your bed.\n\n"It seems you are still awake! That is great... for me. You see, we, the slav mafia, have been testing this thing... ah yes, this beautiful thing that turns humans... like you... into animals."\n\n"But so far it has only worked on the strong... lucky you! You get to test it! Ah, isn\'t that wonderful!." He picks up a needle from the table beside you, and thrusts it into you. You fall asleep...\n\nA couple hours pass. You wake up, dazed.\n\n"Where am I?" You look around. You\'re surrounded by grass, meters taller than you are. In the distance you hear the sound of bunnies prancing around...\n\n"Oh no..."\n\nIn your back you feel a tracker hidden by a layer of fur. You are stuck in this field forever.'
+)
+
+go_for_glory_end_screen = end_screen(
+    'You go for glory. You violently thrust your hands upwards, absolutely destroying the handcuffs. A wave of confidence rushes over you. You can do this! You reach for the mallet. The slav punches you in your face, fracturing your skull, immediately knocking you out. You never wake up'
+)
+
+root_branch = list_choice(
+    'You slowly wake up. "Hello {name}..." you hear in the distance. "You can call me Владлен."',
+    [
+        (
+            '"Who?"',
+            list_choice(
+                '"Ah yes. I forgot. Your an ignorant Australian. You have never been in Russia. Until now. And who am I? I am doctor Владлен..."\n\nYou feel weak. You struggle to stay awake.',
+                [
+                    (
+                        'Get up. Try to fight this man',
+                        list_choice(
+                            'You try to lift yourself up. But you can\'t move! You\'re eyeseight strengthens, and you look around. Everything\'s white...\n\n"What?..." you think, confused.\n\nYou\'re body tenses... you regain movement, but you still can\'t feel your hands or legs. You see that you are on a hospital bed, but you can\'t be sure... Владлен is standing to your right.',
+                            [
+                                (
+                                    'Keep squirming. Try to get out of here',
+                                    list_choice(
+                                        'You\'re arms and legs are numb. You violently throw your body left and right. The bed underneath you shakes...\n\n"You FOOL! You think you can escape? Think again!" Владлен laughs russian style...\n\nYou\'re eyes clear up and you get a good glimpse of him. He looks exactly like you thought he would look like:\n    Bald head,\n    Tattoos all over his hairy chest,\n    Muscles bigger than you\'re entire body.\n\nHe is squatting at you, both him and his adidas tracksuit are glaring straight into your eyes. You\'re worst nightmare has come to light...\n\nYOU HAVE BEEN CAPTURED BY A SLAV!',
+                                        [
+                                            (
+                                                'Keep squirming. More violent',
+                                                list_choice(
+                                                    'You\'re arms are still numb. It\'s still useless. But nevertheless you thrust your body left and right, more violently. It is to no avail...\n\n"I admire you\'re effort. But you must realise you\'re never getting out of here... I will be back in an hour or so"\n\nВладлен walks towards the door, laughing like a madman. As he exits, another slav enters the room. His adidas tracksuit is even more daunting than Владлен\'s. He stares straight at you.',
+                                                    [
+                                                        (
+                                                            'Look around. There\'s got to be something that can help you',
+                                                            list_choice(
+                                                                'Blood rushes to your hands. You can finally feel them! And move them!\n\nYou look at your hands. They are handcuffed to the table. You wiggle them slightly...\n\nThe handcuffs are loose! You\'re sure that if you give it enough force they will snap.\n\nYou\'re heart races... You have a chance to escape! You take in your surroundings. There is a door on the wall in front of you. Maybe it\'s an exit? You look around. To you\'re right, on the table next to your bed, there is a mallet. Just as you\'re about to go for glory, fear engulfs you as you\'re reminded of the slav staring into you\'re soul.',
+                                                                [
+                                                                    (
+                                                                        'Go for Glory! Try to escape right now!',
+                                                                        go_for_glory_end_screen
+                                                                    ),
+                                                                    (
+                                                                        'Too risky. Wait for another opportunity...',
+                                                                        list_choice(
+                                                                            'You decide to wait for another opportunity. 5 minutes pass... Nothing changes. The slav is still staring straight into your soul. Creepy. Also scary, very scary\n\n10 minutes pass... Nothing.',
+                                                                            [
+                                                                                (
+                                                                                    'It\'s now or never. Go for glory!',
+                                                                                    go_for_glory_end_screen
+                                                                                ),
+                                                                                (
+                                                                                    'Wait for another opportunity... Who knows',
+                                                                                    list_choice(
+                                                                                        'You\'re basic freeze instincts have kicked in...\nAfter an hour of excruciating waiting... The slav whimpers... "My bladder!"\n\nHe swiftly leaves out the door, holding his crotch.',
+                                                                                        [
+                                                                                            (
+                                                                                                'This is your chance. Escape!',
+                                                                                                list_choice(
+                                                                                                    'You thrust you\'re hands free from the handcuffs. Blood rushes through your body. You stand up...\n\nInstinctively, you grab the mallet and hold it in an offensive position, ready to strike. You tippy toe out towards the door. The door is locked...\n\nSmash! You absolutely obliterate the lock with your hammer. The door swings open. On the outwards facing side of the door you notice a label, "Test Subject #198: {name}"\n\nYou don\'t have time to think. You exit the door, into a corridor stretching left and right. You hear footsteps approaching from around the corner, but you don\'t know which side it\'s coming from!\n\n"Should I go left or right?" you think to yourself.',
+                                                                                                    [
+                                                                                                        (
+                                                                                                            'Go left.',
+                                                                                                            end_screen(
+                                                                                                                'You go left. The footsteps become louder. They approach faster. You start sprinting... faster... faster... the footsteps fade away. You reach a door labelled "Laboratory Exit."\n\nYou open the door. Sunshine! You are free...\n\nYou sprint into the distance, with no idea where you are. You run for days on end, driven by pure fear. You reach several russian villages, all of which are empty. How they are empty, you don\'t know, but you keep running, feeding on the food you find from each village. Eventually you reach the shore. Miraculously, there is a fishing boat waiting for you.\n\n"Weird," you think to yourself, "There\'s no one anywhere..." You get in the boat and row for what seems like an eternity before you eventually reach land. A small island.\n\nYou get off the boat, and step out onto the shore...\n\nYou pass out...\n\nHours pass...\n\nWhen you wake up, your boat is gone. Your are stuck on this island, forced to live off of coconuts and fish for the rest of your life. That is, if you don\'t go insane first...'
+                                                                                                            )
+                                                                                                        ),
+                                                                                                        (
+                                                                                                            'Go right',
+                                                                                                            end_screen(
+                                                                                                                'You go right. The footsteps become louder...\n\nВладлен and his fellow slav turn towards you. You\'re eyes meet. They start sprinting towards you. Only now can you grasp their true size.\n\n"They must be 7 feet each..." you think to yourself. They\'re muscles are huge... Pure terror envelops your mind. Then you stare into their adidas trackpants and realise the enormity of the situation. You are screwed. They sprint faster towards you, their anger and speed increasing every second... You instinctively whimper, before falling into a slump on the ground, passed out from pure terror. You never wake up...')
+                                                                                                        )
+                                                                                                    ]
+                                                                                                )
+                                                                                            )
+                                                                                        ]
+                                                                                    )
+                                                                                )
+                                                                            ]
+                                                                        )
+                                                                    )
+                                                                ]
+                                                            )
+                                                        )
+                                                    ]
+                                                ),
+                                            ),
+                                            (
+                                                'Stop squirming. It\'s no use. Give up.',
+                                                stop_squirming_end_screen
+                                            )
+                                        ]
+                                    )
+                                ),
+                                (
+                                    'Stop moving. See what he has to say',
+                                    stop_squirming_end_screen
+                                )
+                            ]
+                        )
+                    ),
+                    (
+                        'Go back to sleep. Everything will be alright, right?',
+                        end_screen(
+                            'Your vision weakens. Everything goes dark. Five hours pass. You wake up, but your thoughts come slower than usual. You look around. Nothing. You can\'t see anthing... Suddenly, you feel a sharp needle pierce your neck, and in the distance hear several men laughing in evil Russian accents. You pass out, never to wake again.'
+                        )
+                    )
+                ]
+            )
+        )
+    ]
+)
@@ -0,0 +1,290 @@
+##########################################################################
+# Story graph
+# The narrative is declared in story.py as nested list_choice/end_screen
+# calls. Instead of turning that into a tree of closures every time the game
+# starts, it is compiled once into a flat node table and written to a
+# compact bundle which the game memory-maps and decodes one node at a time.
+##########################################################################
+
+import mmap
+import os
+from collections import namedtuple
+from enum import IntEnum
+from string import Formatter
+from struct import Struct
+
+__all__ = [
+    'StoryNodeType',
+    'StoryNode',
+    'StoryGraph',
+    'PassageTemplate',
+    'list_choice',
+    'end_screen',
+    'compile_story',
+    'load_story_graph',
+    'ROOT_NODE_ID',
+]
+
+ROOT_NODE_ID = 0
+
+_MAGIC = b'RMSG'
+_VERSION = 1
+
+# magic, version, node count, choice count
+_HEADER = Struct('<4sHII')
+# node type, passage offset, passage length, first choice, choice count
+_NODE = Struct('<BIIIH')
+# label offset, label length, child node id
+_CHOICE = Struct('<III')
+
+_here = os.path.dirname(os.path.abspath(__file__))
+default_source_path = os.path.join(_here, 'story.py')
+default_bundle_path = os.path.join(_here, 'story.bundle')
+
+
+class StoryNodeType(IntEnum):
+    LIST_CHOICE = 0
+    END_SCREEN = 1
+
+
+# a decoded node. choices is a tuple of (label, child node id) pairs
+StoryNode = namedtuple('StoryNode', ['node_id', 'node_type', 'passage', 'choices'])
+
+
+class PassageTemplate:
+    """A passage split into the literal text around its `{name}` fields, so
+    filling in the player's name is a single join instead of str.format.
+
+    :param text: The passage, in str.format syntax. `{name}` is the only
+        field passages may use.
+    """
+
+    __slots__ = ('_literals',)
+
+    def __init__(self, text):
+        literals = ['']
+        for (literal, field, spec, conversion) in Formatter().parse(text):
+            literals[-1] += literal
+            if field is None:
+                continue
+            if field != 'name' or spec or conversion:
+                raise ValueError('Unsupported passage field {%s}' % field)
+            literals.append('')
+
+        self._literals = tuple(literals)
+
+    def render(self, name):
+        return name.join(self._literals)
+
+
+class _ListChoiceSource:
+    node_type = StoryNodeType.LIST_CHOICE
+
+    def __init__(self, label, choices):
+        self.label = label
+        self.choices = choices
+
+
+class _EndScreenSource:
+    node_type = StoryNodeType.END_SCREEN
+    choices = ()
+
+    def __init__(self, label):
+        self.label = label
+
+
+def list_choice(label, choices):
+    "Declares a passage followed by a list of (label, next passage) choices"
+    return _ListChoiceSource(label, choices)
+
+
+def end_screen(label):
+    "Declares an ending. Endings that are referenced twice share one node"
+    return _EndScreenSource(label)
+
+
+class _TextBlob:
+    "Utf-8 string table, identical strings are only stored once"
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = {}
+
+    def add(self, text):
+        if text not in self._offsets:
+            encoded = text.encode('utf-8')
+            self._offsets[text] = (len(self._data), len(encoded))
+            self._data += encoded
+
+        return self._offsets[text]
+
+    def to_bytes(self):
+        return bytes(self._data)
+
+
+def compile_story(root):
+    """Flattens the declared story into the bundle format.
+
+    Nodes are numbered breadth first from the root, so the root is always
+    node ROOT_NODE_ID and shared declarations keep a single id.
+    """
+    node_ids = {id(root): ROOT_NODE_ID}
+    order = [root]
+
+    # assign ids first so that children can be referenced before they are
+    # written out
+    i = 0
+    while i < len(order):
+        for (_, child) in order[i].choices:
+            if id(child) not in node_ids:
+                node_ids[id(child)] = len(order)
+                order.append(child)
+        i += 1
+
+    blob = _TextBlob()
+    nodes = bytearray()
+    choices = bytearray()
+    choice_count = 0
+
+    for source in order:
+        PassageTemplate(source.label)  # fail now on fields passages can't use
+        offset, length = blob.add(source.label)
+        nodes += _NODE.pack(source.node_type, offset, length,
+                            choice_count, len(source.choices))
+
+        for (label, child) in source.choices:
+            label_offset, label_length = blob.add(label)
+            choices += _CHOICE.pack(label_offset, label_length,
+                                    node_ids[id(child)])
+            choice_count += 1
+
+    header = _HEADER.pack(_MAGIC, _VERSION, len(order), choice_count)
+
+    return header + bytes(nodes) + bytes(choices) + blob.to_bytes()
+
+
+class StoryGraph:
+    """Read only view over a compiled story bundle.
+
+    :param buffer: The bundle, either bytes or a memory map of the file.
+    """
+
+    def __init__(self, buffer):
+        magic, version, node_count, choice_count = _HEADER.unpack_from(
+            buffer, 0)
+
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('Not a version %s story bundle' % _VERSION)
+
+        self._buffer = buffer
+        self.node_count = node_count
+        self._nodes_offset = _HEADER.size
+        self._choices_offset = self._nodes_offset + node_count * _NODE.size
+        self._text_offset = self._choices_offset + choice_count * _CHOICE.size
+        # node id -> PassageTemplate, shared by every session
+        self._templates = {}
+
+    def __len__(self):
+        return self.node_count
+
+    def _text(self, offset, length):
+        start = self._text_offset + offset
+        return str(self._buffer[start:start + length], 'utf-8')
+
+    def node_type(self, node_id):
+        return StoryNodeType(self._buffer[self._nodes_offset + node_id * _NODE.size])
+
+    def child_ids(self, node_id):
+        "Ids of the children of a node, without decoding any text"
+        _, _, _, first_choice, count = _NODE.unpack_from(
+            self._buffer, self._nodes_offset + node_id * _NODE.size)
+
+        return tuple(
+            _CHOICE.unpack_from(
+                self._buffer, self._choices_offset + i * _CHOICE.size)[2]
+            for i in range(first_choice, first_choice + count)
+        )
+
+    def passage_template(self, node_id):
+        "The passage of a node as a PassageTemplate, split the first time"
+        try:
+            return self._templates[node_id]
+        except KeyError:
+            template = self._templates[node_id] = PassageTemplate(
+                self.node(node_id).passage)
+            return template
+
+    def node(self, node_id):
+        "Decodes a single node"
+        if not 0 <= node_id < self.node_count:
+            raise IndexError('Story node %s does not exist' % node_id)
+
+        node_type, offset, length, first_choice, count = _NODE.unpack_from(
+            self._buffer, self._nodes_offset + node_id * _NODE.size)
+
+        choices = []
+        for i in range(first_choice, first_choice + count):
+            label_offset, label_length, child_id = _CHOICE.unpack_from(
+                self._buffer, self._choices_offset + i * _CHOICE.size)
+            choices.append((self._text(label_offset, label_length), child_id))
+
+        return StoryNode(
+            node_id=node_id,
+            node_type=StoryNodeType(node_type),
+            passage=self._text(offset, length),
+            choices=tuple(choices)
+        )
+
+
+def _is_bundle_stale(source_path, bundle_path):
+    try:
+        bundle_mtime = os.path.getmtime(bundle_path)
+    except OSError:
+        return True
+
+    return bundle_mtime < max(os.path.getmtime(source_path),
+                              os.path.getmtime(__file__))
+
+
+def _compile_source(source_path):
+    # the story declarations are only ever imported here, when the bundle
+    # has to be (re)built
+    namespace = {}
+    with open(source_path, encoding='utf-8') as f:
+        exec(compile(f.read(), source_path, 'exec'), namespace)
+
+    return compile_story(namespace['root_branch'])
+
+
+def write_story_bundle(source_path=default_source_path,
+                       bundle_path=default_bundle_path):
+    "Compiles the story source and atomically replaces the bundle file"
+    data = _compile_source(source_path)
+    temp_path = '%s.%s.tmp' % (bundle_path, os.getpid())
+
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, bundle_path)
+
+    return data
+
+
+def load_story_graph(source_path=default_source_path,
+                     bundle_path=default_bundle_path):
+    """Memory-maps the story bundle, rebuilding it first if it is missing or
+    older than the story source. If the bundle can't be written (eg. a read
+    only install) the compiled story is kept in memory instead."""
+    if _is_bundle_stale(source_path, bundle_path):
+        try:
+            write_story_bundle(source_path, bundle_path)
+        except OSError:
+            return StoryGraph(_compile_source(source_path))
+
+    with open(bundle_path, 'rb') as f:
+        return StoryGraph(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+if __name__ == '__main__':
+    data = write_story_bundle()
+    print('Wrote %s (%s nodes, %s bytes)' % (
+        default_bundle_path, len(StoryGraph(data)), len(data)))